@@ -9,8 +9,36 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
+from asgiref.sync import sync_to_async
 from django.core.asgi import get_asgi_application
 
+from dogs.loaders import warm_template_cache
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Под ASGI страницы чтения обслуживаются асинхронными вариантами представлений
+os.environ.setdefault('ASYNC_VIEWS', 'True')
+
+django_application = get_asgi_application()
+
+from dogs.counters import flush_on_shutdown  # noqa: E402 - модели импортируются после настройки Django
+
+
+async def application(scope, receive, send):
+    """
+    ASGI-приложение Django с обработкой lifespan: Django принимает только HTTP и WebSocket,
+    а при остановке процесса локальный буфер просмотров нужно записать в базу.
+    """
+    if scope['type'] != 'lifespan':
+        return await django_application(scope, receive, send)
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await sync_to_async(flush_on_shutdown)()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
 
-application = get_asgi_application()
+# Шаблоны компилируются при старте процесса, а не первым запросом
+warm_template_cache()
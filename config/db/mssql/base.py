@@ -0,0 +1,10 @@
+from mssql.base import DatabaseWrapper as MssqlDatabaseWrapper
+
+from config.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, MssqlDatabaseWrapper):
+    """
+    Бэкенд mssql с пулом соединений: TLS-рукопожатие и вход в SQL Server выполняются
+    один раз на соединение пула, а не на каждый запрос.
+    """
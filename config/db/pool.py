@@ -0,0 +1,284 @@
+import os
+import threading
+import time
+from collections import deque
+
+# Пулы соединений процесса по ключу базы (см. PooledDatabaseWrapperMixin.get_pool)
+pools = {}
+pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """
+    Свободное соединение не появилось за время ожидания.
+    """
+
+
+class ConnectionPool:
+    """
+    Пул открытых соединений DB-API одного процесса. Соединение выдаётся потоку на время запроса и
+    возвращается при закрытии соединения Django; перед выдачей проверяется запросом SELECT 1.
+    Соединений не больше max_size: остальные потоки ждут освобождения до timeout секунд.
+
+    Атрибуты:
+        max_size (int): Предел открытых соединений.
+        timeout (float): Предельное ожидание свободного соединения в секундах.
+        max_lifetime (float): Соединения старше этого числа секунд закрываются и открываются заново.
+        check_interval (float): Соединение, вернувшееся в пул раньше этого числа секунд назад, не проверяется.
+        errors (tuple): Исключения драйвера, по которым проверка считается неудачной.
+        pid (int): Процесс, создавший пул: после fork соединения родителя не используются.
+        idle (deque): Свободные соединения (соединение, время открытия, время возврата).
+        opened (dict): Время открытия выданных соединений по id.
+        size (int): Число открытых соединений, свободных и выданных.
+        counters (dict): Счётчики выдач, ожиданий, переподключений.
+
+    Методы:
+        checkout(self, connect): Выдача соединения.
+        checkin(self, connection, discard=False): Возврат соединения в пул.
+        stats(self): Счётчики и заполненность пула.
+        close(self): Закрытие свободных соединений.
+    """
+
+    def __init__(self, max_size=10, timeout=10, max_lifetime=30 * 60, check_interval=0, errors=(Exception,)):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+        self.errors = errors
+        self.pid = os.getpid()
+        self.idle = deque()
+        self.opened = {}
+        self.size = 0
+        self.condition = threading.Condition()
+        self.counters = dict.fromkeys(
+            ('checkouts', 'waits', 'wait_seconds', 'timeouts', 'connects', 'reconnects', 'recycled', 'discarded'), 0
+        )
+
+    def checkout(self, connect):
+        """
+        Выдача соединения: последнее вернувшееся свободное, новое, если предел не достигнут,
+        или первое освободившееся. Устаревшее или не прошедшее проверку соединение заменяется новым.
+
+        Аргументы:
+            connect (Callable): Открытие нового соединения драйвера.
+
+        Возвращает:
+            object: Соединение драйвера.
+
+        Исключения:
+            PoolTimeout: Если все соединения заняты дольше timeout.
+        """
+        deadline = time.monotonic() + self.timeout
+        waited_from = None
+        with self.condition:
+            self.counters['checkouts'] += 1
+            while not self.idle and self.size >= self.max_size:
+                now = time.monotonic()
+                if waited_from is None:
+                    waited_from = now
+                    self.counters['waits'] += 1
+                if now >= deadline:
+                    self.counters['timeouts'] += 1
+                    self.counters['wait_seconds'] += now - waited_from
+                    raise PoolTimeout(f'Нет свободного соединения с базой за {self.timeout} с (пул {self.max_size})')
+                self.condition.wait(deadline - now)
+            if waited_from is not None:
+                self.counters['wait_seconds'] += time.monotonic() - waited_from
+            if self.idle:
+                entry = self.idle.pop()
+            else:
+                entry = None
+                self.size += 1
+        if entry is None:
+            return self.open(connect)
+
+        connection, opened_at, returned_at = entry
+        now = time.monotonic()
+        if self.max_lifetime and now - opened_at > self.max_lifetime:
+            self.count('recycled')
+        elif now - returned_at < self.check_interval or self.ping(connection):
+            self.opened[id(connection)] = opened_at
+            return connection
+        else:
+            self.count('reconnects')
+        self.close_connection(connection)
+        return self.open(connect)
+
+    def checkin(self, connection, discard=False):
+        """
+        Возврат соединения в пул.
+
+        Аргументы:
+            connection (object): Соединение драйвера.
+            discard (bool): Закрыть соединение вместо возврата, например с незавершённой транзакцией.
+        """
+        opened_at = self.opened.pop(id(connection), None)
+        if opened_at is None:
+            # Соединение выдано не этим пулом
+            self.close_connection(connection)
+            return
+        now = time.monotonic()
+        if discard or (self.max_lifetime and now - opened_at > self.max_lifetime):
+            if discard:
+                self.count('discarded')
+            self.close_connection(connection)
+            self.release()
+            return
+        with self.condition:
+            self.idle.append((connection, opened_at, now))
+            self.condition.notify()
+
+    def open(self, connect):
+        """
+        Открытие соединения на уже занятое место в пуле. При ошибке место освобождается.
+        """
+        try:
+            connection = connect()
+        except BaseException:
+            self.release()
+            raise
+        self.count('connects')
+        self.opened[id(connection)] = time.monotonic()
+        return connection
+
+    def count(self, name):
+        with self.condition:
+            self.counters[name] += 1
+
+    def release(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def ping(self, connection):
+        """
+        Проверка соединения запросом SELECT 1.
+
+        Возвращает:
+            bool: True, если база ответила.
+        """
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute('SELECT 1')
+                cursor.fetchall()
+            finally:
+                cursor.close()
+        except self.errors:
+            return False
+        return True
+
+    def close_connection(self, connection):
+        try:
+            connection.close()
+        except self.errors:
+            pass
+
+    def stats(self):
+        """
+        Счётчики и заполненность пула.
+
+        Возвращает:
+            dict: Счётчики, а также size, idle, in_use и max_size.
+        """
+        with self.condition:
+            idle = len(self.idle)
+            return {
+                **self.counters,
+                'wait_seconds': round(self.counters['wait_seconds'], 3),
+                'size': self.size,
+                'idle': idle,
+                'in_use': self.size - idle,
+                'max_size': self.max_size,
+            }
+
+    def close(self):
+        """
+        Закрытие свободных соединений. Выданные закроются при возврате.
+        """
+        with self.condition:
+            idle = list(self.idle)
+            self.idle.clear()
+            self.size -= len(idle)
+            self.condition.notify_all()
+        for connection, _, _ in idle:
+            self.close_connection(connection)
+
+
+def pool_stats():
+    """
+    Счётчики всех пулов процесса.
+
+    Возвращает:
+        dict: Словарь {псевдоним базы: статистика пула}.
+    """
+    with pools_lock:
+        items = list(pools.items())
+    return {key[0]: pool.stats() for key, pool in items if pool.pid == os.getpid()}
+
+
+def close_pools():
+    """
+    Закрытие свободных соединений всех пулов процесса.
+    """
+    with pools_lock:
+        items = list(pools.values())
+        pools.clear()
+    for pool in items:
+        if pool.pid == os.getpid():
+            pool.close()
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Миксин DatabaseWrapper: вместо открытия соединения при каждом запросе соединение берётся из пула
+    процесса и возвращается в него при закрытии (в конце запроса при CONN_MAX_AGE = 0).
+    Пул настраивается ключом POOL настроек базы: MAX_SIZE, TIMEOUT, MAX_LIFETIME, CHECK_INTERVAL.
+    Без ключа POOL соединения открываются и закрываются как обычно.
+
+    Атрибуты:
+        connection_pool (ConnectionPool): Пул, выдавший текущее соединение, или None.
+
+    Методы:
+        get_pool(self): Пул этой базы или None.
+        get_new_connection(self, conn_params): Соединение из пула.
+        _close(self): Возврат соединения в пул.
+    """
+    connection_pool = None
+
+    def get_pool(self):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        settings_dict = self.settings_dict
+        key = (self.alias, settings_dict['NAME'], settings_dict['HOST'], settings_dict['PORT'], settings_dict['USER'])
+        with pools_lock:
+            pool = pools.get(key)
+            if pool is None or pool.pid != os.getpid():
+                pool = pools[key] = ConnectionPool(
+                    max_size=options.get('MAX_SIZE', 10),
+                    timeout=options.get('TIMEOUT', 10),
+                    max_lifetime=options.get('MAX_LIFETIME', 30 * 60),
+                    check_interval=options.get('CHECK_INTERVAL', 0),
+                    errors=(self.Database.Error,),
+                )
+        return pool
+
+    def get_new_connection(self, conn_params):
+        self.connection_pool = self.get_pool()
+        if self.connection_pool is None:
+            return super().get_new_connection(conn_params)
+        try:
+            return self.connection_pool.checkout(
+                lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params)
+            )
+        except PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+
+    def _close(self):
+        if self.connection_pool is None or self.connection is None:
+            return super()._close()
+        # Соединение с открытой транзакцией, ошибкой или изменённым autocommit не отдаётся другому запросу
+        discard = (self.in_atomic_block or self.errors_occurred
+                   or self.autocommit != self.settings_dict['AUTOCOMMIT'])
+        self.connection_pool.checkin(self.connection, discard=discard)
@@ -0,0 +1,88 @@
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Состояние маршрутизации текущего запроса; вне запроса (Celery, команды) все чтения идут в основную базу
+routing_state = ContextVar('routing_state', default=None)
+
+
+class RoutingState:
+    """
+    Маршрутизация запросов к базе в рамках одного HTTP-запроса.
+
+    Атрибуты:
+        replica (str): Псевдоним реплики для чтения или None, если чтения идут в основную базу.
+        wrote (bool): Была ли запись в основную базу; после неё чтения тоже идут в основную базу.
+    """
+
+    def __init__(self, replica=None):
+        self.replica = replica
+        self.wrote = False
+
+
+def choose_replica():
+    """
+    Случайная реплика из DATABASE_REPLICAS.
+
+    Возвращает:
+        str: Псевдоним реплики или None, если реплик нет.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def use_primary(view_func):
+    """
+    Декоратор представления, которое меняет данные на GET-запросе (переключение активности и т. п.):
+    чтения такого представления идут в основную базу, чтобы изменение не опиралось на отставшую реплику.
+    """
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    """
+    Маршрутизатор баз: запись всегда в основную базу (default), чтения безопасных запросов - в реплику,
+    выбранную ReplicaRoutingMiddleware. После записи и в течение DATABASE_PRIMARY_PIN_SECONDS
+    после неё чтения сессии идут в основную базу, чтобы пользователь видел свои изменения.
+
+    Методы:
+        db_for_read(self, model, **hints): База для чтения.
+        db_for_write(self, model, **hints): База для записи.
+        allow_relation(self, obj1, obj2, **hints): Связи между объектами основной базы и реплик разрешены.
+        allow_migrate(self, db, app_label, model_name=None, **hints): Миграции только в основной базе.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if state is None or state.replica is None or state.wrote:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
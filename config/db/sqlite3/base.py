@@ -0,0 +1,15 @@
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+
+from config.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, SQLiteDatabaseWrapper):
+    """
+    Бэкенд SQLite с пулом соединений: локальная замена mssql для проверки пула и замеров.
+    """
+
+    def get_pool(self):
+        # Соединение с базой в памяти никогда не закрывается, поэтому в пул не возвращается
+        if self.is_in_memory_db():
+            return None
+        return super().get_pool()
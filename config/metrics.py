@@ -0,0 +1,394 @@
+import hmac
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+# Границы корзин гистограмм: время в секундах и число SQL-запросов
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Полное время обработки запроса', DURATION_BUCKETS),
+    'http_request_db_duration_seconds': ('Время SQL-запросов за запрос', DURATION_BUCKETS),
+    'http_request_db_queries': ('Число SQL-запросов за запрос', QUERY_BUCKETS),
+    'http_request_template_duration_seconds': ('Время рендера шаблонов за запрос', DURATION_BUCKETS),
+}
+COUNTERS = {
+    'http_request_cache_hits_total': 'Попадания в кеш',
+    'http_request_cache_misses_total': 'Промахи кеша',
+}
+
+# Замеры текущего запроса; вне запроса (Celery, команды) ничего не записывается
+request_metrics = ContextVar('request_metrics', default=None)
+
+MISSING = object()
+
+
+class RequestMetrics:
+    """
+    Замеры одного HTTP-запроса.
+
+    Атрибуты:
+        started (float): Начало обработки по time.perf_counter().
+        queries (int): Число SQL-запросов.
+        db_time (float): Время SQL-запросов в секундах.
+        cache_hits (int): Попадания в кеш.
+        cache_misses (int): Промахи кеша.
+        template_time (float): Время рендера шаблонов в секундах.
+        template_depth (int): Глубина вложенного рендера: время вложенных шаблонов уже входит во внешний.
+
+    Методы:
+        server_timing(self, total): Значение заголовка Server-Timing.
+        increments(self, view, total): Приращения метрик для хранилища.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def server_timing(self, total):
+        """
+        Значение заголовка Server-Timing, длительности в миллисекундах.
+
+        Аргументы:
+            total (float): Полное время запроса в секундах.
+
+        Возвращает:
+            str: Значение заголовка.
+        """
+        return ', '.join([
+            f'db;desc="queries {self.queries}";dur={self.db_time * 1000:.2f}',
+            f'cache;desc="hits {self.cache_hits} misses {self.cache_misses}"',
+            f'tpl;dur={self.template_time * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+    def increments(self, view, total):
+        """
+        Приращения метрик запроса: по одной корзине каждой гистограммы, сумма и счётчик.
+
+        Аргументы:
+            view (str): Имя URL, например dogs:detail_dog.
+            total (float): Полное время запроса в секундах.
+
+        Возвращает:
+            dict: Словарь {поле хранилища: приращение}.
+        """
+        increments = {
+            metric_field('http_request_cache_hits_total', view): self.cache_hits,
+            metric_field('http_request_cache_misses_total', view): self.cache_misses,
+        }
+        for metric, value in (
+            ('http_request_duration_seconds', total),
+            ('http_request_db_duration_seconds', self.db_time),
+            ('http_request_db_queries', self.queries),
+            ('http_request_template_duration_seconds', self.template_time),
+        ):
+            buckets = HISTOGRAMS[metric][1]
+            le = next((str(bucket) for bucket in buckets if value <= bucket), '+Inf')
+            increments[metric_field(f'{metric}_bucket', view, le)] = 1
+            increments[metric_field(f'{metric}_sum', view)] = value
+            increments[metric_field(f'{metric}_count', view)] = 1
+        return increments
+
+
+def metric_field(name, view, le=''):
+    """
+    Поле хранилища метрик: имя, представление и граница корзины через '|'.
+    """
+    return f'{name}|{view}|{le}'
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Обёртка выполнения SQL (connection.execute_wrappers): время и число запросов текущего HTTP-запроса.
+    """
+    metrics = request_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    Подключение record_query к каждому соединению Django при его открытии.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def record_cache(hits, misses):
+    metrics = request_metrics.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+class CacheMetricsMixin:
+    """
+    Миксин бэкенда кеша: попадания и промахи get() записываются в замеры текущего запроса.
+    get_many() базового класса вызывает get() для каждого ключа и поэтому тоже учитывается.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version)
+        if value is MISSING:
+            record_cache(0, 1)
+            return default
+        record_cache(1, 0)
+        return value
+
+
+class InstrumentedLocMemCache(CacheMetricsMixin, LocMemCache):
+    pass
+
+
+class InstrumentedRedisCache(CacheMetricsMixin, RedisCache):
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version)
+        record_cache(len(values), len(keys) - len(values))
+        return values
+
+
+class InstrumentedTemplate(Template):
+    """
+    Шаблон, время рендера которого записывается в замеры текущего запроса.
+    Вложенные рендеры (render_to_string внутри тегов) входят во время внешнего и отдельно не считаются.
+    """
+
+    def render(self, context=None, request=None):
+        metrics = request_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        metrics.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    Бэкенд шаблонов Django, возвращающий InstrumentedTemplate.
+    """
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class LocalMetricsStore:
+    """
+    Метрики в памяти процесса: при нескольких процессах каждый отдаёт на /metrics только свои.
+
+    Атрибуты:
+        values (dict): Накопленные значения по полям.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def add(self, increments):
+        """
+        Прибавление приращений запроса.
+
+        Аргументы:
+            increments (dict): Словарь {поле: приращение}.
+        """
+        with self.lock:
+            for field, amount in increments.items():
+                self.values[field] = self.values.get(field, 0) + amount
+
+    def flush_due(self):
+        return False
+
+    def flush(self):
+        pass
+
+    def snapshot(self):
+        """
+        Текущие значения метрик.
+
+        Возвращает:
+            dict: Словарь {поле: значение}.
+        """
+        with self.lock:
+            return dict(self.values)
+
+
+class RedisMetricsStore(LocalMetricsStore):
+    """
+    Метрики всех процессов в хэше Redis. Процесс копит приращения в памяти и отправляет их одним
+    конвейером HINCRBYFLOAT не чаще раза в METRICS_FLUSH_INTERVAL секунд, поэтому запрос не ждёт Redis.
+
+    Атрибуты:
+        key (str): Ключ хэша с метриками.
+        values (dict): Приращения, ещё не отправленные в Redis.
+        last_flush (float): Время последней отправки по time.monotonic().
+    """
+
+    key = 'metrics:requests'
+
+    def __init__(self, location):
+        import redis
+
+        super().__init__()
+        self.client = redis.Redis.from_url(location)
+        self.errors = (redis.RedisError,)
+        self.last_flush = time.monotonic()
+        self.flush_lock = threading.Lock()
+
+    def flush_due(self):
+        return time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL
+
+    def flush(self):
+        """
+        Отправка накопленных приращений в Redis. Если Redis недоступен, приращения остаются до следующей отправки.
+        """
+        if not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.last_flush = time.monotonic()
+            with self.lock:
+                pending, self.values = self.values, {}
+            if not pending:
+                return
+            pipe = self.client.pipeline(transaction=False)
+            for field, amount in pending.items():
+                pipe.hincrbyfloat(self.key, field, amount)
+            try:
+                pipe.execute()
+            except self.errors:
+                self.add(pending)
+        finally:
+            self.flush_lock.release()
+
+    def snapshot(self):
+        self.flush()
+        return {field.decode(): float(value) for field, value in self.client.hgetall(self.key).items()}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_metrics_store():
+    """
+    Хранилище метрик, выбранное настройкой METRICS_BACKEND.
+
+    Возвращает:
+        LocalMetricsStore | RedisMetricsStore: Хранилище процесса.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.METRICS_BACKEND == 'redis':
+                    _store = RedisMetricsStore(settings.METRICS_LOCATION)
+                else:
+                    _store = LocalMetricsStore()
+    return _store
+
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_metrics(values):
+    """
+    Метрики в текстовом формате Prometheus. Корзины гистограмм хранятся без накопления
+    и суммируются здесь.
+
+    Аргументы:
+        values (dict): Словарь {поле: значение} из хранилища.
+
+    Возвращает:
+        str: Текст для /metrics.
+    """
+    series = {}
+    for field, value in values.items():
+        name, view, le = field.split('|')
+        series.setdefault(name, {}).setdefault(view, {})[le] = value
+
+    def label(view, le=None):
+        view = view.replace('\\', '\\\\').replace('"', '\\"')
+        return f'{{view="{view}"}}' if le is None else f'{{view="{view}",le="{le}"}}'
+
+    lines = []
+    for metric, (description, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {metric} {description}', f'# TYPE {metric} histogram']
+        for view, counts in sorted(series.get(f'{metric}_bucket', {}).items()):
+            cumulative = 0
+            for le in [*map(str, buckets), '+Inf']:
+                cumulative += counts.get(le, 0)
+                lines.append(f'{metric}_bucket{label(view, le)} {format_value(cumulative)}')
+            lines.append(f'{metric}_sum{label(view)} {format_value(series[f"{metric}_sum"][view][""])}')
+            lines.append(f'{metric}_count{label(view)} {format_value(series[f"{metric}_count"][view][""])}')
+    for metric, description in COUNTERS.items():
+        lines += [f'# HELP {metric} {description}', f'# TYPE {metric} counter']
+        for view, value in sorted(series.get(metric, {}).items()):
+            lines.append(f'{metric}{label(view)} {format_value(value[""])}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_access_allowed(request):
+    """
+    Проверка доступа к /metrics: персонал или Prometheus с токеном METRICS_TOKEN в заголовке
+    Authorization: Bearer (bearer_token в scrape_config).
+
+    Аргументы:
+        request (HttpRequest): Запрос от клиента.
+
+    Возвращает:
+        bool: True, если метрики можно отдать.
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if settings.METRICS_TOKEN and scheme.lower() == 'bearer':
+        return hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode())
+    return request.user.is_staff
+
+
+def metrics_view(request):
+    """
+    Метрики запросов для Prometheus. Доступны персоналу и по токену METRICS_TOKEN.
+
+    Аргументы:
+        request (HttpRequest): Запрос от клиента.
+
+    Возвращает:
+        HttpResponse: Метрики в текстовом формате Prometheus или 403.
+    """
+    if not metrics_access_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(get_metrics_store().snapshot()),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,260 @@
+import asyncio
+import mimetypes
+import os
+import time
+from urllib.parse import unquote, urlparse
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from config.db.routers import RoutingState, choose_replica, routing_state
+from config.metrics import RequestMetrics, get_metrics_store, request_metrics
+from config.storage import COMPRESSED_EXTENSIONS
+
+
+def accepted_encodings(header):
+    """
+    Кодировки из заголовка Accept-Encoding, которые клиент не запретил через q=0.
+
+    Аргументы:
+        header (str): Значение заголовка.
+
+    Возвращает:
+        set: Названия кодировок в нижнем регистре.
+    """
+    encodings = set()
+    for item in header.split(','):
+        encoding, _, params = item.strip().partition(';')
+        quality = params.strip().removeprefix('q=')
+        try:
+            if params and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        encodings.add(encoding.strip().lower())
+    return encodings
+
+
+class StaticFilesMiddleware:
+    """
+    Отдача собранной статики из STATIC_ROOT до сессий и аутентификации. Выбирает сжатую копию
+    .br или .gz по Accept-Encoding и ставит Cache-Control: файлы с хешем в имени кешируются навсегда (immutable),
+    остальные - на STATIC_MAX_AGE. Запросы к файлам, которых нет в STATIC_ROOT, передаются дальше.
+    Работает и в синхронной, и в асинхронной цепочке, чтобы под ASGI не переключать запрос в поток.
+
+    Атрибуты:
+        prefix (str): Путь STATIC_URL.
+        root (str): Каталог STATIC_ROOT.
+        immutable (set): Имена файлов с хешем из манифеста.
+
+    Методы:
+        serve_static(self, request): Ответ со статикой или None для остальных запросов.
+        serve(self, request, name): Ответ с файлом или None, если файла нет.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        self.prefix = urlparse(settings.STATIC_URL).path
+        self.root = os.fspath(settings.STATIC_ROOT) if settings.STATIC_ROOT else None
+        self.immutable = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.serve_static(request)
+        if response is not None:
+            return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        response = self.serve_static(request)
+        if response is not None:
+            return response
+        return await self.get_response(request)
+
+    def serve_static(self, request):
+        if self.root and request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            return self.serve(request, unquote(request.path_info[len(self.prefix):]))
+        return None
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        encoding, file_path, compressed = None, path, False
+        for candidate, extension in COMPRESSED_EXTENSIONS.items():
+            if os.path.isfile(path + extension):
+                compressed = True
+                if encoding is None and candidate in accepted:
+                    encoding, file_path = candidate, path + extension
+        stat = os.stat(file_path)
+
+        headers = {
+            'Cache-Control': (
+                f'public, max-age={settings.STATIC_IMMUTABLE_MAX_AGE}, immutable' if name in self.immutable
+                else f'public, max-age={settings.STATIC_MAX_AGE}'
+            ),
+            'ETag': f'"{int(stat.st_mtime):x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"',
+            'Last-Modified': http_date(stat.st_mtime),
+        }
+        if compressed:
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        not_modified = get_conditional_response(
+            request, etag=headers['ETag'], last_modified=int(stat.st_mtime), response=HttpResponse(headers=headers)
+        )
+        if not_modified.status_code == 304:
+            return not_modified
+
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        response = FileResponse(open(file_path, 'rb'), content_type=content_type, filename=os.path.basename(name),
+                                headers=headers)
+        response['Content-Length'] = stat.st_size
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Выбор базы для чтений запроса (см. config.db.routers.PrimaryReplicaRouter). Безопасные запросы (GET, HEAD)
+    читают из случайной реплики, остальные - из основной базы. Если запрос что-то записал, ответ ставит cookie,
+    и следующие DATABASE_PRIMARY_PIN_SECONDS секунд все запросы этого браузера читают из основной базы,
+    пока реплика догоняет изменения. Без реплик в DATABASE_REPLICAS ничего не делает.
+
+    Атрибуты:
+        cookie_name (str): Cookie со временем, до которого чтения идут в основную базу.
+        safe_methods (tuple): Методы, чтения которых можно отдать реплике.
+
+    Методы:
+        start(self, request): Состояние маршрутизации запроса.
+        finish(self, response, state): Закрепление за основной базой после записи.
+    """
+
+    cookie_name = 'primary_db_until'
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        state = self.start(request)
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        state = self.start(request)
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.finish(response, state)
+
+    def start(self, request):
+        try:
+            pinned_until = int(request.COOKIES.get(self.cookie_name, 0))
+        except ValueError:
+            pinned_until = 0
+        if request.method in self.safe_methods and pinned_until <= time.time():
+            return RoutingState(replica=choose_replica())
+        return RoutingState()
+
+    def finish(self, response, state):
+        if state.wrote:
+            max_age = settings.DATABASE_PRIMARY_PIN_SECONDS
+            response.set_cookie(self.cookie_name, str(int(time.time() + max_age)), max_age=max_age,
+                                httponly=True, samesite='Lax')
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Замер запроса: число и время SQL-запросов, попадания и промахи кеша, время рендера шаблонов и полное время.
+    Замеры отдаются в заголовке Server-Timing (если SERVER_TIMING, только при DEBUG или персоналу: заголовок
+    раскрывает число SQL-запросов и попадания в кеш) и копятся в гистограммах по имени URL для /metrics.
+    Стоит первым в MIDDLEWARE, чтобы полное время включало все остальные middleware.
+
+    Методы:
+        server_timing_allowed(self, user): Можно ли отдать заголовок Server-Timing.
+        finish(self, request, response, metrics, user): Заголовок и запись замеров в хранилище.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = request_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_metrics.reset(token)
+        store = self.finish(request, response, metrics, getattr(request, 'user', None))
+        if store.flush_due():
+            store.flush()
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = request_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_metrics.reset(token)
+        # Статика отдаётся до AuthenticationMiddleware, у такого запроса пользователя нет
+        user = await request.auser() if hasattr(request, 'auser') else None
+        store = self.finish(request, response, metrics, user)
+        if store.flush_due():
+            asyncio.get_running_loop().run_in_executor(None, store.flush)
+        return response
+
+    def server_timing_allowed(self, user):
+        return settings.DEBUG or (user is not None and user.is_staff)
+
+    def finish(self, request, response, metrics, user):
+        total = time.perf_counter() - metrics.started
+        if settings.SERVER_TIMING and self.server_timing_allowed(user):
+            response['Server-Timing'] = metrics.server_timing(total)
+        store = get_metrics_store()
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        if view != 'metrics':
+            store.add(metrics.increments(view, total))
+        return store
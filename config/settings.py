@@ -11,8 +11,10 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
+from kombu import Queue
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,7 +48,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.StaticFilesMiddleware',
+    'config.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,10 +64,16 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'NAME': 'django',
+        'BACKEND': 'config.metrics.InstrumentedDjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -84,10 +95,11 @@ DATABASE = os.getenv('MS_SQL_DATABASE')
 USER = os.getenv('MS_SQL_USER')
 PASSWORD = os.getenv('MS_SQL_KEY')
 CREATED_DATABASE = os.getenv('MS_SQL_CREATED_DATABASE')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE') or 10)
 
 DATABASES = {
     'default': {
-        'ENGINE': 'mssql',
+        'ENGINE': 'config.db.mssql',
         'NAME': DATABASE,
         'USER': USER,
         'PASSWORD': PASSWORD,
@@ -96,9 +108,32 @@ DATABASES = {
         'OPTIONS': {
             'driver': 'ODBC Driver 18 for SQL Server',
             'extra_params': 'Encrypt=Optional',
-        }
+        },
+        # Соединение закрывается в конце запроса и при этом возвращается в пул config.db
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': DB_POOL_SIZE,
+            'TIMEOUT': 10,
+            'MAX_LIFETIME': 30 * 60,
+            'CHECK_INTERVAL': 0,
+        },
     }
 }
+# Реплики только для чтения: хосты через запятую, база и учётная запись те же, что у основной
+for number, replica_host in enumerate(filter(None, os.getenv('MS_SQL_REPLICA_SERVERS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host.strip(),
+        'OPTIONS': {**DATABASES['default']['OPTIONS'], 'extra_params': 'Encrypt=Optional;ApplicationIntent=ReadOnly'},
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# В тестах без реплик replica1 - зеркало основной базы, чтобы ReplicaRoutingTestCase проверял маршрутизацию
+# без отдельного сервера; остальные тесты читают из основной базы, так как в DATABASE_REPLICAS её нет
+if sys.argv[1:2] == ['test'] and not DATABASE_REPLICAS:
+    DATABASES['replica1'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+DATABASE_ROUTERS = ['config.db.routers.PrimaryReplicaRouter']
+DATABASE_PRIMARY_PIN_SECONDS = 10
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -136,6 +171,18 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = (
     BASE_DIR / 'static',
 )
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+STATIC_MAX_AGE = 60 * 60
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'config.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = (
@@ -152,14 +199,38 @@ LOGIN_REDIRECT_URL = 'dogs:index'
 # LOGOUT_REDIRECT_URL = 'dogs:index'
 LOGIN_URL = '/users/'
 
-CACHE_ENABLED = os.getenv('CACHE_ENABLED') == True
-if CACHE_ENABLED:
-    CACHES = {
-        'default': {
-            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
-            'LOCATION': os.getenv('CACHE_LOCATION'),
-        }
+CACHE_ENABLED = os.getenv('CACHE_ENABLED') == 'True'
+CACHE_LOCATION = os.getenv('CACHE_LOCATION')
+CACHES = {
+    'default': {
+        'BACKEND': 'config.metrics.InstrumentedLocMemCache',
+    },
+    'local': {
+        'BACKEND': 'config.metrics.InstrumentedLocMemCache',
+        'LOCATION': 'local',
+    },
+    # Карточки кешируются по своему содержимому, поэтому кеш в памяти процесса не требует сброса между процессами
+    'template_fragments': {
+        'BACKEND': 'config.metrics.InstrumentedLocMemCache',
+        'LOCATION': 'template_fragments',
+        'OPTIONS': {
+            'MAX_ENTRIES': 20_000,
+        },
+    },
+}
+if CACHE_ENABLED and CACHE_LOCATION:
+    CACHES['default'] = {
+        'BACKEND': 'config.metrics.InstrumentedRedisCache',
+        'LOCATION': CACHE_LOCATION,
     }
+# Кеш по умолчанию общий для всех процессов (Redis): только тогда версии кеша моделей видны всем воркерам
+SHARED_CACHE = CACHE_ENABLED and bool(CACHE_LOCATION)
+REFERENCE_CACHE_TIMEOUT = 60 * 60
+# С кешем в памяти процесса изменение породы в другом воркере не сбрасывает страницы, и их устаревание
+# ограничено таймаутом
+PAGE_CACHE_TIMEOUT = 24 * 60 * 60 if SHARED_CACHE else 60
+REVIEW_CARD_CACHE = os.getenv('REVIEW_CARD_CACHE') == 'True'
+REVIEW_CARD_CACHE_TIMEOUT = 60 * 60
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -172,13 +243,78 @@ EMAIL_SERVER = EMAIL_HOST_USER
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 EMAIL_ADMIN = EMAIL_HOST_USER
 
+MAIL_OUTBOX_BATCH_SIZE = 100
+MAIL_OUTBOX_MAX_ATTEMPTS = 5
+MAIL_OUTBOX_RETRY_DELAY = 60
+MAIL_OUTBOX_LEASE = 10 * 60
+
+# View counter settings
+
+VIEW_COUNTER_BACKEND = os.getenv('VIEW_COUNTER_BACKEND', 'local')
+VIEW_COUNTER_LOCATION = f'{CACHE_LOCATION}/1'
+VIEW_COUNTER_FLUSH_INTERVAL = 10
+VIEW_COUNTER_BATCH_SIZE = 500
+VIEW_MILESTONE_STEP = 100
+
+# Request metrics settings
+
+METRICS_BACKEND = os.getenv('METRICS_BACKEND', 'local')
+METRICS_LOCATION = f'{CACHE_LOCATION}/2'
+METRICS_FLUSH_INTERVAL = 5
+# Токен Prometheus для /metrics (заголовок Authorization: Bearer); без токена метрики доступны только персоналу
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Заголовок Server-Timing отдаётся только при DEBUG или персоналу
+SERVER_TIMING = True
+
+# Conditional GET settings
+
+# Входит в ETag страниц: меняется при выкладке с изменёнными шаблонами, чтобы клиенты не получили 304 на старую разметку
+CONDITIONAL_GET_VERSION = os.getenv('CONDITIONAL_GET_VERSION', '1')
+
+# Async views settings
+
+# Асинхронные варианты страниц чтения вместо синхронных; config.asgi включает их по умолчанию
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS') == 'True'
+
+# Image variants settings
+
+IMAGE_VARIANT_WIDTHS = (160, 320, 640)
+IMAGE_VARIANT_FORMATS = ('webp', 'jpeg')
+IMAGE_VARIANT_QUALITY = 80
+
+# Search settings
+
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND') or 'auto'
+SEARCH_PAGINATE_BY = 6
+
 # Celery settings
 
-CELERY_BROKER_URL = f'{os.getenv('CACHE_LOCATION')}/0'
-CELERY_RESULT_BACKEND = f'{os.getenv('CACHE_LOCATION')}/0'
+CELERY_BROKER_URL = f'{CACHE_LOCATION}/0'
+CELERY_RESULT_BACKEND = f'{CACHE_LOCATION}/0'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Europe/Moscow'
+# Очереди по типу работы: письма, счётчики, медиа и обслуживание (всё, что не маршрутизировано, в том числе
+# будущие массовые задачи). Воркер выбирает очереди и пул командой runcelery
+CELERY_TASK_QUEUES = [Queue(name, routing_key=name) for name in ('mail', 'counters', 'media', 'maintenance')]
+CELERY_TASK_DEFAULT_QUEUE = 'maintenance'
+CELERY_TASK_ROUTES = {
+    'users.services.drain_outbox_task': {'queue': 'mail'},
+    'dogs.services.send_milestone_mails_task': {'queue': 'mail'},
+    'dogs.services.flush_view_counts_task': {'queue': 'counters'},
+    'dogs.services.build_image_variants_task': {'queue': 'media'},
+}
+CELERY_WORKER_PREFETCH_MULTIPLIER = 4
+CELERY_BEAT_SCHEDULE = {
+    'flush-dog-view-counts': {
+        'task': 'dogs.services.flush_view_counts_task',
+        'schedule': VIEW_COUNTER_FLUSH_INTERVAL,
+    },
+    'drain-mail-outbox': {
+        'task': 'users.services.drain_outbox_task',
+        'schedule': 30.0,
+    },
+}
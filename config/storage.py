@@ -0,0 +1,92 @@
+import gzip
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Расширение сжатой копии по кодировке из Accept-Encoding, в порядке предпочтения
+COMPRESSED_EXTENSIONS = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Хранилище статики: collectstatic добавляет в имена файлов хеш содержимого и кладёт рядом
+    сжатые копии .gz и .br (brotli, если установлен пакет brotli), чтобы сервер не сжимал их на каждый запрос.
+
+    Атрибуты:
+        compress_extensions (tuple): Расширения файлов, которые имеет смысл сжимать.
+        compress_min_size (int): Файлы меньше этого размера не сжимаются.
+        compress_min_ratio (float): Сжатая копия сохраняется, только если она меньше оригинала хотя бы в столько раз.
+
+    Методы:
+        stored_name(self, name): Имя файла с хешем, а до collectstatic - исходное имя.
+        hashed_name(self, name, content=None, filename=None): Имя с хешем; ссылки на отсутствующие карты кода не меняются.
+        post_process(self, paths, dry_run=False, **options): Хеширование и сжатие собранных файлов.
+        compress(self, name): Запись сжатых копий одного файла.
+    """
+    compress_extensions = ('.css', '.js', '.map', '.svg', '.txt', '.json', '.html', '.xml', '.ico')
+    compress_min_size = 256
+    compress_min_ratio = 1.05
+
+    def stored_name(self, name):
+        # Без манифеста (collectstatic ещё не запускался) отдаются исходные имена из STATICFILES_DIRS
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def hashed_name(self, name, content=None, filename=None):
+        # Сборки библиотек ссылаются на карты кода, которых нет в static (например, popper.min.js.map):
+        # такая ссылка остаётся как есть, а не прерывает collectstatic
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if name.endswith('.map'):
+                return name
+            raise
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if not name.endswith(self.compress_extensions):
+                continue
+            for compressed_name in self.compress(name):
+                yield name, compressed_name, True
+
+    def compress(self, name):
+        """
+        Запись сжатых копий файла рядом с ним. Копия, которая почти не меньше оригинала, удаляется,
+        чтобы сервер отдал оригинал.
+
+        Аргументы:
+            name (str): Имя файла в хранилище.
+
+        Возвращает:
+            list: Имена записанных сжатых копий.
+        """
+        path = Path(self.path(name))
+        content = path.read_bytes()
+        if len(content) < self.compress_min_size:
+            return []
+        compressors = {'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressors['br'] = lambda data: brotli.compress(data, quality=11)
+        written = []
+        for encoding, compress in compressors.items():
+            compressed_path = path.with_name(path.name + COMPRESSED_EXTENSIONS[encoding])
+            compressed = compress(content)
+            if len(compressed) * self.compress_min_ratio < len(content):
+                compressed_path.write_bytes(compressed)
+                written.append(name + COMPRESSED_EXTENSIONS[encoding])
+            else:
+                compressed_path.unlink(missing_ok=True)
+        return written
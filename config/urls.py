@@ -19,8 +19,11 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 
+from config.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
     path('', include('dogs.urls', namespace='dogs')),
     path('users/', include('users.urls', namespace='users')),
     path('reviews/', include('reviews.urls', namespace='reviews')),
@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from dogs.loaders import warm_template_cache
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Шаблоны компилируются при старте процесса, а не первым запросом
+warm_template_cache()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from dogs.models import Dog, Category
+from dogs.models import Dog, Category, DogViewMilestone
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -13,3 +13,10 @@ class DogAdmin(admin.ModelAdmin):
     list_display = ['name', 'category']
     list_filter = ['category']
     ordering = ['name']
+
+
+@admin.register(DogViewMilestone)
+class DogViewMilestoneAdmin(admin.ModelAdmin):
+    list_display = ['dog', 'threshold', 'reached_at', 'notified_at']
+    list_filter = ['threshold']
+    ordering = ['-reached_at']
@@ -0,0 +1,162 @@
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404
+from django.views.generic import DetailView, ListView
+from django.views.generic.base import ContextMixin
+
+
+def filter_object_queryset(view, queryset):
+    """
+    Отбор объекта детального представления по pk или slug из URL, как в SingleObjectMixin.get_object().
+
+    Аргументы:
+        view (SingleObjectMixin): Представление.
+        queryset (QuerySet): Набор запросов.
+
+    Возвращает:
+        QuerySet: Строка объекта.
+
+    Исключения:
+        ImproperlyConfigured: Если в URL нет ни pk, ни slug.
+    """
+    pk = view.kwargs.get(view.pk_url_kwarg)
+    slug = view.kwargs.get(view.slug_url_kwarg)
+    if pk is not None:
+        queryset = queryset.filter(pk=pk)
+    if slug is not None and (pk is None or view.query_pk_and_slug):
+        queryset = queryset.filter(**{view.get_slug_field(): slug})
+    if pk is None and slug is None:
+        raise ImproperlyConfigured(
+            f'{view.__class__.__name__} должно вызываться с pk или slug в URL.'
+        )
+    return queryset
+
+
+def select_view(view, async_view):
+    """
+    Выбор варианта представления для URL: асинхронный под ASGI (ASYNC_VIEWS), синхронный под WSGI,
+    где асинхронное представление выполнялось бы в отдельном цикле событий на каждый запрос.
+
+    Аргументы:
+        view: Синхронное представление (функция или класс).
+        async_view: Асинхронный вариант представления.
+
+    Возвращает:
+        Представление, которое нужно подключить.
+    """
+    return async_view if settings.ASYNC_VIEWS else view
+
+
+class AsyncUserMixin:
+    """
+    Миксин асинхронного представления: пользователь загружается через request.auser() до обработчика
+    и подставляется в request.user, чтобы проверки доступа и шаблоны не обращались к базе синхронно.
+
+    Методы:
+        dispatch(self, request, *args, **kwargs): Загрузка пользователя и вызов обработчика.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        response = super().dispatch(request, *args, **kwargs)
+        if inspect.isawaitable(response):
+            response = await response
+        return response
+
+
+class AsyncLoginRequiredMixin(AsyncUserMixin, LoginRequiredMixin):
+    """
+    Асинхронный вариант LoginRequiredMixin: проверка входа идёт по уже загруженному пользователю.
+    """
+
+
+class AsyncListView(AsyncUserMixin, ListView):
+    """
+    ListView для ASGI: строки списка и страницы читаются асинхронным ORM в обработчике get,
+    шаблон рендерится обработчиком запросов Django после ответа представления.
+
+    Методы:
+        get(self, request, *args, **kwargs): Обработка GET-запроса.
+        aget_context_data(self, **kwargs): Асинхронное формирование контекста шаблона.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        context = await self.aget_context_data()
+        return self.render_to_response(context)
+
+    async def aget_context_data(self, **kwargs):
+        """
+        Формирование контекста шаблона. Страница читается apaginate_queryset (CursorPaginationMixin),
+        обычная пагинация Django выполняется в потоке, список без пагинации читается асинхронно.
+
+        Аргументы:
+            **kwargs: Дополнительный контекст.
+
+        Возвращает:
+            dict: Контекст шаблона.
+        """
+        queryset = self.object_list
+        page_size = self.get_paginate_by(queryset)
+        if not page_size:
+            paginator, page, object_list, is_paginated = None, None, [row async for row in queryset], False
+        elif hasattr(self, 'apaginate_queryset'):
+            paginator, page, object_list, is_paginated = await self.apaginate_queryset(queryset, page_size)
+        else:
+            paginator, page, object_list, is_paginated = await sync_to_async(self.paginate_queryset)(
+                queryset, page_size
+            )
+        if not self.get_allow_empty() and not object_list:
+            raise Http404
+        context = {
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': is_paginated,
+            'object_list': object_list,
+        }
+        context_object_name = self.get_context_object_name(object_list)
+        if context_object_name is not None:
+            context[context_object_name] = object_list
+        context.update(kwargs)
+        # Пагинация уже выполнена, поэтому MultipleObjectMixin пропускается
+        return ContextMixin.get_context_data(self, **context)
+
+
+class AsyncDetailView(AsyncUserMixin, DetailView):
+    """
+    DetailView для ASGI: объект читается асинхронным ORM.
+
+    Методы:
+        get(self, request, *args, **kwargs): Обработка GET-запроса.
+        aget_object(self, queryset=None): Асинхронное получение объекта.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
+    async def aget_object(self, queryset=None):
+        """
+        Получение объекта по pk или slug из URL.
+
+        Аргументы:
+            queryset (QuerySet): Набор запросов. По умолчанию get_queryset().
+
+        Возвращает:
+            Model: Объект.
+
+        Исключения:
+            Http404: Если объект не найден.
+        """
+        if queryset is None:
+            queryset = self.get_queryset()
+        queryset = filter_object_queryset(self, queryset)
+        try:
+            return await queryset.aget()
+        except queryset.model.DoesNotExist:
+            raise Http404(f'{queryset.model._meta.verbose_name} не найден(а)')
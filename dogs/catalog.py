@@ -0,0 +1,265 @@
+import csv
+import datetime
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+
+from dogs.models import Category, Dog, Parent
+from dogs.validators import validate_birth_date
+from users.models import User, UserRoles
+
+FORMATS = ('ndjson', 'csv')
+
+# Родители в CSV занимают колонки parent_1_name, parent_1_category, parent_1_birth_date и т. д.
+CSV_PARENTS = 2
+PARENT_FIELDS = ('name', 'category', 'birth_date')
+CSV_FIELDS = ['name', 'category', 'birth_date', 'photo', 'owner', 'is_active'] + [
+    f'parent_{n}_{field}' for n in range(1, CSV_PARENTS + 1) for field in PARENT_FIELDS
+]
+TRUE_VALUES = ('1', 'true', 'yes', 'да')
+FALSE_VALUES = ('0', 'false', 'no', 'нет')
+
+# Выгрузка: (колонка, поле values_list). Колонки собак совпадают с форматом импорта
+DOG_EXPORT_FIELDS = (
+    ('id', 'pk'), ('name', 'name'), ('category', 'category__name'), ('birth_date', 'birth_date'),
+    ('photo', 'photo'), ('owner', 'owner__email'), ('is_active', 'is_active'), ('view_count', 'view_count'),
+)
+# Строк на одну порцию чтения из базы и на один фрагмент ответа
+EXPORT_CHUNK_SIZE = 2000
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def detect_format(path):
+    """
+    Формат файла каталога по расширению: .csv - CSV, остальные - NDJSON (объект JSON на строку).
+    """
+    return 'csv' if str(path).lower().endswith('.csv') else 'ndjson'
+
+
+def read_records(stream, fmt):
+    """
+    Потоковое чтение записей каталога: в памяти только текущая строка файла.
+
+    Аргументы:
+        stream (file): Текстовый поток файла.
+        fmt (str): Формат из FORMATS.
+
+    Возвращает:
+        generator: Пары (номер строки, запись). Нераспознанная строка NDJSON даёт запись None.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            parents = []
+            for n in range(1, CSV_PARENTS + 1):
+                parent = {field: row.pop(f'parent_{n}_{field}', None) for field in PARENT_FIELDS}
+                if any(parent.values()):
+                    parents.append(parent)
+            row['parents'] = parents
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record
+
+
+def clean_text(record, field, max_length, required=True):
+    value = record.get(field)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise ValidationError(f'{field}: обязательное поле')
+    if len(value) > max_length:
+        raise ValidationError(f'{field}: длиннее {max_length} символов')
+    return value
+
+
+def clean_date(record, field):
+    value = record.get(field)
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValidationError(f'{field}: дата должна быть в формате ГГГГ-ММ-ДД')
+
+
+def clean_record(record):
+    """
+    Проверка и приведение записи каталога. Дата рождения собаки проверяется теми же правилами,
+    что и в форме собаки (validate_birth_date).
+
+    Аргументы:
+        record (dict): Запись из read_records.
+
+    Исключения:
+        ValidationError: Если запись не подходит для импорта.
+
+    Возвращает:
+        dict: Запись с полями name, category, birth_date, photo, owner, is_active и списком parents.
+    """
+    if not isinstance(record, dict):
+        raise ValidationError('Строка не является объектом JSON')
+    name_length = Dog._meta.get_field('name').max_length
+    category_length = Category._meta.get_field('name').max_length
+    cleaned = {
+        'name': clean_text(record, 'name', name_length),
+        'category': clean_text(record, 'category', category_length),
+        'birth_date': clean_date(record, 'birth_date'),
+        'photo': clean_text(record, 'photo', Dog._meta.get_field('photo').max_length, required=False),
+        'owner': clean_text(record, 'owner', User._meta.get_field('email').max_length, required=False),
+    }
+    validate_birth_date(cleaned['birth_date'])
+
+    is_active = record.get('is_active', True)
+    if isinstance(is_active, str):
+        if is_active.strip().lower() in FALSE_VALUES:
+            is_active = False
+        elif is_active.strip().lower() in TRUE_VALUES or not is_active.strip():
+            is_active = True
+        else:
+            raise ValidationError('is_active: ожидается true или false')
+    cleaned['is_active'] = bool(is_active)
+
+    parents = record.get('parents') or []
+    if not isinstance(parents, list):
+        raise ValidationError('parents: ожидается список')
+    cleaned['parents'] = []
+    for parent in parents:
+        if not isinstance(parent, dict):
+            raise ValidationError('parents: ожидается список объектов')
+        cleaned['parents'].append({
+            'name': clean_text(parent, 'name', Parent._meta.get_field('name').max_length),
+            'category': clean_text(parent, 'category', category_length, required=False) or cleaned['category'],
+            'birth_date': clean_date(parent, 'birth_date'),
+        })
+    return cleaned
+
+
+def export_scope(queryset, user, owner_field):
+    """
+    Строки выгрузки, доступные пользователю, по правилам списков неактивных собак и отзывов:
+    модератор и администратор получают все строки, пользователь - только свои.
+
+    Аргументы:
+        queryset (QuerySet): Все строки.
+        user (User): Пользователь или None для выгрузки командой (все строки).
+        owner_field (str): Поле владельца строки (owner у собак, author у отзывов).
+
+    Возвращает:
+        QuerySet: Доступные строки.
+    """
+    if user is None or user.role in [UserRoles.MODERATOR, UserRoles.ADMIN]:
+        return queryset
+    if user.role == UserRoles.USER:
+        return queryset.filter(**{owner_field: user})
+    return queryset
+
+
+def export_queryset(queryset, fields):
+    """
+    Проекция выгрузки: values_list только нужных колонок (связанные поля - через JOIN) в порядке pk.
+    """
+    return queryset.order_by('pk').values_list(*(lookup for _, lookup in fields))
+
+
+class RecordFormatter:
+    """
+    Преобразование строк values_list в текст CSV или NDJSON. Строки собираются во фрагменты
+    по EXPORT_CHUNK_SIZE, чтобы не отправлять клиенту каждую строку отдельно.
+
+    Атрибуты:
+        columns (list): Названия колонок.
+        fmt (str): Формат из FORMATS.
+
+    Методы:
+        header(self): Заголовок файла (строка колонок CSV).
+        format(self, row): Текст одной строки.
+    """
+
+    class Echo:
+        def write(self, value):
+            return value
+
+    def __init__(self, fields, fmt):
+        self.columns = [column for column, _ in fields]
+        self.fmt = fmt
+        self.writer = csv.writer(self.Echo())
+
+    def header(self):
+        return self.writer.writerow(self.columns) if self.fmt == 'csv' else ''
+
+    def format(self, row):
+        if self.fmt == 'csv':
+            return self.writer.writerow(row)
+        return json.dumps(dict(zip(self.columns, row)), ensure_ascii=False, cls=DjangoJSONEncoder) + '\n'
+
+
+def iter_export(queryset, fields, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Потоковая выгрузка строк: в памяти одна порция строк из базы и один фрагмент текста.
+
+    Аргументы:
+        queryset (QuerySet): Строки выгрузки.
+        fields (tuple): Пары (колонка, поле values_list).
+        fmt (str): Формат из FORMATS.
+        chunk_size (int): Строк в порции.
+
+    Возвращает:
+        generator: Фрагменты текста.
+    """
+    formatter = RecordFormatter(fields, fmt)
+    lines = [formatter.header()]
+    for row in export_queryset(queryset, fields).iterator(chunk_size=chunk_size):
+        lines.append(formatter.format(row))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+
+
+async def aiter_export(queryset, fields, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Асинхронная обёртка iter_export для ASGI: фрагменты строятся в потоке через sync_to_async.
+    QuerySet.aiterator() здесь не подходит: для values_list он выполняет запрос в цикле событий.
+    """
+    chunks = iter_export(queryset, fields, fmt, chunk_size)
+    while (chunk := await sync_to_async(next)(chunks, None)) is not None:
+        yield chunk
+
+
+def export_response(request, queryset, fields, name):
+    """
+    Потоковый ответ с выгрузкой в формате из параметра format (csv по умолчанию).
+    Под ASGI содержимое отдаётся асинхронным итератором, под WSGI - синхронным, иначе Django
+    собрал бы весь ответ в памяти.
+
+    Аргументы:
+        request (HttpRequest): Запрос от клиента.
+        queryset (QuerySet): Строки выгрузки с учётом прав пользователя.
+        fields (tuple): Пары (колонка, поле values_list).
+        name (str): Имя файла без расширения.
+
+    Возвращает:
+        StreamingHttpResponse | HttpResponseBadRequest: Ответ или ошибка, если формат неизвестен.
+    """
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest(f'Неизвестный формат выгрузки: {fmt}')
+    # База выбирается сейчас: состояние маршрутизации реплик сбрасывается до того, как ответ начнёт отдаваться
+    queryset = queryset.using(queryset.db)
+    content = aiter_export if isinstance(request, ASGIRequest) else iter_export
+    response = StreamingHttpResponse(content(queryset, fields, fmt), content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+    return response
@@ -0,0 +1,197 @@
+import datetime
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.generic.detail import SingleObjectMixin
+from redis.exceptions import RedisError
+
+from dogs.async_views import filter_object_queryset
+from dogs.services import get_model_cache_version
+
+
+def make_etag(request, versions, values=()):
+    """
+    Слабый ETag страницы: пользователь (страница содержит его меню и кнопки), версии кеша моделей,
+    значения агрегатов и CONDITIONAL_GET_VERSION.
+
+    Аргументы:
+        request (HttpRequest): Запрос с загруженным пользователем.
+        versions (list): Версии кеша моделей.
+        values (list): Пары (имя, значение) агрегатов.
+
+    Возвращает:
+        str: ETag.
+    """
+    user = request.user
+    user_key = (user.pk, user.updated_at) if user.is_authenticated else None
+    payload = repr((settings.CONDITIONAL_GET_VERSION, user_key, versions, sorted(values)))
+    return f'W/"{hashlib.md5(payload.encode()).hexdigest()}"'
+
+
+def get_list_validators(request, models):
+    """
+    Валидаторы списка без запросов к базе: ETag из версий кеша моделей, строки которых выводятся на странице.
+    Версия модели меняется после каждого сохранения или удаления строки (dogs/signals.py), после массовых
+    изменений (импорт каталога, варианты изображений) и сброса счётчика просмотров, поэтому агрегаты
+    по всей таблице не нужны. Версии общие для воркеров только в общем кеше (SHARED_CACHE): без него, как и при
+    недоступном Redis, другой воркер не увидел бы смены версии и отвечал бы 304 на изменённый список,
+    поэтому ETag не выдаётся. Last-Modified у списка нет: время последнего изменения без запроса к базе неизвестно.
+
+    Аргументы:
+        request (HttpRequest): Запрос с загруженным пользователем.
+        models (tuple): Модели, строки которых выводятся на странице, включая справочные.
+
+    Возвращает:
+        tuple: ETag (None без общего кеша) и None вместо времени последнего изменения.
+    """
+    if not settings.SHARED_CACHE:
+        return None, None
+    try:
+        versions = [get_model_cache_version(model, fallback=False) for model in models]
+    except (OSError, RedisError):
+        return None, None
+    return make_etag(request, versions), None
+
+
+def get_validators(request, queryset, fields=('updated_at',), models=(), extra=None):
+    """
+    Валидаторы страницы объекта одним запросом агрегатов, до чтения объекта и рендера шаблона:
+    Max времени изменения строки (и связанных строк) и Count - удаление строки тоже меняет страницу.
+    В ETag входят также пользователь, версии кеша справочных моделей и CONDITIONAL_GET_VERSION (make_etag).
+
+    Аргументы:
+        request (HttpRequest): Запрос с загруженным пользователем.
+        queryset (QuerySet): Строки, из которых собрана страница.
+        fields (tuple): Поля времени изменения, в том числе связанных моделей (owner__updated_at).
+        models (tuple): Справочные модели без updated_at (породы), их версия кеша входит в ETag.
+        extra (dict): Дополнительные агрегаты, нужные представлению при ответе 304.
+
+    Возвращает:
+        tuple: ETag, время последнего изменения (или None) и словарь значений агрегатов.
+    """
+    row = queryset.aggregate(count=Count('pk'), **{field: Max(field) for field in fields}, **(extra or {}))
+    etag = make_etag(request, [get_model_cache_version(model) for model in models], row.items())
+    times = [value for value in row.values() if isinstance(value, datetime.datetime)]
+    if request.user.is_authenticated:
+        times.append(request.user.updated_at)
+    return etag, max(times, default=None), row
+
+
+def not_modified_response(request, etag, last_modified):
+    """
+    Ответ 304, если клиент прислал совпадающий ETag. If-Modified-Since не проверяется: время изменения
+    строк не учитывает пользователя и справочники, поэтому 304 решается только по ETag.
+
+    Возвращает:
+        HttpResponseNotModified | None: Ответ 304 с валидаторами или None, если страницу нужно отдать.
+    """
+    if etag is None:
+        return None
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        set_validators(request, response, etag, last_modified)
+    return response
+
+
+def set_validators(request, response, etag, last_modified):
+    """
+    Заголовки валидаторов ответа. Cache-Control: no-cache разрешает хранить страницу, но требует
+    проверять её при каждом запросе: без него браузер по Last-Modified сам решил бы, что страница свежая.
+    Страницы вошедшего пользователя помечаются private.
+
+    Возвращает:
+        HttpResponse: Тот же ответ.
+    """
+    if response.status_code not in (200, 304):
+        return response
+    if etag is not None:
+        response.headers.setdefault('ETag', etag)
+    if last_modified is not None:
+        response.headers.setdefault('Last-Modified', http_date(last_modified.timestamp()))
+    if request.user.is_authenticated:
+        patch_cache_control(response, no_cache=True, private=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+class BaseConditionalGetMixin:
+    """
+    Общая часть миксинов условного GET для списков и детальных представлений. Список проверяется
+    по версиям кеша моделей (get_list_validators), объект - запросом агрегатов (get_validators).
+
+    Атрибуты:
+        validator_fields (tuple): Поля времени изменения объекта и связанных строк.
+        validator_models (tuple): Модели, версия кеша которых входит в ETag: у списка - все модели его строк,
+            у объекта - справочные модели.
+
+    Методы:
+        get_validator_queryset(self): Строка объекта из URL.
+        get_validator_aggregates(self): Дополнительные агрегаты запроса валидаторов.
+        get_validators(self): ETag и время последнего изменения страницы.
+    """
+    validator_fields = ('updated_at',)
+    validator_models = ()
+
+    def get_validator_queryset(self):
+        return filter_object_queryset(self, self.get_queryset())
+
+    def get_validator_aggregates(self):
+        return {}
+
+    def get_validators(self):
+        if not isinstance(self, SingleObjectMixin):
+            self.validator_row = {}
+            return get_list_validators(self.request, self.validator_models)
+        etag, last_modified, self.validator_row = get_validators(
+            self.request, self.get_validator_queryset(), self.validator_fields, self.validator_models,
+            self.get_validator_aggregates(),
+        )
+        return etag, last_modified
+
+
+class ConditionalGetMixin(BaseConditionalGetMixin):
+    """
+    Условный GET для синхронного представления: при совпадении ETag ответ 304 без чтения объектов
+    и рендера шаблона. Ставится после миксинов проверки доступа.
+
+    Методы:
+        get(self, request, *args, **kwargs): Проверка валидаторов и обработка GET-запроса.
+        not_modified(self): Действие при ответе 304.
+    """
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            self.not_modified()
+            return response
+        return set_validators(request, super().get(request, *args, **kwargs), etag, last_modified)
+
+    def not_modified(self):
+        pass
+
+
+class AsyncConditionalGetMixin(BaseConditionalGetMixin):
+    """
+    Условный GET для асинхронного представления: валидаторы (версии кеша и запрос агрегатов) читаются в потоке.
+
+    Методы:
+        get(self, request, *args, **kwargs): Проверка валидаторов и обработка GET-запроса.
+        anot_modified(self): Действие при ответе 304.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        etag, last_modified = await sync_to_async(self.get_validators)()
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            await self.anot_modified()
+            return response
+        return set_validators(request, await super().get(request, *args, **kwargs), etag, last_modified)
+
+    async def anot_modified(self):
+        pass
@@ -0,0 +1,319 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from dogs.milestones import process_view_milestones
+from dogs.models import Dog
+
+logger = logging.getLogger(__name__)
+
+
+class LocalViewCounter:
+    """
+    Буфер просмотров в памяти процесса, разбитый на шарды с отдельными блокировками.
+
+    Атрибуты:
+        shards (list): Список пар (словарь счётчиков, блокировка).
+    """
+
+    def __init__(self, shards=16):
+        self.shards = [({}, threading.Lock()) for _ in range(shards)]
+
+    def incr(self, dog_id, amount=1):
+        """
+        Увеличение счётчика просмотров собаки в буфере.
+
+        Аргументы:
+            dog_id (int): ID собаки.
+            amount (int): Величина приращения.
+        """
+        counts, lock = self.shards[dog_id % len(self.shards)]
+        with lock:
+            counts[dog_id] = counts.get(dog_id, 0) + amount
+
+    async def aincr(self, dog_id, amount=1):
+        """
+        Асинхронный вариант incr: буфер в памяти не ждёт ввода-вывода.
+        """
+        self.incr(dog_id, amount)
+
+    def drain(self):
+        """
+        Забирает накопленные приращения и очищает буфер.
+
+        Возвращает:
+            dict: Словарь {ID собаки: приращение}.
+        """
+        result = {}
+        for counts, lock in self.shards:
+            with lock:
+                items = list(counts.items())
+                counts.clear()
+            for dog_id, amount in items:
+                result[dog_id] = result.get(dog_id, 0) + amount
+        return result
+
+    def restore(self, counts):
+        """
+        Возвращает в буфер приращения, которые не удалось записать в базу.
+
+        Аргументы:
+            counts (dict): Словарь {ID собаки: приращение}.
+        """
+        for dog_id, amount in counts.items():
+            self.incr(dog_id, amount)
+
+
+class RedisViewCounter:
+    """
+    Буфер просмотров в хэше Redis, общий для всех процессов.
+
+    Атрибуты:
+        key (str): Ключ хэша со счётчиками.
+    """
+
+    key = 'dogs:view_counts'
+
+    def __init__(self, location):
+        import redis
+
+        self.location = location
+        self.client = redis.Redis.from_url(location)
+        self.async_clients = weakref.WeakKeyDictionary()
+
+    def async_client(self):
+        """
+        Асинхронный клиент Redis текущего цикла событий. Клиент привязан к циклу, поэтому у каждого цикла свой.
+
+        Возвращает:
+            redis.asyncio.Redis: Клиент.
+        """
+        import redis.asyncio
+
+        loop = asyncio.get_running_loop()
+        client = self.async_clients.get(loop)
+        if client is None:
+            client = self.async_clients[loop] = redis.asyncio.Redis.from_url(self.location)
+        return client
+
+    def incr(self, dog_id, amount=1):
+        """
+        Увеличение счётчика просмотров собаки в Redis.
+
+        Аргументы:
+            dog_id (int): ID собаки.
+            amount (int): Величина приращения.
+        """
+        self.client.hincrby(self.key, dog_id, amount)
+
+    async def aincr(self, dog_id, amount=1):
+        """
+        Асинхронный вариант incr без занятия потока.
+        """
+        await self.async_client().hincrby(self.key, dog_id, amount)
+
+    def drain(self):
+        """
+        Атомарно забирает хэш со счётчиками и удаляет его.
+
+        Возвращает:
+            dict: Словарь {ID собаки: приращение}.
+        """
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(self.key)
+        pipe.delete(self.key)
+        counts, _ = pipe.execute()
+        return {int(dog_id): int(amount) for dog_id, amount in counts.items()}
+
+    def restore(self, counts):
+        """
+        Возвращает в Redis приращения, которые не удалось записать в базу.
+
+        Аргументы:
+            counts (dict): Словарь {ID собаки: приращение}.
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for dog_id, amount in counts.items():
+            pipe.hincrby(self.key, dog_id, amount)
+        pipe.execute()
+
+
+_counter = None
+_counter_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def get_view_counter():
+    """
+    Получение буфера просмотров, выбранного настройкой VIEW_COUNTER_BACKEND.
+
+    Возвращает:
+        LocalViewCounter | RedisViewCounter: Буфер просмотров процесса.
+    """
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                if settings.VIEW_COUNTER_BACKEND == 'redis':
+                    _counter = RedisViewCounter(settings.VIEW_COUNTER_LOCATION)
+                else:
+                    _counter = LocalViewCounter()
+    return _counter
+
+
+def flush_on_shutdown():
+    """
+    Сброс локального буфера просмотров при остановке веб-воркера: вызывается хуком worker_exit gunicorn
+    (gunicorn.conf.py) и событием lifespan.shutdown ASGI-сервера (config/asgi.py). Сброс через atexit
+    не используется: он выполнялся бы и после других процессов с Django (например, тестов, когда тестовая
+    база уже удалена) в базу из настроек. Буфер Redis сбрасывает периодическая задача Celery.
+
+    Возвращает:
+        int: Количество записанных просмотров (0 и запись в лог, если база недоступна).
+    """
+    if not isinstance(_counter, LocalViewCounter):
+        return 0
+    try:
+        return flush_view_counts()
+    except Exception:
+        logger.exception('Ошибка сброса буфера просмотров при остановке воркера')
+        return 0
+
+
+def record_dog_view(dog_id, auto_flush=True):
+    """
+    Учёт одного просмотра собаки без записи в базу данных.
+
+    Локальный буфер живёт в памяти веб-процесса, поэтому сбрасывается им самим
+    не чаще раза в VIEW_COUNTER_FLUSH_INTERVAL секунд. Буфер Redis сбрасывает периодическая задача Celery.
+
+    Аргументы:
+        dog_id (int): ID собаки.
+        auto_flush (bool): Разрешить сброс локального буфера из текущего потока.
+    """
+    counter = get_view_counter()
+    counter.incr(dog_id)
+    if auto_flush and isinstance(counter, LocalViewCounter):
+        if time.monotonic() - _last_flush >= settings.VIEW_COUNTER_FLUSH_INTERVAL:
+            flush_view_counts(blocking=False)
+
+
+async def arecord_dog_view(dog_id):
+    """
+    Асинхронный вариант record_dog_view для ASGI. Счётчик увеличивается без блокировки цикла событий,
+    а сброс локального буфера в базу уходит в поток и не задерживает ответ.
+
+    Аргументы:
+        dog_id (int): ID собаки.
+    """
+    counter = get_view_counter()
+    await counter.aincr(dog_id)
+    if isinstance(counter, LocalViewCounter):
+        if time.monotonic() - _last_flush >= settings.VIEW_COUNTER_FLUSH_INTERVAL:
+            future = asyncio.get_running_loop().run_in_executor(None, flush_view_counts_in_thread)
+            future.add_done_callback(log_flush_error)
+
+
+def log_flush_error(future):
+    """
+    Запись в лог ошибки сброса буфера, запущенного из цикла событий: результат future никто не ждёт,
+    и без обработчика исключение потерялось бы. Несохранённые приращения уже возвращены в буфер.
+
+    Аргументы:
+        future (asyncio.Future): Завершённый сброс буфера.
+    """
+    if not future.cancelled() and future.exception() is not None:
+        logger.error('Ошибка сброса буфера просмотров', exc_info=future.exception())
+
+
+def flush_view_counts_in_thread():
+    """
+    Сброс буфера из потока пула с закрытием соединений потока, чтобы они не копились между сбросами.
+    """
+    try:
+        flush_view_counts(blocking=False)
+    finally:
+        connections.close_all()
+
+
+def apply_view_counts(counts, batch_size=None):
+    """
+    Запись приращений просмотров в базу пачками, одним UPDATE с F() на пачку.
+    Строки пачки блокируются select_for_update() в той же транзакции, что и UPDATE, поэтому значения
+    до приращения точные: параллельный сброс из другого процесса ждёт конца транзакции.
+
+    Аргументы:
+        counts (dict): Словарь {ID собаки: приращение}.
+        batch_size (int): Количество собак в одном UPDATE.
+
+    Возвращает:
+        dict: Значения счётчиков до приращения {ID собаки: просмотры} для записанных собак.
+
+    Исключения:
+        При ошибке базы атрибут exc.applied содержит значения до приращения уже записанных пачек.
+    """
+    batch_size = batch_size or settings.VIEW_COUNTER_BATCH_SIZE
+    items = sorted(counts.items())
+    previous = {}
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        dog_ids = [dog_id for dog_id, _ in batch]
+        try:
+            with transaction.atomic():
+                rows = dict(Dog.objects.select_for_update().filter(pk__in=dog_ids).order_by('pk')
+                            .values_list('pk', 'view_count'))
+                Dog.objects.filter(pk__in=dog_ids).update(
+                    view_count=F('view_count') + Case(
+                        *[When(pk=dog_id, then=Value(amount)) for dog_id, amount in batch],
+                        default=Value(0),
+                        output_field=PositiveIntegerField(),
+                    ),
+                )
+        except Exception as exc:
+            exc.applied = previous
+            raise
+        previous.update(rows)
+    return previous
+
+
+def flush_view_counts(blocking=True):
+    """
+    Сброс буфера просмотров в базу данных с последующим поиском пересечённых порогов просмотров.
+
+    Аргументы:
+        blocking (bool): Ждать, если сброс уже выполняется другим потоком.
+
+    Возвращает:
+        int: Количество записанных просмотров.
+    """
+    global _last_flush
+    if not _flush_lock.acquire(blocking=blocking):
+        return 0
+    try:
+        _last_flush = time.monotonic()
+        counter = get_view_counter()
+        counts = counter.drain()
+        if not counts:
+            return 0
+        try:
+            previous = apply_view_counts(counts)
+        except Exception as exc:
+            for dog_id in getattr(exc, 'applied', {}):
+                counts.pop(dog_id)
+            counter.restore(counts)
+            raise
+        # Счётчик выводится в карточках списков: версия собак для их ETag меняется один раз на сброс
+        from dogs.services import invalidate_model_cache
+
+        invalidate_model_cache(Dog)
+        process_view_milestones(counts, previous)
+        return sum(counts.values())
+    finally:
+        _flush_lock.release()
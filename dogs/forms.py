@@ -1,8 +1,11 @@
-from datetime import datetime
-
 from django import forms
+from django.core.exceptions import ValidationError
+from django.forms import BaseInlineFormSet, inlineformset_factory
 
 from dogs.models import Dog, Parent
+from dogs.pedigree import update_ancestry
+from dogs.services import get_categories_cache, get_category
+from dogs.validators import validate_birth_date
 
 
 class StyleFormMixin:
@@ -23,6 +26,45 @@ class StyleFormMixin:
             field.widget.attrs['class'] = 'form-control'
 
 
+class CategoryChoiceIterator(forms.models.ModelChoiceIterator):
+    """
+    Варианты пород из справочного кеша. Кеш читается только при переборе вариантов,
+    а не при создании класса формы во время импорта модуля.
+    """
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for category in get_categories_cache():
+            yield self.choice(category)
+
+    def __len__(self):
+        return len(get_categories_cache()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(get_categories_cache())
+
+
+class CategoryChoiceField(forms.ModelChoiceField):
+    """
+    Выбор породы из справочного кеша (get_categories_cache): варианты списка и проверка значения
+    не обращаются к базе, сколько бы форм с породой ни было на странице.
+    """
+    iterator = CategoryChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            category = get_category(int(value))
+        except (TypeError, ValueError):
+            category = None
+        if category is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice',
+                                  params={'value': value})
+        return category
+
+
 class DogForm(StyleFormMixin, forms.ModelForm):
     """
     Форма для создания и редактирования информации о собаках.
@@ -37,6 +79,7 @@ class DogForm(StyleFormMixin, forms.ModelForm):
     class Meta:
         model = Dog
         exclude = ('owner', 'is_active', 'view_count')
+        field_classes = {'category': CategoryChoiceField}
 
     def clean_birth_date(self):
         """
@@ -51,13 +94,9 @@ class DogForm(StyleFormMixin, forms.ModelForm):
         Возвращает:
             cleaned_data['birth_date']: Дата рождения собаки.
         """
-        if self.cleaned_data['birth_date']:
-            cd = self.cleaned_data['birth_date']
-            now_year = datetime.now().year
-            if now_year - cd.year > 100:
-                raise forms.ValidationError('Собака должна быть моложе 100 лет')
-            return cd
-        return
+        cd = self.cleaned_data['birth_date']
+        validate_birth_date(cd)
+        return cd
 
 
 class DogAdminForm(StyleFormMixin, forms.ModelForm):
@@ -74,6 +113,7 @@ class DogAdminForm(StyleFormMixin, forms.ModelForm):
     class Meta:
         model = Dog
         fields = '__all__'
+        field_classes = {'category': CategoryChoiceField}
 
     def clean_birth_date(self):
         """
@@ -88,13 +128,9 @@ class DogAdminForm(StyleFormMixin, forms.ModelForm):
         Возвращает:
             cleaned_data['birth_date']: Дата рождения собаки.
         """
-        if self.cleaned_data['birth_date']:
-            cd = self.cleaned_data['birth_date']
-            now_year = datetime.now().year
-            if now_year - cd.year > 100:
-                raise forms.ValidationError('Собака должна быть моложе 100 лет')
-            return cd
-        return
+        cd = self.cleaned_data['birth_date']
+        validate_birth_date(cd)
+        return cd
 
 
 class ParentForm(StyleFormMixin, forms.ModelForm):
@@ -103,8 +139,108 @@ class ParentForm(StyleFormMixin, forms.ModelForm):
 
     Атрибуты:
         model (Parent): Модель родителя.
-        fields (list): Все поля модели доступны для редактирования.
+        fields (tuple): Имя, порода, дата рождения родителя и собака-родитель из базы; собаку задаёт формсет.
+        widgets (dict): Собака-родитель вводится номером: список всех собак в форму не выводится.
     """
     class Meta:
         model = Parent
-        fields = '__all__'
+        fields = ('name', 'category', 'birth_date', 'parent_dog')
+        field_classes = {'category': CategoryChoiceField}
+        widgets = {'parent_dog': forms.NumberInput()}
+        help_texts = {'parent_dog': 'Номер собаки-родителя, если она есть в базе'}
+
+
+class ExistingObjectField(forms.ModelChoiceField):
+    """
+    Скрытое поле первичного ключа строки формсета: объект берётся из уже загруженных строк формсета,
+    а не отдельным запросом на каждую строку.
+    """
+
+    def __init__(self, lookup, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lookup = lookup
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            obj = self.lookup(self.queryset.model._meta.pk.to_python(value))
+        except ValidationError:
+            obj = None
+        if obj is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice',
+                                  params={'value': value})
+        return obj
+
+
+class BaseParentFormset(BaseInlineFormSet):
+    """
+    Формсет родословной собаки. Строки проверяются без запросов на каждую, а сохранение применяет
+    разницу с базой: удаление, bulk_create и bulk_update только изменённых полей.
+    Изменённые рёбра родословной затем переносятся в таблицу замыкания DogAncestry.
+
+    Методы:
+        add_fields(self, form, index): Замена поля первичного ключа на ExistingObjectField.
+        save(self, commit=True): Сохранение разницы строк с базой.
+    """
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        name = self.model._meta.pk.name
+        field = form.fields[name]
+        form.fields[name] = ExistingObjectField(self._existing_object, field.queryset, initial=field.initial,
+                                                required=field.required, widget=field.widget)
+
+    def save(self, commit=True):
+        """
+        Сохранение разницы строк формсета с базой.
+
+        Аргументы:
+            commit (bool): Записывать ли изменения в базу.
+
+        Возвращает:
+            list: Изменённые и новые родители.
+        """
+        deleted = [form.instance for form in self.deleted_forms if form.instance.pk is not None]
+        self.deleted_objects = deleted
+        self.changed_objects = []
+        self.new_objects = []
+        changed_fields = set()
+        for form in self.initial_forms:
+            if form in self.deleted_forms or form.instance.pk is None or not form.has_changed():
+                continue
+            self.changed_objects.append((form.instance, form.changed_data))
+            changed_fields.update(name for name in form.changed_data if name in form._meta.fields)
+        for form in self.extra_forms:
+            if not form.has_changed() or (self.can_delete and self._should_delete_form(form)):
+                continue
+            setattr(form.instance, self.fk.name, self.instance)
+            self.new_objects.append(form.instance)
+
+        if commit:
+            if deleted:
+                self.model._default_manager.filter(pk__in=[obj.pk for obj in deleted]).delete()
+            if self.new_objects:
+                self.model._default_manager.bulk_create(self.new_objects)
+            if changed_fields:
+                self.model._default_manager.bulk_update([obj for obj, _ in self.changed_objects],
+                                                        sorted(changed_fields))
+            # Удаление через QuerySet отправляет post_delete (рёбра снимает сигнал), а bulk_create и bulk_update
+            # сигналов не отправляют, поэтому их рёбра переносятся здесь
+            removed = []
+            added = [obj.edge for obj in self.new_objects]
+            for obj, _ in self.changed_objects:
+                if obj._loaded_edge != obj.edge:
+                    removed.append(obj._loaded_edge)
+                    added.append(obj.edge)
+            added = [edge for edge in added if edge]
+            removed = [edge for edge in removed if edge]
+            if added or removed:
+                update_ancestry(added=added, removed=removed)
+        return [obj for obj, _ in self.changed_objects] + self.new_objects
+
+    save.alters_data = True
+
+
+# Класс формсета строится один раз при импорте, а не на каждый запрос
+ParentFormset = inlineformset_factory(Dog, Parent, form=ParentForm, formset=BaseParentFormset, fk_name='dog', extra=1)
@@ -0,0 +1,160 @@
+import hashlib
+import io
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+FORMAT_EXTENSIONS = {
+    'webp': 'webp',
+    'jpeg': 'jpg',
+}
+
+
+def variant_name(source, width, image_format, content):
+    """
+    Имя файла варианта рядом с оригиналом: основа.ширинаw.хеш.расширение.
+    Хеш содержимого делает имя неизменяемым, поэтому файл можно кешировать навсегда.
+
+    Аргументы:
+        source (str): Имя оригинала в хранилище.
+        width (int): Ширина варианта.
+        image_format (str): Формат варианта (webp или jpeg).
+        content (bytes): Содержимое варианта.
+
+    Возвращает:
+        str: Имя файла варианта.
+    """
+    root = posixpath.splitext(source)[0]
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return f'{root}.{width}w.{digest}.{FORMAT_EXTENSIONS[image_format]}'
+
+
+def render_variant(image, width, image_format):
+    """
+    Уменьшение изображения до ширины с сохранением пропорций и кодирование в формат.
+
+    Аргументы:
+        image (Image): Исходное изображение в RGB.
+        width (int): Ширина варианта.
+        image_format (str): Формат варианта.
+
+    Возвращает:
+        tuple: Ширина, высота и байты варианта.
+    """
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.Resampling.LANCZOS) if width < image.width else image
+    buffer = io.BytesIO()
+    resized.save(buffer, format=image_format.upper(), quality=settings.IMAGE_VARIANT_QUALITY, optimize=True,
+                 **({'method': 4} if image_format == 'webp' else {'progressive': True}))
+    return resized.width, resized.height, buffer.getvalue()
+
+
+def build_variants(field_file):
+    """
+    Построение вариантов изображения для всех ширин IMAGE_VARIANT_WIDTHS и форматов IMAGE_VARIANT_FORMATS.
+    Ширины больше оригинала не строятся (кроме самой маленькой), уже существующие файлы не перезаписываются.
+
+    Аргументы:
+        field_file (FieldFile): Файл поля ImageField.
+
+    Возвращает:
+        dict: Описание вариантов: {'source': имя оригинала, 'variants': [{'width', 'height', 'format', 'name', 'size'}]}.
+    """
+    if not field_file:
+        return {}
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image = image.convert('RGB')
+    widths = sorted(settings.IMAGE_VARIANT_WIDTHS)
+    widths = [width for width in widths if width <= image.width] or widths[:1]
+    variants = []
+    for image_format in settings.IMAGE_VARIANT_FORMATS:
+        for width in widths:
+            width, height, content = render_variant(image, width, image_format)
+            name = variant_name(field_file.name, width, image_format, content)
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(content))
+            variants.append({
+                'width': width, 'height': height, 'format': image_format, 'name': name, 'size': len(content),
+            })
+    return {'source': field_file.name, 'variants': variants}
+
+
+def current_variants(field_file, variants):
+    """
+    Варианты, построенные для текущего файла поля. Если файл заменён, а задача ещё не отработала,
+    возвращается пустой список и шаблон показывает оригинал.
+
+    Аргументы:
+        field_file (FieldFile): Файл поля ImageField.
+        variants (dict): Значение JSON-поля вариантов.
+
+    Возвращает:
+        list: Варианты текущего файла.
+    """
+    if not field_file or not variants or variants.get('source') != field_file.name:
+        return []
+    return variants.get('variants', [])
+
+
+def variant_url(field_file, variants, width, image_format='jpeg'):
+    """
+    URL самого маленького варианта не уже заданной ширины. Если подходящего нет, берётся самый широкий,
+    а без вариантов - оригинал.
+
+    Аргументы:
+        field_file (FieldFile): Файл поля ImageField.
+        variants (dict): Значение JSON-поля вариантов.
+        width (int): Ширина отображения в пикселях.
+        image_format (str): Формат варианта.
+
+    Возвращает:
+        str | None: URL изображения или None, если файла нет.
+    """
+    if not field_file:
+        return None
+    candidates = sorted(
+        (variant for variant in current_variants(field_file, variants) if variant['format'] == image_format),
+        key=lambda variant: variant['width'],
+    )
+    if not candidates:
+        return field_file.url
+    chosen = next((variant for variant in candidates if variant['width'] >= width), candidates[-1])
+    return field_file.storage.url(chosen['name'])
+
+
+def variant_srcset(field_file, variants, image_format='jpeg'):
+    """
+    Значение атрибута srcset из вариантов формата.
+
+    Аргументы:
+        field_file (FieldFile): Файл поля ImageField.
+        variants (dict): Значение JSON-поля вариантов.
+        image_format (str): Формат вариантов.
+
+    Возвращает:
+        str: Строка вида 'url 160w, url 320w' или пустая строка.
+    """
+    return ', '.join(
+        f'{field_file.storage.url(variant["name"])} {variant["width"]}w'
+        for variant in sorted(current_variants(field_file, variants), key=lambda variant: variant['width'])
+        if variant['format'] == image_format
+    )
+
+
+def obsolete_variant_names(old_variants, new_variants):
+    """
+    Имена файлов старых вариантов, которые не используются новыми.
+
+    Аргументы:
+        old_variants (dict): Прежнее значение JSON-поля вариантов.
+        new_variants (dict): Новое значение JSON-поля вариантов.
+
+    Возвращает:
+        set: Имена файлов для удаления.
+    """
+    kept = {variant['name'] for variant in (new_variants or {}).get('variants', [])}
+    return {variant['name'] for variant in (old_variants or {}).get('variants', [])} - kept
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.utils import get_app_template_dirs
+
+
+def template_names(directories):
+    """
+    Имена всех HTML-шаблонов в каталогах шаблонов.
+
+    Аргументы:
+        directories (Iterable): Каталоги шаблонов.
+
+    Возвращает:
+        list: Имена шаблонов относительно каталогов.
+    """
+    names = []
+    for directory in directories:
+        directory = Path(directory)
+        names.extend(path.relative_to(directory).as_posix() for path in directory.rglob('*.html'))
+    return sorted(set(names))
+
+
+def warm_template_cache():
+    """
+    Разбор всех шаблонов проекта при старте процесса, чтобы кеширующий загрузчик отдавал скомпилированные
+    шаблоны уже первому запросу. Шаблоны с ошибками пропускаются: они упадут при обычном рендере.
+
+    Возвращает:
+        int: Количество загруженных шаблонов.
+    """
+    loaded = 0
+    for engine in engines.all():
+        directories = [*engine.dirs, *get_app_template_dirs('templates')]
+        for name in template_names(directories):
+            try:
+                engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError):
+                continue
+            loaded += 1
+    return loaded
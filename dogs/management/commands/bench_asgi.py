@@ -0,0 +1,199 @@
+import asyncio
+import importlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from wsgiref.util import setup_testing_defaults
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import clear_url_caches, reverse
+
+from dogs.counters import get_view_counter
+from dogs.management.commands.bench_urls import percentile
+from dogs.models import Dog
+from reviews.models import Review
+from users.models import User, UserRoles
+
+# (имя URL, вид аргумента, нужен ли вход) - страницы чтения с асинхронными вариантами представлений
+ENDPOINTS = [
+    ('dogs:list_dogs', None, False),
+    ('dogs:detail_dog', 'dog', False),
+    ('dogs:category_dogs', 'category', False),
+    ('reviews:all_reviews', None, True),
+    ('reviews:reviews_list', 'dog', True),
+    ('reviews:review_detail', 'review', True),
+]
+
+
+@contextmanager
+def view_variants(async_views):
+    """
+    Подключение синхронных или асинхронных вариантов представлений, как в развёртывании WSGI или ASGI:
+    варианты выбираются select_view при импорте URL, поэтому модули URL перезагружаются.
+
+    Аргументы:
+        async_views (bool): Подключить асинхронные варианты.
+    """
+    try:
+        with override_settings(ASYNC_VIEWS=async_views):
+            reload_urls()
+            yield
+    finally:
+        reload_urls()
+
+
+def reload_urls():
+    """
+    Перезагрузка модулей URL приложений с вариантами представлений и корневого URLconf, который хранит
+    вложенные резолверы приложений, и сброс кеша резолвера.
+    """
+    for module in ('dogs.urls', 'reviews.urls', settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(module))
+    clear_url_caches()
+
+
+class Command(BaseCommand):
+    help = ('Сравнение пропускной способности и хвостовых задержек страниц чтения под WSGI (пул потоков, '
+            'синхронные представления) и ASGI (один цикл событий, асинхронные варианты) при высокой конкурентности')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Запросов на адрес')
+        parser.add_argument('--concurrency', type=int, default=64, help='Одновременных клиентов')
+        parser.add_argument('--threads', type=int, default=8, help='Потоков WSGI-сервера')
+        parser.add_argument('--only', default='', help='Замерять только адреса, содержащие эту строку')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.user = User.objects.filter(role=UserRoles.USER, is_active=True).order_by('pk').first()
+        if self.user is None:
+            raise CommandError('Нет активного пользователя: запустите seed_load')
+        objects = {
+            'dog': list(Dog.objects.filter(is_active=True).order_by('-view_count').values_list('pk', flat=True)[:500]),
+            'category': list(Dog.objects.filter(is_active=True).values_list('category_id', flat=True).distinct()[:50]),
+            'review': list(Review.objects.filter(sign_of_review=True).values_list('slug', flat=True)[:500]),
+        }
+        if not all(objects.values()):
+            raise CommandError('Нет собак или отзывов: запустите seed_load')
+
+        setup_test_environment()
+        try:
+            with override_settings(VIEW_COUNTER_FLUSH_INTERVAL=float('inf')):
+                print(f'{"адрес":<28} {"сервер":<6} {"запр/с":>8} {"p50 мс":>8} {"p95 мс":>8} {"p99 мс":>8}')
+                for name, arg, login in ENDPOINTS:
+                    if options['only'] not in name:
+                        continue
+                    urls = [
+                        reverse(name, args=[rng.choice(objects[arg])] if arg else [])
+                        for _ in range(options['requests'])
+                    ]
+                    label = reverse(name, args=[objects[arg][0]] if arg else [])
+                    with view_variants(async_views=False):
+                        self.report(label, 'WSGI',
+                                    *self.bench_wsgi(urls, login, options['concurrency'], options['threads']))
+                    with view_variants(async_views=True):
+                        self.report(label, 'ASGI', *asyncio.run(self.bench_asgi(urls, login, options['concurrency'])))
+        finally:
+            teardown_test_environment()
+            # Просмотры, накопленные замером, не переносятся в базу
+            get_view_counter().drain()
+
+    def report(self, label, server, elapsed, timings):
+        print(f'{label:<28} {server:<6} {len(timings) / elapsed:>8.0f} {percentile(timings, 50):>8.2f} '
+              f'{percentile(timings, 95):>8.2f} {percentile(timings, 99):>8.2f}')
+
+    def session_cookie(self, login):
+        """
+        Cookie сессии пользователя для запросов, которым нужен вход.
+
+        Возвращает:
+            str: Значение заголовка Cookie или пустая строка.
+        """
+        if not login:
+            return ''
+        client = Client()
+        client.force_login(self.user)
+        return '; '.join(f'{key}={morsel.value}' for key, morsel in client.cookies.items())
+
+    def bench_wsgi(self, urls, login, concurrency, threads):
+        """
+        Запросы concurrency клиентов к WSGIHandler, который обслуживает не больше threads запросов сразу,
+        как потоковый WSGI-сервер (gunicorn --threads). Ожидание свободного потока входит в задержку.
+
+        Возвращает:
+            tuple: Общее время в секундах и задержки запросов в миллисекундах.
+        """
+        handler = WSGIHandler()
+        cookie = self.session_cookie(login)
+        workers = threading.BoundedSemaphore(threads)
+
+        def fetch(url):
+            environ = {'PATH_INFO': url, 'HTTP_HOST': 'testserver', 'HTTP_COOKIE': cookie}
+            setup_testing_defaults(environ)
+            statuses = []
+            start = time.perf_counter()
+            with workers:
+                response = handler(environ, lambda status, headers: statuses.append(status))
+                try:
+                    b''.join(response)
+                finally:
+                    response.close()
+            elapsed = (time.perf_counter() - start) * 1000
+            if not statuses[0].startswith('200'):
+                raise CommandError(f'{url}: статус {statuses[0]}')
+            return elapsed
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            timings = list(executor.map(fetch, urls))
+        return time.perf_counter() - start, timings
+
+    async def bench_asgi(self, urls, login, concurrency):
+        """
+        Запросы к ASGIHandler в одном цикле событий, не больше concurrency одновременно, как у uvicorn.
+
+        Возвращает:
+            tuple: Общее время в секундах и задержки запросов в миллисекундах.
+        """
+        handler = ASGIHandler()
+        cookie = (await sync_to_async(self.session_cookie)(login)).encode()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(url):
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': url, 'raw_path': url.encode(), 'query_string': b'', 'root_path': '',
+                'headers': [(b'host', b'testserver'), (b'cookie', cookie)],
+                'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+            }
+            messages = []
+            requests = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+            async def receive():
+                # После тела запроса Django ждёт отключения клиента до конца ответа
+                if requests:
+                    return requests.pop()
+                await asyncio.Event().wait()
+
+            async def send(message):
+                messages.append(message)
+
+            async with semaphore:
+                start = time.perf_counter()
+                await handler(scope, receive, send)
+                elapsed = (time.perf_counter() - start) * 1000
+            if messages[0]['status'] != 200:
+                raise CommandError(f'{url}: статус {messages[0]["status"]}')
+            return elapsed
+
+        start = time.perf_counter()
+        timings = await asyncio.gather(*(fetch(url) for url in urls))
+        return time.perf_counter() - start, list(timings)
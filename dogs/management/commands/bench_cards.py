@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management import BaseCommand, CommandError
+from django.template import Context, Engine, engines
+from django.template.utils import get_app_template_dirs
+from django.test.utils import override_settings
+
+from dogs.models import Dog
+from reviews.models import Review
+from users.models import User, UserRoles
+
+CARDS = {
+    'dogs/includes/inc_dog_card.html': 'dog',
+    'reviews/includes/inc_all_review_card.html': 'review',
+    'reviews/includes/inc_review_card.html': 'review',
+}
+
+NO_FRAGMENT_CACHE = {
+    **settings.CACHES,
+    'template_fragments': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Микрозамер рендера карточек собак и отзывов: без кеширующего загрузчика, с ним и с кешем фрагментов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=60, help='Сколько разных собак и отзывов рендерить')
+        parser.add_argument('--repeat', type=int, default=20, help='Повторов рендера каждой карточки')
+
+    def handle(self, *args, **options):
+        objects = {
+            'dog': list(Dog.objects.select_related('category').filter(is_active=True)[:options['cards']]),
+            'review': list(Review.objects.filter(sign_of_review=True).cards()[:options['cards']]),
+        }
+        if not objects['dog'] or not objects['review']:
+            raise CommandError('Нет собак или отзывов: запустите seed_load')
+        viewers = {'anonymous': AnonymousUser()}
+        for role in (UserRoles.USER, UserRoles.ADMIN):
+            viewers[role] = User.objects.filter(role=role, is_active=True).order_by('pk').first() or AnonymousUser()
+
+        # Движок без кеширующего загрузчика: каждый include заново читает и разбирает шаблон
+        django_engine = engines['django'].engine
+        plain_engine = Engine(
+            dirs=[*django_engine.dirs, *get_app_template_dirs('templates')],
+            loaders=['django.template.loaders.filesystem.Loader'],
+            libraries=django_engine.libraries,
+        )
+        print(f'{"карточка":<45} {"зритель":<10} {"без кеша мкс":>13} {"загрузчик мкс":>14} {"фрагменты мкс":>14}')
+        for template_name, kind in CARDS.items():
+            for viewer_name, viewer in viewers.items():
+                with override_settings(CACHES=NO_FRAGMENT_CACHE):
+                    plain = self.bench(plain_engine, template_name, objects[kind], viewer, options['repeat'])
+                    loader = self.bench(django_engine, template_name, objects[kind], viewer, options['repeat'])
+                caches['template_fragments'].clear()
+                fragments = self.bench(django_engine, template_name, objects[kind], viewer, options['repeat'])
+                print(f'{template_name:<45} {viewer_name:<10} {plain:>13.1f} {loader:>14.1f} {fragments:>14.1f}')
+
+    def bench(self, engine, template_name, objects, user, repeat):
+        """
+        Среднее время рендера одной карточки в микросекундах. Первый проход прогревает кеши и не учитывается.
+        """
+        for obj in objects:
+            engine.get_template(template_name).render(Context({'object': obj, 'user': user}))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for obj in objects:
+                engine.get_template(template_name).render(Context({'object': obj, 'user': user}))
+        return (time.perf_counter() - start) / (repeat * len(objects)) * 1_000_000
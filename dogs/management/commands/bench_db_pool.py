@@ -0,0 +1,80 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from config.db.pool import PooledDatabaseWrapperMixin, pools
+from dogs.management.commands.bench_urls import percentile
+
+
+class Command(BaseCommand):
+    help = ('Замер цикла запроса (открытие соединения, запрос, закрытие) без пула соединений и с пулом config.db '
+            'на базе default; задержка подключения имитирует TLS-рукопожатие с SQL Server')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Всего запросов')
+        parser.add_argument('--threads', type=int, default=16, help='Потоков-обработчиков')
+        parser.add_argument('--pool-size', type=int, default=8, help='MAX_SIZE пула')
+        parser.add_argument('--connect-latency', type=float, default=0, help='Задержка открытия соединения, мс')
+        parser.add_argument('--sql', default='SELECT 1', help='Запрос внутри каждого цикла')
+
+    def handle(self, *args, **options):
+        # Исходный бэкенд без пула и тот же бэкенд с пулом; задержка добавляется только к открытию соединения
+        base = next(cls for cls in type(connections[DEFAULT_DB_ALIAS]).__mro__ if not issubclass(cls, PooledDatabaseWrapperMixin))
+        latency = options['connect_latency'] / 1000
+        connects = []
+
+        class SlowConnectWrapper(base):
+            def get_new_connection(self, conn_params):
+                connects.append(1)
+                time.sleep(latency)
+                return super().get_new_connection(conn_params)
+
+        class PooledWrapper(PooledDatabaseWrapperMixin, SlowConnectWrapper):
+            pass
+
+        settings_dict = {
+            **connections[DEFAULT_DB_ALIAS].settings_dict,
+            'CONN_MAX_AGE': 0,
+            'POOL': {'MAX_SIZE': options['pool_size'], 'TIMEOUT': 30, 'MAX_LIFETIME': 30 * 60, 'CHECK_INTERVAL': 0},
+        }
+        print(f'{"вариант":<10} {"запр/с":>8} {"p50 мс":>8} {"p95 мс":>8} {"p99 мс":>8}')
+        for label, wrapper_class in (('без пула', SlowConnectWrapper), ('пул', PooledWrapper)):
+            connects.clear()
+            elapsed, timings = self.bench(wrapper_class, settings_dict, options)
+            print(f'{label:<10} {len(timings) / elapsed:>8.0f} {percentile(timings, 50):>8.2f} '
+                  f'{percentile(timings, 95):>8.2f} {percentile(timings, 99):>8.2f}  подключений: {len(connects)}')
+        pool = pools.pop(next(key for key in pools if key[0] == 'bench_db_pool'))
+        print(f'Пул: {pool.stats()}')
+        pool.close()
+
+    def bench(self, wrapper_class, settings_dict, options):
+        """
+        Запросы из нескольких потоков, у каждого потока своё соединение Django, как у обработчиков WSGI.
+        Цикл запроса повторяет сигналы request_started и request_finished: close_if_unusable_or_obsolete
+        до и после запроса.
+
+        Возвращает:
+            tuple: Общее время в секундах и задержки циклов в миллисекундах.
+        """
+        per_thread = max(1, options['requests'] // options['threads'])
+
+        def worker(_):
+            wrapper = wrapper_class(settings_dict, alias='bench_db_pool')
+            timings = []
+            for _ in range(per_thread):
+                start = time.perf_counter()
+                wrapper.close_if_unusable_or_obsolete()
+                with wrapper.cursor() as cursor:
+                    cursor.execute(options['sql'])
+                    cursor.fetchall()
+                wrapper.close_if_unusable_or_obsolete()
+                timings.append((time.perf_counter() - start) * 1000)
+            wrapper.close()
+            return timings
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            timings = [timing for result in executor.map(worker, range(options['threads'])) for timing in result]
+        return time.perf_counter() - start, timings
@@ -0,0 +1,89 @@
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from dogs.models import Category, Dog
+from dogs.pagination import cursor_paginate, encode_cursor, get_cursor_fields, row_values
+from dogs.views import DogListView
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Сравнение offset-пагинации и курсорной пагинации списка собак на первой и глубоких страницах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Количество собак в тестовых данных')
+        parser.add_argument('--pages', type=int, nargs='+', default=[1, 10_000], help='Номера страниц для замера')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'], options['batch_size'])
+                self.bench(options['pages'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows, batch_size):
+        category = Category.objects.create(name='Bench category', description='Bench')
+        start = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            Dog.objects.bulk_create([
+                Dog(name=f'Bench dog {n}', category=category)
+                for n in range(offset, min(offset + batch_size, rows))
+            ])
+        print(f'Создано {rows} собак за {time.perf_counter() - start:.1f} с')
+
+    def measure(self, repeat, func):
+        """
+        Медианное время и количество запросов вызова.
+
+        Аргументы:
+            repeat (int): Количество повторов.
+            func (callable): Замеряемая функция.
+
+        Возвращает:
+            tuple: Медианное время в миллисекундах и количество запросов последнего вызова.
+        """
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), len(queries)
+
+    def bench(self, pages, repeat):
+        request = RequestFactory().get('/')
+        view = DogListView()
+        view.setup(request)
+        queryset = view.get_queryset()
+        page_size = view.paginate_by
+        ordering = view.get_cursor_ordering()
+        fields = get_cursor_fields(Dog, ordering)
+        for number in pages:
+            def offset_page():
+                list(Paginator(queryset.order_by(*ordering), page_size).page(number).object_list)
+
+            after = None
+            if number > 1:
+                row = queryset.order_by(*ordering)[(number - 1) * page_size - 1]
+                after = encode_cursor(row_values(row, fields))
+
+            def cursor_page():
+                cursor_paginate(queryset, ordering, page_size, after=after)
+
+            offset_ms, offset_queries = self.measure(repeat, offset_page)
+            cursor_ms, cursor_queries = self.measure(repeat, cursor_page)
+            print(f'Страница {number}: offset {offset_ms:.2f} мс (запросов: {offset_queries}), '
+                  f'курсор {cursor_ms:.2f} мс (запросов: {cursor_queries})')
@@ -0,0 +1,120 @@
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from dogs.models import Category, Dog, DogAncestry, Parent
+from dogs.pedigree import ancestors, common_ancestors, descendants, inbreeding_coefficient, rebuild_ancestry
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Замер таблицы замыкания родословной на глубокой родословной: инкрементальное добавление рёбер, '
+            'предки, потомки, общие предки и инбридинг одним запросом против обхода по поколениям')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--generations', type=int, default=12, help='Поколений в родословной')
+        parser.add_argument('--width', type=int, default=32, help='Собак в поколении')
+        parser.add_argument('--depth', type=int, default=5, help='Глубина выборки предков до N поколений')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                generations = self.seed(options)
+                self.bench(generations, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, options):
+        """
+        Родословная из поколений одинаковой ширины: у каждой собаки два родителя из предыдущего поколения,
+        поэтому в глубоких поколениях общие предки встречаются по многу раз.
+
+        Возвращает:
+            list: Списки ID собак по поколениям, от основателей.
+        """
+        category = Category.objects.create(name='Pedigree category', description='Bench')
+        rng = random.Random(options['seed'])
+        generations = []
+        for generation in range(options['generations']):
+            dogs = Dog.objects.bulk_create([
+                Dog(name=f'Pedigree dog {generation}-{n}', category=category) for n in range(options['width'])
+            ])
+            generations.append([dog.pk for dog in dogs])
+
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for previous, current in zip(generations, generations[1:]):
+                for dog_id in current:
+                    for parent_id in rng.sample(previous, 2):
+                        Parent.objects.create(dog_id=dog_id, parent_dog_id=parent_id, name='Bench', category=category)
+        elapsed = time.perf_counter() - start
+        edges = 2 * options['width'] * (options['generations'] - 1)
+        rows = DogAncestry.objects.count()
+        print(f'Поколений {options["generations"]}, собак {options["generations"] * options["width"]}, рёбер {edges}, '
+              f'строк замыкания {rows}')
+        print(f'Инкрементальное добавление: {elapsed / edges * 1000:.2f} мс и {len(queries) / edges:.1f} запросов '
+              f'на ребро (с INSERT в Parent)')
+
+        start = time.perf_counter()
+        rebuilt, skipped = rebuild_ancestry()
+        print(f'Полное перестроение rebuild_ancestry: {time.perf_counter() - start:.2f} с, строк {rebuilt}, '
+              f'совпадает с инкрементальным: {rebuilt == rows and not skipped}')
+        return generations
+
+    def measure(self, repeat, func):
+        """
+        Медианное время и количество запросов вызова.
+
+        Возвращает:
+            tuple: Медианное время в миллисекундах, количество запросов и результат последнего вызова.
+        """
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                result = func()
+                timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), len(queries), result
+
+    def ancestors_by_generation(self, dog_id, max_depth):
+        """
+        Обход предков без таблицы замыкания: один запрос к Parent на поколение.
+        """
+        found = set()
+        frontier = {dog_id}
+        for _ in range(max_depth):
+            frontier = set(Parent.objects.filter(dog_id__in=frontier, parent_dog__isnull=False)
+                           .values_list('parent_dog_id', flat=True))
+            if not frontier:
+                break
+            found |= frontier
+        return found
+
+    def bench(self, generations, options):
+        youngest, other = generations[-1][:2]
+        founder = generations[0][0]
+        depth = options['depth']
+        full = options['generations']
+        cases = [
+            (f'предки до глубины {depth}', lambda: len(ancestors(youngest, depth))),
+            (f'предки до глубины {depth}, по поколениям', lambda: len(self.ancestors_by_generation(youngest, depth))),
+            ('все предки', lambda: len(ancestors(youngest))),
+            ('все предки, по поколениям', lambda: len(self.ancestors_by_generation(youngest, full))),
+            ('все потомки основателя', lambda: len(descendants(founder))),
+            ('общие предки двух собак', lambda: len(common_ancestors(youngest, other))),
+            ('коэффициент инбридинга', lambda: round(inbreeding_coefficient(youngest), 4)),
+        ]
+        print(f'\n{"операция":<40} {"мс":>9} {"запросов":>9} {"результат":>10}')
+        for label, func in cases:
+            elapsed, queries, result = self.measure(options['repeat'], func)
+            print(f'{label:<40} {elapsed:>9.2f} {queries:>9} {result:>10}')
@@ -0,0 +1,57 @@
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from dogs.models import Dog
+
+# Заголовок Accept-Encoding для каждого сценария замера
+ENCODINGS = {
+    'identity': 'identity',
+    'gzip': 'gzip',
+    'br': 'br, gzip',
+}
+
+
+class Command(BaseCommand):
+    help = 'Замер байтов статики на страницу (КиБ) без сжатия, с gzip и brotli и доли файлов с immutable'
+
+    def handle(self, *args, **options):
+        if not getattr(staticfiles_storage, 'hashed_files', None):
+            raise CommandError('Нет манифеста статики: запустите collectstatic')
+        dog = Dog.objects.filter(is_active=True).order_by('pk').first()
+        pages = [reverse('dogs:index'), reverse('dogs:list_dogs'), reverse('users:login_user')]
+        if dog is not None:
+            pages.append(reverse('dogs:detail_dog', args=[dog.pk]))
+        pattern = re.compile(r'(?:href|src)="(' + re.escape(settings.STATIC_URL) + r'[^"]+)"')
+
+        setup_test_environment()
+        try:
+            with override_settings(DEBUG=False):
+                client = Client()
+                print(f'{"страница":<25} {"HTML КиБ":>9} {"файлов":>7} {"без сжатия":>11} {"gzip":>8} {"br":>8} '
+                      f'{"immutable":>10}')
+                for page in pages:
+                    response = client.get(page)
+                    html = response.content
+                    assets = list(dict.fromkeys(pattern.findall(html.decode())))
+                    sizes = {scenario: 0 for scenario in ENCODINGS}
+                    immutable = 0
+                    for asset in assets:
+                        for scenario, accept in ENCODINGS.items():
+                            asset_response = client.get(asset, HTTP_ACCEPT_ENCODING=accept)
+                            if asset_response.status_code != 200:
+                                raise CommandError(f'{asset}: статус {asset_response.status_code}')
+                            sizes[scenario] += len(b''.join(asset_response.streaming_content))
+                        # Файлы с immutable браузер при повторном визите не запрашивает вовсе
+                        if 'immutable' in asset_response.get('Cache-Control', ''):
+                            immutable += 1
+                    print(f'{page:<25} {len(html) / 1024:>9.1f} {len(assets):>7} '
+                          f'{sizes["identity"] / 1024:>11.1f} {sizes["gzip"] / 1024:>8.1f} {sizes["br"] / 1024:>8.1f} '
+                          f'{immutable:>6}/{len(assets)}')
+        finally:
+            teardown_test_environment()
@@ -0,0 +1,181 @@
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, \
+    teardown_test_environment
+from django.urls import reverse
+
+from dogs.counters import get_view_counter
+from dogs.models import Category, Dog
+from reviews.models import Review
+from users.models import User, UserRoles
+
+# (имя URL, вид аргумента, строка запроса, роль пользователя или None для анонима).
+# GET-адреса, меняющие данные (переключение активности, новый пароль, выход), не замеряются.
+ENDPOINTS = [
+    ('dogs:index', None, '', None),
+    ('dogs:categories', None, '', UserRoles.USER),
+    ('dogs:category_dogs', 'category', '', None),
+    ('dogs:list_dogs', None, '', None),
+    ('dogs:list_dogs', None, '', UserRoles.USER),
+    ('dogs:search_dogs', None, '?q=рекс', UserRoles.USER),
+    ('dogs:search_categories', None, '?q=овчарка', UserRoles.USER),
+    ('dogs:deactivated_list_dogs', None, '', UserRoles.USER),
+    ('dogs:deactivated_list_dogs', None, '', UserRoles.MODERATOR),
+    ('dogs:create_dog', None, '', UserRoles.USER),
+    ('dogs:detail_dog', 'dog', '', None),
+    ('dogs:update_dog', 'dog', '', UserRoles.ADMIN),
+    ('dogs:delete_dog', 'dog', '', UserRoles.ADMIN),
+    ('reviews:all_reviews', None, '', UserRoles.USER),
+    ('reviews:all_inactive_reviews', None, '', UserRoles.MODERATOR),
+    ('reviews:reviews_list', 'dog', '', UserRoles.USER),
+    ('reviews:inactive_reviews_list', 'dog', '', UserRoles.MODERATOR),
+    ('reviews:review_create', 'dog', '', UserRoles.USER),
+    ('reviews:review_update', 'review', '', UserRoles.ADMIN),
+    ('reviews:review_delete', 'review', '', UserRoles.ADMIN),
+    ('reviews:review_detail', 'review', '', UserRoles.USER),
+    ('users:login_user', None, '', None),
+    ('users:register_user', None, '', None),
+    ('users:profile_user', None, '', UserRoles.USER),
+    ('users:update_user', None, '', UserRoles.USER),
+    ('users:change_password_user', None, '', UserRoles.USER),
+    ('users:users_list', None, '', None),
+    ('users:detail_user', 'user', '', None),
+]
+
+
+def percentile(values, percent):
+    """
+    Перцентиль выборки с линейной интерполяцией.
+
+    Аргументы:
+        values (list): Значения.
+        percent (int): Перцентиль от 1 до 99.
+
+    Возвращает:
+        float: Значение перцентиля.
+    """
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+@contextmanager
+def capture_queries():
+    """
+    Запись SQL-запросов ко всем базам из DATABASES, включая реплики для чтения.
+    Список заполняется при выходе из блока with.
+
+    Возвращает:
+        list: Запросы в формате CaptureQueriesContext.captured_queries.
+    """
+    queries = []
+    with ExitStack() as stack:
+        contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+        yield queries
+    for context in contexts:
+        queries.extend(context.captured_queries)
+
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный замер всех страниц dogs, reviews и users через тестовый клиент: p50/p95/p99, запросы, аллокации'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Запросов на каждый адрес')
+        parser.add_argument('--allocations', type=int, default=5, help='Запросов на адрес с замером аллокаций')
+        parser.add_argument('--sample', type=int, default=1000, help='Сколько собак, отзывов и пользователей брать')
+        parser.add_argument('--only', default='', help='Замерять только адреса, содержащие эту строку')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        objects = self.sample_objects(options['sample'])
+        users = {}
+        for role in UserRoles.values:
+            users[role] = User.objects.filter(role=role, is_active=True).order_by('pk').first()
+            if users[role] is None:
+                raise CommandError(f'Нет активного пользователя с ролью {role}: запустите ccsu или seed_load')
+
+        setup_test_environment()
+        try:
+            with override_settings(VIEW_COUNTER_FLUSH_INTERVAL=float('inf')):
+                print(f'{"адрес":<45} {"роль":<10} {"p50 мс":>8} {"p95 мс":>8} {"p99 мс":>8} '
+                      f'{"запросов":>9} {"КиБ":>8}')
+                for name, arg, query_string, role in ENDPOINTS:
+                    if options['only'] not in name:
+                        continue
+                    client = Client()
+                    if role is not None:
+                        client.force_login(users[role])
+                    self.bench_endpoint(client, name, arg, query_string, role, objects, options)
+        finally:
+            teardown_test_environment()
+            # Просмотры, накопленные замером, не переносятся в базу
+            get_view_counter().drain()
+
+    def sample_objects(self, size):
+        """
+        Выбор объектов для адресов с аргументами. Собаки берутся среди самых просматриваемых,
+        поэтому трафик повторяет распределение просмотров.
+
+        Аргументы:
+            size (int): Размер выборки каждого вида.
+
+        Возвращает:
+            dict: Списки аргументов URL по видам.
+        """
+        objects = {
+            'dog': list(Dog.objects.filter(is_active=True).order_by('-view_count').values_list('pk', flat=True)[:size]),
+            'category': list(Category.objects.values_list('pk', flat=True)[:size]),
+            'review': list(Review.objects.filter(sign_of_review=True).values_list('slug', flat=True)[:size]),
+            'user': list(User.objects.filter(is_active=True).values_list('pk', flat=True)[:size]),
+        }
+        for kind, values in objects.items():
+            if not values:
+                raise CommandError(f'Нет данных для {kind}: запустите seed_load')
+        return objects
+
+    def url(self, name, arg, query_string, objects):
+        args = [self.rng.choice(objects[arg])] if arg else []
+        return reverse(name, args=args) + query_string
+
+    def bench_endpoint(self, client, name, arg, query_string, role, objects, options):
+        """
+        Замер одного адреса: сначала время и запросы без трассировки памяти, затем отдельный
+        короткий проход с tracemalloc, чтобы трассировка не искажала задержки.
+        """
+        client.get(self.url(name, arg, query_string, objects))
+        timings, queries, statuses = [], [], set()
+        for _ in range(options['requests']):
+            url = self.url(name, arg, query_string, objects)
+            with capture_queries() as captured:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured))
+            statuses.add(response.status_code)
+
+        peaks = []
+        tracemalloc.start()
+        try:
+            for _ in range(options['allocations']):
+                url = self.url(name, arg, query_string, objects)
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+                client.get(url)
+                peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        finally:
+            tracemalloc.stop()
+
+        label = f'{reverse(name, args=[objects[arg][0]] if arg else []) + query_string}'
+        status = '' if statuses == {200} else f' статусы {sorted(statuses)}'
+        print(f'{label:<45} {role or "anonymous":<10} {percentile(timings, 50):>8.2f} {percentile(timings, 95):>8.2f} '
+              f'{percentile(timings, 99):>8.2f} {statistics.mean(queries):>9.1f} '
+              f'{(max(peaks) if peaks else 0) / 1024:>8.0f}{status}')
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, connections
+
+from dogs.counters import LocalViewCounter, apply_view_counts
+from dogs.models import Dog
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочная проверка буферизованного счётчика просмотров: потери и количество UPDATE. '
+            'Просмотры копятся в отдельном буфере и записываются apply_view_counts без порогов просмотров, '
+            'поэтому поздравления не создаются, а счётчики собак в конце восстанавливаются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--views', type=int, default=1000, help='Просмотров на поток')
+        parser.add_argument('--dogs', type=int, default=5)
+        parser.add_argument('--legacy', action='store_true', help='Также прогнать старый путь view_count += 1; save()')
+
+    def handle(self, *args, **options):
+        dogs = list(Dog.objects.order_by('pk').values_list('pk', 'view_count')[:options['dogs']])
+        if not dogs:
+            print('Нет собак в базе, заполните её: python manage.py loaddata data.json')
+            return
+        initial = dict(dogs)
+        dog_ids = list(initial)
+        total = options['threads'] * options['views']
+
+        try:
+            self.run_buffered(dog_ids, initial, total, options)
+            if options['legacy']:
+                self.run_legacy(dog_ids, initial, total, options)
+        finally:
+            for dog_id, view_count in initial.items():
+                Dog.objects.filter(pk=dog_id).update(view_count=view_count)
+
+    def run_threads(self, target, options):
+        threads = [threading.Thread(target=target, args=(n,)) for n in range(options['threads'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+    def count_lost(self, dog_ids, initial, total):
+        current = dict(Dog.objects.filter(pk__in=dog_ids).values_list('pk', 'view_count'))
+        return total - sum(current[dog_id] - initial[dog_id] for dog_id in dog_ids)
+
+    def run_buffered(self, dog_ids, initial, total, options):
+        # Свой буфер, а не буфер процесса: в общем буфере (или в Redis) могут быть настоящие просмотры
+        counter = LocalViewCounter()
+
+        def worker(n):
+            for i in range(options['views']):
+                counter.incr(dog_ids[(n + i) % len(dog_ids)])
+
+        elapsed = self.run_threads(worker, options)
+        updates = []
+
+        def count_updates(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('UPDATE'):
+                updates.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_updates):
+            apply_view_counts(counter.drain())
+
+        print(f'Буфер: {total} просмотров за {elapsed:.3f} с, '
+              f'UPDATE: {len(updates)}, потеряно: {self.count_lost(dog_ids, initial, total)}')
+
+    def run_legacy(self, dog_ids, initial, total, options):
+        Dog.objects.filter(pk__in=dog_ids).update(view_count=0)
+        initial_legacy = dict.fromkeys(dog_ids, 0)
+
+        def worker(n):
+            try:
+                for i in range(options['views']):
+                    dog = Dog.objects.get(pk=dog_ids[(n + i) % len(dog_ids)])
+                    dog.view_count += 1
+                    dog.save()
+            finally:
+                connections.close_all()
+
+        elapsed = self.run_threads(worker, options)
+        print(f'Старый путь: {total} просмотров за {elapsed:.3f} с, '
+              f'UPDATE: {total}, потеряно: {self.count_lost(dog_ids, initial_legacy, total)}')
@@ -0,0 +1,46 @@
+from django.apps import apps
+from django.core.management import BaseCommand
+
+from dogs.images import current_variants
+from dogs.services import IMAGE_VARIANT_FIELDS, build_image_variants_task
+
+
+class Command(BaseCommand):
+    help = 'Построение вариантов фотографий собак и аватаров пользователей с отчётом о размере файлов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--async', action='store_true', dest='run_async', help='Ставить задачи в очередь celery')
+        parser.add_argument('--width', type=int, default=320, help='Ширина варианта для сравнения размеров')
+
+    def handle(self, *args, **options):
+        for label, (field_name, variants_field) in IMAGE_VARIANT_FIELDS.items():
+            model = apps.get_model(label)
+            queryset = model.objects.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+            built = 0
+            for pk in queryset.values_list('pk', flat=True).iterator():
+                if options['run_async']:
+                    build_image_variants_task.delay(label, pk)
+                else:
+                    built += build_image_variants_task(label, pk)
+            print(f'{label}: вариантов построено {built}' if not options['run_async'] else f'{label}: задачи поставлены')
+            self.report(queryset.only(field_name, variants_field), field_name, variants_field, options['width'])
+
+    def report(self, queryset, field_name, variants_field, width):
+        original = variant = count = 0
+        for instance in queryset.iterator():
+            field_file = getattr(instance, field_name)
+            variants = [
+                item for item in current_variants(field_file, getattr(instance, variants_field))
+                if item['format'] == 'webp' and item['width'] >= width
+            ]
+            if not variants:
+                continue
+            try:
+                original += field_file.size
+            except OSError:
+                continue
+            variant += min(variants, key=lambda item: item['width'])['size']
+            count += 1
+        if count:
+            print(f'    {count} изображений: оригиналы {original / 1024:.0f} КиБ, '
+                  f'webp {width}w {variant / 1024:.0f} КиБ ({original / max(variant, 1):.1f}x меньше)')
@@ -0,0 +1,138 @@
+import re
+
+from django.apps import apps
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+
+from dogs.models import Category, Dog
+from dogs.views import DogDeactivateListView, DogListView
+from reviews.models import Review
+from reviews.views import AllDogReviewListView, AllInactiveDogReviewListView, DogReviewListView, \
+    InactiveDogReviewListView
+from users.models import User, UserRoles
+from users.views import UserListView
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN запросов списков dogs, reviews и users на тестовых данных с отчётом об используемых индексах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Количество собак и отзывов в тестовых данных')
+        parser.add_argument('--plan', action='store_true', help='Выводить план запроса целиком')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.explain_views(options['rows'], options['plan'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows):
+        users = {
+            role: User.objects.create(email=f'explain-{role}@example.com', role=role,
+                                      is_staff=role != UserRoles.USER, is_superuser=role == UserRoles.ADMIN)
+            for role in UserRoles.values
+        }
+        User.objects.bulk_create([
+            User(email=f'explain-{n}@example.com', is_active=n % 10 != 0) for n in range(rows // 10)
+        ])
+        categories = Category.objects.bulk_create([
+            Category(name=f'Explain category {n}', description='Explain') for n in range(20)
+        ])
+        dogs = Dog.objects.bulk_create([
+            Dog(name=f'Explain dog {n}', category=categories[n % len(categories)],
+                owner=users[UserRoles.USER] if n % 50 == 0 else None, is_active=n % 10 != 0)
+            for n in range(rows)
+        ])
+        Review.objects.bulk_create([
+            Review(title=f'Explain review {n}', slug=f'explain-review-{n}', content='Explain',
+                   dog=dogs[n % 100], author=users[UserRoles.USER] if n % 20 == 0 else users[UserRoles.ADMIN],
+                   sign_of_review=n % 5 != 0)
+            for n in range(rows)
+        ])
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return users, categories[0], dogs[0]
+
+    def view_queryset(self, view_class, user, **kwargs):
+        """
+        Получение QuerySet страницы списка так же, как его строит представление.
+
+        Аргументы:
+            view_class (View): Класс представления списка.
+            user (User): Пользователь запроса.
+            **kwargs: Именованные аргументы URL.
+
+        Возвращает:
+            QuerySet: Первая страница списка.
+        """
+        request = RequestFactory().get('/')
+        request.user = user
+        view = view_class()
+        view.setup(request, **kwargs)
+        return view.get_queryset()[:view.paginate_by or 10]
+
+    def explain(self, queryset):
+        """
+        Получение плана выполнения запроса. Для MSSQL план читается через SET SHOWPLAN_TEXT.
+
+        Аргументы:
+            queryset (QuerySet): Запрос.
+
+        Возвращает:
+            str: План запроса.
+        """
+        if connection.features.supports_explaining_query_execution:
+            return queryset.explain()
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('SET SHOWPLAN_TEXT ON')
+            try:
+                cursor.execute(sql, params)
+                plan = [str(row[0]) for row in cursor.fetchall()]
+                while cursor.nextset():
+                    plan.extend(str(row[0]) for row in cursor.fetchall())
+            finally:
+                cursor.execute('SET SHOWPLAN_TEXT OFF')
+        return '\n'.join(plan)
+
+    def explain_views(self, rows, show_plan):
+        users, category, dog = self.seed(rows)
+        user, admin = users[UserRoles.USER], users[UserRoles.ADMIN]
+        queries = [
+            ('dogs:category_dogs', Dog.objects.select_related('category').filter(category_id=category.pk)),
+            ('dogs:list_dogs', self.view_queryset(DogListView, user)),
+            ('dogs:deactivated_list_dogs [user]', self.view_queryset(DogDeactivateListView, user)),
+            ('dogs:deactivated_list_dogs [admin]', self.view_queryset(DogDeactivateListView, admin)),
+            ('reviews:all_reviews', self.view_queryset(AllDogReviewListView, user)),
+            ('reviews:all_inactive_reviews [user]', self.view_queryset(AllInactiveDogReviewListView, user)),
+            ('reviews:reviews_list', self.view_queryset(DogReviewListView, user, pk=dog.pk)),
+            ('reviews:inactive_reviews_list [user]', self.view_queryset(InactiveDogReviewListView, user, pk=dog.pk)),
+            ('reviews:inactive_reviews_list [admin]',
+             self.view_queryset(InactiveDogReviewListView, admin, pk=dog.pk)),
+            ('users:users_list', self.view_queryset(UserListView, user)),
+        ]
+        with connection.cursor() as cursor:
+            index_names = {
+                name
+                for app_label in ('dogs', 'reviews', 'users')
+                for model in apps.get_app_config(app_label).get_models()
+                for name, constraint in connection.introspection.get_constraints(cursor, model._meta.db_table).items()
+                if constraint['index'] and not constraint['primary_key']
+            }
+        for label, queryset in queries:
+            plan = self.explain(queryset)
+            used = sorted(name for name in index_names if re.search(rf'\b{name}\b', plan))
+            scan = re.search(r'\bSCAN\b(?! \w+ USING)|Table Scan|Clustered Index Scan|Seq Scan', plan)
+            sort = re.search(r'TEMP B-TREE|\bSort\b', plan)
+            print(f'{label}: индексы {", ".join(used) or "нет"}'
+                  f'{", полный просмотр" if scan else ""}{", сортировка" if sort else ""}')
+            if show_plan:
+                print('    ' + plan.replace('\n', '\n    '))
@@ -0,0 +1,202 @@
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.management import BaseCommand, CommandError
+from django.db import connections, router, transaction
+
+from dogs.catalog import FORMATS, clean_record, detect_format, read_records
+from dogs.models import Category, Dog, Parent, SearchKind
+from dogs.search import index_objects, token_index_enabled
+from dogs.services import invalidate_model_cache, schedule_image_variants
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Потоковый импорт собак, пород и родословных из NDJSON или CSV пачками bulk_create. '
+            'Сигналы моделей не отправляются: поисковый индекс, кеш пород и варианты фотографий '
+            'обновляются один раз на пачку')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл каталога (.ndjson или .csv)')
+        parser.add_argument('--format', choices=FORMATS, default=None, help='По умолчанию - по расширению файла')
+        parser.add_argument('--photos', default=None, help='Каталог с файлами фотографий из поля photo')
+        parser.add_argument('--owner', default=None, help='Email владельца собак, у которых он не указан')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-errors', type=int, default=20, help='Сколько ошибок строк выводить')
+
+    def handle(self, *args, **options):
+        # Родители и поисковый индекс ссылаются на ID, которые вернул bulk_create
+        if not connections[router.db_for_write(Dog)].features.can_return_rows_from_bulk_insert:
+            raise CommandError('База данных не возвращает ID строк из bulk_create')
+        self.photos = options['photos']
+        if self.photos and not os.path.isdir(self.photos):
+            raise CommandError(f'Каталог фотографий не найден: {self.photos}')
+        self.photos_root = os.path.realpath(self.photos) if self.photos else None
+        self.categories = dict(Category.objects.values_list('name', 'pk'))
+        self.owners = {}
+        self.default_owner = None
+        if options['owner']:
+            self.default_owner = User.objects.filter(email=options['owner']).values_list('pk', flat=True).first()
+            if self.default_owner is None:
+                raise CommandError(f'Пользователь не найден: {options["owner"]}')
+        self.created_categories = 0
+        self.errors = []
+
+        fmt = options['format'] or detect_format(options['path'])
+        start = time.perf_counter()
+        imported = 0
+        batch = []
+        # utf-8-sig читает и файлы с BOM, которые сохраняет Excel
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            for number, record in read_records(stream, fmt):
+                try:
+                    batch.append((number, clean_record(record)))
+                except ValidationError as error:
+                    self.errors.append((number, '; '.join(error.messages)))
+                if len(batch) >= options['batch_size']:
+                    imported += self.import_batch(batch)
+                    batch = []
+                    self.report_progress(imported, start)
+        imported += self.import_batch(batch)
+        if self.created_categories:
+            invalidate_model_cache(Category)
+
+        for number, message in self.errors[:options['max_errors']]:
+            print(f'Строка {number}: {message}')
+        elapsed = time.perf_counter() - start
+        print(f'Импортировано собак: {imported}, новых пород: {self.created_categories}, '
+              f'ошибок: {len(self.errors)}')
+        print(f'Время: {elapsed:.1f} с, {imported / elapsed if elapsed else 0:.0f} строк/с')
+
+    def report_progress(self, imported, start):
+        elapsed = time.perf_counter() - start
+        print(f'... {imported} собак, {imported / elapsed if elapsed else 0:.0f} строк/с')
+
+    def resolve_categories(self, records):
+        """
+        Породы пачки по названиям из карты в памяти; недостающие создаются одним bulk_create.
+        """
+        names = {record['category'] for record in records}
+        names |= {parent['category'] for record in records for parent in record['parents']}
+        missing = sorted(names - self.categories.keys())
+        if not missing:
+            return
+        created = Category.objects.bulk_create([Category(name=name, description='') for name in missing])
+        self.categories.update((category.name, category.pk) for category in created)
+        self.created_categories += len(created)
+        if token_index_enabled():
+            index_objects(SearchKind.CATEGORY, [category.pk for category in created])
+
+    def resolve_owners(self, records):
+        """
+        Владельцы пачки по email: неизвестные адреса загружаются одним запросом и запоминаются.
+        """
+        missing = {record['owner'] for record in records if record['owner']} - self.owners.keys()
+        if missing:
+            found = dict(User.objects.filter(email__in=missing).values_list('email', 'pk'))
+            self.owners.update({email: found.get(email) for email in missing})
+
+    def photo_source(self, name):
+        """
+        Путь к фотографии в каталоге --photos. Имена, которые выходят за каталог (../, абсолютные пути,
+        символические ссылки наружу), отклоняются.
+
+        Исключения:
+            ValueError: Если файл вне каталога --photos или не найден.
+
+        Возвращает:
+            str: Путь к файлу.
+        """
+        path = os.path.realpath(os.path.join(self.photos_root, name))
+        if os.path.commonpath([self.photos_root, path]) != self.photos_root:
+            raise ValueError(f'файл {name} вне каталога --photos')
+        if not os.path.isfile(path):
+            raise ValueError(f'файл {name} не найден')
+        return path
+
+    def copy_photos(self, photos):
+        """
+        Копирование фотографий пачки в хранилище медиафайлов после фиксации транзакции: при откате пачки
+        в хранилище не остаётся файлов без собак. Если запланированное имя уже занято, собаке записывается
+        имя, выбранное хранилищем; у собаки, чей файл не скопировался, фотография очищается.
+        Задачи построения вариантов ставятся после копирования.
+
+        Аргументы:
+            photos (list): Тройки (номер строки, собака, путь к файлу).
+        """
+        storage = Dog._meta.get_field('photo').storage
+        for number, dog, source in photos:
+            try:
+                with open(source, 'rb') as stream:
+                    name = storage.save(dog.photo.name, File(stream))
+            except OSError as error:
+                self.errors.append((number, f'photo: {error}, собака импортирована без фотографии'))
+                Dog.objects.filter(pk=dog.pk).update(photo='')
+                continue
+            if name != dog.photo.name:
+                dog.photo = name
+                Dog.objects.filter(pk=dog.pk).update(photo=name)
+            schedule_image_variants(dog)
+        # Имена фотографий менялись через update(), без сигналов
+        invalidate_model_cache(Dog)
+
+    def import_batch(self, batch):
+        """
+        Импорт пачки записей в одной транзакции: собаки и родители создаются bulk_create,
+        затем собаки индексируются и меняется версия кеша собак. Фотографии копируются после фиксации транзакции (copy_photos).
+
+        Аргументы:
+            batch (list): Пары (номер строки, проверенная запись).
+
+        Возвращает:
+            int: Количество созданных собак.
+        """
+        if not batch:
+            return 0
+        records = [record for _, record in batch]
+        with transaction.atomic():
+            self.resolve_categories(records)
+            self.resolve_owners(records)
+            field = Dog._meta.get_field('photo')
+            dogs = []
+            parents = []
+            photos = []
+            for number, record in batch:
+                owner_id = self.default_owner
+                if record['owner']:
+                    owner_id = self.owners[record['owner']]
+                    if owner_id is None:
+                        self.errors.append((number, f'owner: пользователь {record["owner"]} не найден'))
+                        continue
+                source = None
+                if record['photo']:
+                    if not self.photos:
+                        self.errors.append((number, 'photo: не задан каталог --photos'))
+                        continue
+                    try:
+                        source = self.photo_source(record['photo'])
+                    except ValueError as error:
+                        self.errors.append((number, f'photo: {error}'))
+                        continue
+                dog = Dog(name=record['name'], category_id=self.categories[record['category']],
+                          birth_date=record['birth_date'], is_active=record['is_active'], owner_id=owner_id,
+                          photo=field.generate_filename(None, os.path.basename(record['photo'])) if source else '')
+                dogs.append(dog)
+                parents.append(record['parents'])
+                if source:
+                    photos.append((number, dog, source))
+            Dog.objects.bulk_create(dogs)
+            Parent.objects.bulk_create([
+                Parent(dog=dog, name=parent['name'], category_id=self.categories[parent['category']],
+                       birth_date=parent['birth_date'])
+                for dog, dog_parents in zip(dogs, parents) for parent in dog_parents
+            ])
+            if token_index_enabled():
+                index_objects(SearchKind.DOG, [dog.pk for dog in dogs])
+            # bulk_create не отправляет сигналов: версия собак для ETag списков меняется один раз на пачку
+            invalidate_model_cache(Dog)
+            if photos:
+                transaction.on_commit(lambda: self.copy_photos(photos))
+        return len(dogs)
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management import BaseCommand
+
+from dogs.pedigree import rebuild_ancestry
+
+
+class Command(BaseCommand):
+    help = 'Перестроение таблицы замыкания родословной DogAncestry по всем связям Parent с собаками из базы'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rows, skipped = rebuild_ancestry()
+        print(f'Строк замыкания: {rows}')
+        if skipped:
+            print(f'Пропущено собак из-за цикла в родословной: {skipped}')
+        print(f'Готово за {time.perf_counter() - start:.1f} с')
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from dogs.models import Category, Dog, SearchKind, SearchToken
+from dogs.search import get_search_backend, index_objects
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестроение поискового индекса SearchToken для всех собак и пород. Индекс заменяется пачками '
+        'в отдельных транзакциях, поэтому поиск во время перестроения продолжает работать'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        print(f'Поисковый бэкенд: {type(get_search_backend()).__name__}')
+        start = time.perf_counter()
+        for kind, model in ((SearchKind.CATEGORY, Category), (SearchKind.DOG, Dog)):
+            pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            tokens = 0
+            stale = SearchToken.objects.filter(kind=kind)
+            for offset in range(0, len(pks), batch_size):
+                batch = pks[offset:offset + batch_size]
+                with transaction.atomic():
+                    tokens += index_objects(kind, batch, batch_size=batch_size)
+                    # Основы удалённых объектов с ID между предыдущей пачкой и концом текущей
+                    stale.filter(object_id__lte=batch[-1]).exclude(object_id__in=batch).delete()
+                stale = stale.filter(object_id__gt=batch[-1])
+            stale.delete()
+            print(f'{kind}: документов {len(pks)}, основ {tokens}')
+        print(f'Готово за {time.perf_counter() - start:.1f} с')
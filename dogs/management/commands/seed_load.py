@@ -0,0 +1,225 @@
+import bisect
+import datetime
+import itertools
+import random
+import time
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db.models import Max
+
+from dogs.models import Category, Dog, Parent
+from dogs.services import invalidate_model_cache
+from reviews.models import Review
+from users.models import User, UserRoles
+
+DOG_NAMES = (
+    'Рекс', 'Молли', 'Макс', 'Лаки', 'Чарли', 'Белла', 'Бэмби', 'Вилли', 'Форрест', 'Тузик', 'Шарик', 'Бобик',
+    'Джек', 'Лайма', 'Найда', 'Граф', 'Дружок', 'Соня', 'Марта', 'Тайсон', 'Альма', 'Булька', 'Герда', 'Барон',
+)
+BREED_WORDS = (
+    'овчарка', 'терьер', 'ретривер', 'спаниель', 'лайка', 'такса', 'пудель', 'бульдог', 'гончая', 'шпиц',
+    'колли', 'дог', 'мастиф', 'сеттер', 'пойнтер', 'хаунд',
+)
+BREED_ADJECTIVES = (
+    'немецкая', 'английский', 'русская', 'карликовый', 'шотландская', 'французский', 'западно-сибирская',
+    'длинношёрстная', 'гладкошёрстный', 'королевский', 'ирландский', 'восточноевропейская',
+)
+REVIEW_WORDS = (
+    'добрый', 'ласковый', 'активная', 'умная', 'спокойный', 'игривая', 'преданный', 'послушная', 'любит', 'гулять',
+    'детей', 'играть', 'быстро', 'учится', 'команды', 'охраняет', 'дом', 'приют', 'рекомендую', 'взяли', 'щенка',
+    'собака', 'пёс', 'характер', 'шерсть', 'здоровая', 'энергичная', 'друг', 'семьи',
+)
+FIRST_NAMES = ('Иван', 'Анна', 'Пётр', 'Мария', 'Алексей', 'Ольга', 'Дмитрий', 'Елена', 'Сергей', 'Наталья')
+LAST_NAMES = ('Иванов', 'Смирнова', 'Кузнецов', 'Попова', 'Соколов', 'Лебедева', 'Козлов', 'Новикова')
+
+
+def zipf_cum_weights(size, exponent):
+    """
+    Накопленные веса распределения Ципфа: k-й по популярности элемент выбирается с вероятностью ~ 1 / k ** s.
+
+    Аргументы:
+        size (int): Количество элементов.
+        exponent (float): Показатель s.
+
+    Возвращает:
+        list: Накопленные веса для random.choices или bisect.
+    """
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+class ZipfChooser:
+    """
+    Выбор элементов по закону Ципфа. Ранги популярности случайно перемешаны, чтобы популярные строки
+    не совпадали с первыми ID.
+
+    Методы:
+        choice(self): Выбор одного элемента.
+    """
+
+    def __init__(self, population, exponent, rng):
+        self.population = list(population)
+        rng.shuffle(self.population)
+        self.cum_weights = zipf_cum_weights(len(self.population), exponent)
+        self.total = self.cum_weights[-1]
+        self.rng = rng
+
+    def choice(self):
+        return self.population[bisect.bisect(self.cum_weights, self.rng.random() * self.total)]
+
+
+class Command(BaseCommand):
+    help = 'Массовая генерация пользователей, пород, собак, родителей и отзывов для нагрузочных замеров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--categories', type=int, default=300)
+        parser.add_argument('--dogs', type=int, default=1_000_000)
+        parser.add_argument('--reviews', type=int, default=2_000_000)
+        parser.add_argument('--parents', type=int, default=2, help='Родителей у собаки (у части собак их нет)')
+        parser.add_argument('--zipf', type=float, default=1.1, help='Показатель распределения Ципфа')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None, help='Зерно генератора для воспроизводимых данных')
+        parser.add_argument('--password', default='qwerty', help='Пароль всех созданных пользователей')
+        parser.add_argument('--search-index', action='store_true', help='Перестроить поисковый индекс после загрузки')
+
+    def handle(self, *args, **options):
+        # Собаки и отзывы выбирают пользователей, породы и собак из непустых совокупностей (ZipfChooser)
+        for name in ('users', 'categories', 'dogs', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f'--{name.replace("_", "-")} должно быть больше нуля')
+        for name in ('reviews', 'parents'):
+            if options[name] < 0:
+                raise CommandError(f'--{name} не может быть отрицательным')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.zipf = options['zipf']
+        # Метка загрузки не зависит от зерна: повторная загрузка с тем же --seed не упирается в уникальные email и slug
+        self.run = uuid.uuid4().hex[:6]
+        start = time.perf_counter()
+        users = self.create_users(options['users'], options['password'])
+        categories = self.create_categories(options['categories'])
+        dogs = self.create_dogs(options['dogs'], users, categories)
+        self.create_parents(options['parents'], dogs, categories)
+        self.create_reviews(options['reviews'], users, dogs)
+        print(f'Готово за {time.perf_counter() - start:.1f} с (метка загрузки {self.run})')
+        if options['search_index']:
+            call_command('rebuild_search_index', batch_size=self.batch_size)
+        else:
+            print('Поисковый индекс не обновлён: bulk_create не вызывает сигналы, запустите rebuild_search_index')
+
+    def bulk_create(self, model, objects):
+        """
+        Вставка объектов пачками по batch_size. Объекты создаются генератором, поэтому в памяти одна пачка.
+
+        Аргументы:
+            model (Model): Класс модели.
+            objects (Iterable): Генератор несохранённых объектов.
+
+        Возвращает:
+            list: ID созданных строк по возрастанию.
+        """
+        last_pk = model.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+        start = time.perf_counter()
+        objects = iter(objects)
+        total = 0
+        while batch := list(itertools.islice(objects, self.batch_size)):
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+            total += len(batch)
+        # bulk_create не отправляет сигналов: версия кеша модели (кеш пород, ETag списков) меняется здесь
+        invalidate_model_cache(model)
+        elapsed = time.perf_counter() - start
+        print(f'{model._meta.verbose_name_plural}: {total} за {elapsed:.1f} с ({total / max(elapsed, 1e-9):.0f} строк/с)')
+        return list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True))
+
+    def create_users(self, count, password):
+        """
+        Пользователи: 1% модераторов, 0.1% администраторов, 5% неактивны. Пароль хешируется один раз.
+        """
+        password = make_password(password)
+        rng = self.rng
+
+        def users():
+            for n in range(count):
+                role = rng.choices([UserRoles.ADMIN, UserRoles.MODERATOR, UserRoles.USER], weights=[1, 10, 989])[0]
+                yield User(
+                    email=f'load-{self.run}-{n}@example.com', password=password, role=role,
+                    first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                    is_staff=role != UserRoles.USER, is_superuser=role == UserRoles.ADMIN,
+                    is_active=rng.random() < 0.95,
+                )
+
+        return self.bulk_create(User, users())
+
+    def create_categories(self, count):
+        """
+        Породы с уникальными названиями и описаниями из словаря.
+        """
+        rng = self.rng
+
+        def categories():
+            for n in range(count):
+                name = f'{rng.choice(BREED_ADJECTIVES).capitalize()} {rng.choice(BREED_WORDS)} {self.run}-{n}'
+                yield Category(name=name, description=' '.join(rng.choices(REVIEW_WORDS, k=30)))
+
+        return self.bulk_create(Category, categories())
+
+    def create_dogs(self, count, users, categories):
+        """
+        Собаки: порода выбирается по Ципфу (несколько популярных пород), у 60% собак есть владелец,
+        10% неактивны, количество просмотров распределено по Парето с длинным хвостом.
+        """
+        rng = self.rng
+        breed = ZipfChooser(categories, self.zipf, rng)
+        owner = ZipfChooser(users, self.zipf, rng)
+        today = datetime.date.today()
+
+        def dogs():
+            for n in range(count):
+                yield Dog(
+                    name=f'{rng.choice(DOG_NAMES)} {n}', category_id=breed.choice(),
+                    owner_id=owner.choice() if rng.random() < 0.6 else None,
+                    birth_date=today - datetime.timedelta(days=rng.randint(30, 15 * 365)),
+                    is_active=rng.random() < 0.9,
+                    view_count=int((rng.paretovariate(1.2) - 1) * 20),
+                )
+
+        return self.bulk_create(Dog, dogs())
+
+    def create_parents(self, per_dog, dogs, categories):
+        """
+        Родители: у каждой собаки от нуля до per_dog родителей.
+        """
+        rng = self.rng
+        breed = ZipfChooser(categories, self.zipf, rng)
+        today = datetime.date.today()
+
+        def parents():
+            for dog_id in dogs:
+                for _ in range(rng.randint(0, per_dog)):
+                    yield Parent(
+                        dog_id=dog_id, name=rng.choice(DOG_NAMES), category_id=breed.choice(),
+                        birth_date=today - datetime.timedelta(days=rng.randint(2 * 365, 20 * 365)),
+                    )
+
+        self.bulk_create(Parent, parents())
+
+    def create_reviews(self, count, users, dogs):
+        """
+        Отзывы: собака выбирается по Ципфу, поэтому у немногих собак тысячи отзывов, а у большинства ни одного.
+        80% отзывов активны.
+        """
+        rng = self.rng
+        dog = ZipfChooser(dogs, self.zipf, rng)
+
+        def reviews():
+            for n in range(count):
+                yield Review(
+                    title=' '.join(rng.choices(REVIEW_WORDS, k=3)).capitalize(),
+                    slug=f'load-{self.run}-{n}', content=' '.join(rng.choices(REVIEW_WORDS, k=rng.randint(10, 60))),
+                    dog_id=dog.choice(), author_id=rng.choice(users),
+                    sign_of_review=rng.random() < 0.8,
+                )
+
+        self.bulk_create(Review, reviews())
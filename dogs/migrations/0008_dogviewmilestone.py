@@ -0,0 +1,32 @@
+# Generated by Django 5.0.9 on 2026-10-17 18:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dogs', '0007_dog_view_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DogViewMilestone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('threshold', models.PositiveIntegerField(verbose_name='threshold')),
+                ('reached_at', models.DateTimeField(auto_now_add=True, verbose_name='reached_at')),
+                ('notified_at', models.DateTimeField(blank=True, null=True, verbose_name='notified_at')),
+                ('dog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_milestones', to='dogs.dog', verbose_name='dog')),
+            ],
+            options={
+                'verbose_name': 'view milestone',
+                'verbose_name_plural': 'view milestones',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dogviewmilestone',
+            constraint=models.UniqueConstraint(fields=('dog', 'threshold'), name='unique_dog_view_milestone'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.9 on 2026-10-17 18:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dogs', '0008_dogviewmilestone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='dog',
+            options={'ordering': ['id'], 'verbose_name': 'dog', 'verbose_name_plural': 'dogs'},
+        ),
+        migrations.AddIndex(
+            model_name='dog',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['id'], name='dog_inactive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dog',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['owner', 'id'], name='dog_inactive_owner_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.9 on 2026-10-17 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dogs', '0009_dog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('dog', 'dog'), ('category', 'category')], max_length=10, verbose_name='kind')),
+                ('object_id', models.PositiveIntegerField(verbose_name='object_id')),
+                ('token', models.CharField(max_length=50, verbose_name='token')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='weight')),
+            ],
+            options={
+                'verbose_name': 'search token',
+                'verbose_name_plural': 'search tokens',
+                'indexes': [models.Index(fields=['kind', 'token'], name='search_token_kind_token_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchtoken',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id', 'token'), name='unique_search_token'),
+        ),
+    ]
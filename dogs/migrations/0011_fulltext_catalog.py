@@ -0,0 +1,62 @@
+from django.db import migrations
+
+FULLTEXT_TABLES = {
+    'dogs_dog': ('name',),
+    'dogs_category': ('name', 'description'),
+    'reviews_review': ('title', 'content'),
+}
+
+
+def fulltext_installed(schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT FULLTEXTSERVICEPROPERTY('IsFullTextInstalled')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_fulltext_catalog(apps, schema_editor):
+    """
+    Создание полнотекстового каталога и индексов MSSQL с русской морфологией.
+    На других СУБД и без компонента Full-Text Search поиск идёт по индексу SearchToken.
+    """
+    if not fulltext_installed(schema_editor):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("IF NOT EXISTS (SELECT 1 FROM sys.fulltext_catalogs WHERE name = 'dogs_catalog') "
+                       "CREATE FULLTEXT CATALOG dogs_catalog")
+        for table, columns in FULLTEXT_TABLES.items():
+            cursor.execute(
+                'SELECT name FROM sys.indexes WHERE object_id = OBJECT_ID(%s) AND is_primary_key = 1', [table]
+            )
+            key_index = cursor.fetchone()[0]
+            column_list = ', '.join(f'{column} LANGUAGE 1049' for column in columns)
+            cursor.execute(
+                f'CREATE FULLTEXT INDEX ON {table} ({column_list}) KEY INDEX [{key_index}] ON dogs_catalog '
+                f'WITH CHANGE_TRACKING AUTO'
+            )
+
+
+def drop_fulltext_catalog(apps, schema_editor):
+    if not fulltext_installed(schema_editor):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in FULLTEXT_TABLES:
+            cursor.execute(f"IF EXISTS (SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('{table}')) "
+                           f"DROP FULLTEXT INDEX ON {table}")
+        cursor.execute("IF EXISTS (SELECT 1 FROM sys.fulltext_catalogs WHERE name = 'dogs_catalog') "
+                       "DROP FULLTEXT CATALOG dogs_catalog")
+
+
+class Migration(migrations.Migration):
+    # Полнотекстовые индексы MSSQL нельзя создавать внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('dogs', '0010_searchtoken'),
+        ('reviews', '0003_review_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_catalog, drop_fulltext_catalog),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-17 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dogs', '0011_fulltext_catalog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dog',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='photo_variants'),
+        ),
+    ]
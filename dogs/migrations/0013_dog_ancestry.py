@@ -0,0 +1,53 @@
+# Generated by Django 5.0.9 on 2026-10-17 19:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dogs', '0012_dog_photo_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DogAncestry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField(verbose_name='depth')),
+                ('paths', models.PositiveBigIntegerField(default=1, verbose_name='paths')),
+            ],
+            options={
+                'verbose_name': 'dog ancestry',
+                'verbose_name_plural': 'dog ancestry',
+            },
+        ),
+        migrations.AddField(
+            model_name='parent',
+            name='parent_dog',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='offspring_links', to='dogs.dog', verbose_name='parent_dog'),
+        ),
+        migrations.AddConstraint(
+            model_name='parent',
+            constraint=models.UniqueConstraint(condition=models.Q(('parent_dog__isnull', False)), fields=('dog', 'parent_dog'), name='unique_parent_dog'),
+        ),
+        migrations.AddField(
+            model_name='dogancestry',
+            name='ancestor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='dogs.dog', verbose_name='ancestor'),
+        ),
+        migrations.AddField(
+            model_name='dogancestry',
+            name='descendant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='dogs.dog', verbose_name='descendant'),
+        ),
+        migrations.AddIndex(
+            model_name='dogancestry',
+            index=models.Index(fields=['descendant', 'depth'], name='dog_ancestry_descendant_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dogancestry',
+            constraint=models.UniqueConstraint(fields=('ancestor', 'descendant', 'depth'), name='unique_dog_ancestry'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.9 on 2026-10-17 21:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dogs', '0013_dog_ancestry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='updated_at'),
+            preserve_default=False,
+        ),
+    ]
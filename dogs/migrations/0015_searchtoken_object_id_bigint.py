@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-17 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dogs', '0014_dog_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='searchtoken',
+            name='object_id',
+            field=models.PositiveBigIntegerField(verbose_name='object_id'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+from django.conf import settings
+
+from dogs.models import Dog, DogViewMilestone
+
+
+def crossed_thresholds(old_count, new_count, step=None):
+    """
+    Пороги просмотров, пересечённые при переходе счётчика от old_count к new_count.
+
+    Аргументы:
+        old_count (int): Значение счётчика до сброса буфера.
+        new_count (int): Значение счётчика после сброса буфера.
+        step (int): Шаг порогов. По умолчанию VIEW_MILESTONE_STEP.
+
+    Возвращает:
+        range: Пороги в полуинтервале (old_count, new_count].
+    """
+    step = step or settings.VIEW_MILESTONE_STEP
+    return range((old_count // step + 1) * step, new_count + 1, step)
+
+
+def detect_view_milestones(counts, previous, batch_size=None):
+    """
+    Поиск и сохранение порогов просмотров, пересечённых при сбросе буфера счётчиков.
+
+    Значения до приращения берутся из apply_view_counts, где они прочитаны под блокировкой строк в транзакции
+    UPDATE: повторное чтение после UPDATE при параллельных сбросах из разных процессов теряло бы пороги.
+    Уже сохранённые пороги отбрасываются, поэтому повторные сбросы и правки собаки не порождают дублей.
+
+    Аргументы:
+        counts (dict): Записанные приращения {ID собаки: приращение}.
+        previous (dict): Значения счётчиков до приращения {ID собаки: просмотры}.
+        batch_size (int): Количество собак в одном запросе.
+
+    Возвращает:
+        int: Количество новых порогов.
+    """
+    batch_size = batch_size or settings.VIEW_COUNTER_BATCH_SIZE
+    dog_ids = sorted(dog_id for dog_id in counts if dog_id in previous)
+    created = 0
+    for start in range(0, len(dog_ids), batch_size):
+        batch = dog_ids[start:start + batch_size]
+        candidates = set()
+        owned = Dog.objects.filter(pk__in=batch, owner__isnull=False).values_list('pk', flat=True)
+        for dog_id in owned:
+            old_count = previous[dog_id]
+            for threshold in crossed_thresholds(old_count, old_count + counts[dog_id]):
+                candidates.add((dog_id, threshold))
+        if not candidates:
+            continue
+        existing = set(DogViewMilestone.objects.filter(
+            dog_id__in={dog_id for dog_id, _ in candidates},
+            threshold__in={threshold for _, threshold in candidates},
+        ).values_list('dog_id', 'threshold'))
+        milestones = [
+            DogViewMilestone(dog_id=dog_id, threshold=threshold)
+            for dog_id, threshold in sorted(candidates - existing)
+        ]
+        DogViewMilestone.objects.bulk_create(milestones, ignore_conflicts=True)
+        created += len(milestones)
+    return created
+
+
+def process_view_milestones(counts, previous):
+    """
+    Обнаружение порогов после сброса буфера и постановка одной задачи Celery на рассылку поздравлений.
+
+    Аргументы:
+        counts (dict): Записанные приращения {ID собаки: приращение}.
+        previous (dict): Значения счётчиков до приращения {ID собаки: просмотры}.
+
+    Возвращает:
+        int: Количество новых порогов.
+    """
+    created = detect_view_milestones(counts, previous)
+    if created:
+        from dogs.services import send_milestone_mails_task
+
+        send_milestone_mails_task.delay()
+    return created
@@ -1,5 +1,8 @@
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Now
 
 from users.models import NULLABLE
 
@@ -38,10 +41,12 @@ class Dog(models.Model):
         name (CharField): Имя собаки.
         category (ForeignKey): Категория (например, порода собак).
         photo (ImageField): Фотография собаки.
+        photo_variants (JSONField): Уменьшенные варианты фотографии (строятся задачей build_image_variants_task).
         birth_date (DateField): Дата рождения собаки.
         is_active (BooleanField): Активен ли питомец.
         view_count (PositiveIntegerField): Количество просмотров.
         owner (ForeignKey): Владелец собаки.
+        updated_at (DateTimeField): Время последнего изменения (валидатор условного GET), без записи просмотров.
 
     Методы:
         __str__ (str): Возвращает имя собаки вместе с категорией.
@@ -49,13 +54,17 @@ class Dog(models.Model):
     Метакласс:
         verbose_name (str): Название модели в единственном числе.
         verbose_name_plural (str): Название модели во множественном числе.
+        ordering (list): Сортировка по полю id.
+        indexes (list): Частичные индексы списков неактивных собак.
     """
     name = models.CharField(max_length=250, verbose_name='dog_name')
     category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name='breed')
     photo = models.ImageField(upload_to='dogs/', verbose_name='image', **NULLABLE)
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name='photo_variants')
     birth_date = models.DateField(verbose_name='birth_date', **NULLABLE)
     is_active = models.BooleanField(default=True, verbose_name='active')
     view_count = models.PositiveIntegerField(default=0, verbose_name='view_count')
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now(), verbose_name='updated_at')
 
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, verbose_name='owner', **NULLABLE)
 
@@ -65,32 +74,192 @@ class Dog(models.Model):
     class Meta:
         verbose_name = 'dog'
         verbose_name_plural = 'dogs'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['id'], condition=Q(is_active=False), name='dog_inactive_idx'),
+            models.Index(fields=['owner', 'id'], condition=Q(is_active=False), name='dog_inactive_owner_idx'),
+        ]
 
 class Parent(models.Model):
     """
     Родительская модель. Связана с моделью собаки. Включает имя, категорию, дату рождения и ссылку на собаку.
+    Если родитель сам есть в базе, parent_dog ссылается на него и запись становится ребром родословной
+    (таблица DogAncestry, dogs/pedigree.py).
 
     Атрибуты:
         name (Charify): Имя родителя.
         category (ForeignKey): Категория (например, порода собак).
         birth_date (DateField): Дата рождения родителя.
         dog (ForeignKey): Собака, связанная с родителем.
+        parent_dog (ForeignKey): Собака из базы, которая является этим родителем.
 
     Методы:
         __str__ (str): Возвращает имя родителя вместе с категорией.
+        edge (tuple): Ребро родословной (родитель, собака) или None, если родитель не связан с собакой из базы.
+        clean(self): Проверка, что собака не становится собственным предком.
 
     Метакласс:
         verbose_name (str): Название модели в единственном числе.
         verbose_name_plural (str): Название модели во множественном числе.
+        constraints (list): Собака из базы указывается родителем одной собаки не больше одного раза.
     """
     dog = models.ForeignKey(Dog, on_delete=models.CASCADE)
     name = models.CharField(max_length=250, verbose_name='dog_name')
     category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name='breed')
     birth_date = models.DateField(verbose_name='birth_date', **NULLABLE)
+    parent_dog = models.ForeignKey(Dog, on_delete=models.SET_NULL, related_name='offspring_links',
+                                   verbose_name='parent_dog', **NULLABLE)
 
     def __str__(self):
         return f"{self.name} ({self.category})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Ребро на момент загрузки: при сохранении и удалении по нему обновляется DogAncestry
+        instance._loaded_edge = instance.edge
+        return instance
+
+    @property
+    def edge(self):
+        parent_dog_id = self.__dict__.get('parent_dog_id')
+        dog_id = self.__dict__.get('dog_id')
+        if parent_dog_id is None or dog_id is None:
+            return None
+        return parent_dog_id, dog_id
+
+    def clean(self):
+        """
+        Проверка, что собака не становится собственным предком.
+
+        Исключения:
+            ValidationError: Если parent_dog - сама собака или её потомок.
+        """
+        if self.edge is None:
+            return
+        if self.parent_dog_id == self.dog_id or DogAncestry.objects.filter(
+                ancestor_id=self.dog_id, descendant_id=self.parent_dog_id).exists():
+            raise ValidationError({'parent_dog': 'Собака не может быть собственным предком'})
+
     class Meta:
         verbose_name = 'parent'
         verbose_name_plural = 'parents'
+        constraints = [
+            models.UniqueConstraint(fields=['dog', 'parent_dog'], condition=Q(parent_dog__isnull=False),
+                                    name='unique_parent_dog'),
+        ]
+
+
+class DogAncestry(models.Model):
+    """
+    Таблица замыкания родословной: строка на каждую пару (предок, потомок) и каждое расстояние между ними
+    в поколениях. Позволяет одним запросом получить всех предков или потомков до глубины N.
+    Число путей нужно для точного удаления рёбер, когда один предок встречается в родословной несколько раз.
+    Поддерживается инкрементально при изменении Parent (dogs/pedigree.py).
+
+    Атрибуты:
+        ancestor (ForeignKey): Предок.
+        descendant (ForeignKey): Потомок.
+        depth (PositiveSmallIntegerField): Расстояние в поколениях (1 - родитель).
+        paths (PositiveBigIntegerField): Число различных путей родословной такой длины от предка к потомку.
+
+    Метакласс:
+        verbose_name (str): Название модели в единственном числе.
+        verbose_name_plural (str): Название модели во множественном числе.
+        constraints (list): Уникальность тройки (предок, потомок, расстояние).
+        indexes (list): Индекс выборки предков собаки.
+    """
+    ancestor = models.ForeignKey(Dog, on_delete=models.CASCADE, related_name='descendant_links',
+                                 verbose_name='ancestor')
+    descendant = models.ForeignKey(Dog, on_delete=models.CASCADE, related_name='ancestor_links',
+                                   verbose_name='descendant')
+    depth = models.PositiveSmallIntegerField(verbose_name='depth')
+    paths = models.PositiveBigIntegerField(default=1, verbose_name='paths')
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+    class Meta:
+        verbose_name = 'dog ancestry'
+        verbose_name_plural = 'dog ancestry'
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant', 'depth'], name='unique_dog_ancestry'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='dog_ancestry_descendant_idx'),
+        ]
+
+
+class DogViewMilestone(models.Model):
+    """
+    Достигнутый собакой порог просмотров. Пара (собака, порог) уникальна, поэтому каждый порог поздравляется один раз.
+
+    Атрибуты:
+        dog (ForeignKey): Собака, достигшая порога.
+        threshold (PositiveIntegerField): Порог просмотров (кратен VIEW_MILESTONE_STEP).
+        reached_at (DateTimeField): Время обнаружения порога.
+        notified_at (DateTimeField): Время отправки поздравления владельцу.
+
+    Метакласс:
+        verbose_name (str): Название модели в единственном числе.
+        verbose_name_plural (str): Название модели во множественном числе.
+        constraints (list): Уникальность порога для собаки.
+    """
+    dog = models.ForeignKey(Dog, on_delete=models.CASCADE, related_name='view_milestones', verbose_name='dog')
+    threshold = models.PositiveIntegerField(verbose_name='threshold')
+    reached_at = models.DateTimeField(auto_now_add=True, verbose_name='reached_at')
+    notified_at = models.DateTimeField(verbose_name='notified_at', **NULLABLE)
+
+    def __str__(self):
+        return f"{self.dog_id}: {self.threshold}"
+
+    class Meta:
+        verbose_name = 'view milestone'
+        verbose_name_plural = 'view milestones'
+        constraints = [
+            models.UniqueConstraint(fields=['dog', 'threshold'], name='unique_dog_view_milestone'),
+        ]
+
+
+class SearchKind(models.TextChoices):
+    """
+    Класс для выбора типа документа поискового индекса.
+    """
+    DOG = 'dog', 'dog'
+    CATEGORY = 'category', 'category'
+
+
+class SearchToken(models.Model):
+    """
+    Запись инвертированного поискового индекса: нормализованная основа слова документа и её вес.
+    Используется поиском, если полнотекстовый каталог MSSQL недоступен (dogs/search.py).
+
+    Атрибуты:
+        kind (CharField): Тип документа (собака или порода).
+        object_id (PositiveBigIntegerField): ID собаки или породы (первичные ключи моделей - BigAutoField).
+        token (CharField): Основа слова после нормализации и стемминга.
+        weight (PositiveIntegerField): Суммарный вес основы в документе.
+
+    Метакласс:
+        verbose_name (str): Название модели в единственном числе.
+        verbose_name_plural (str): Название модели во множественном числе.
+        constraints (list): Уникальность основы в документе.
+        indexes (list): Индекс поиска по префиксу основы.
+    """
+    kind = models.CharField(max_length=10, choices=SearchKind.choices, verbose_name='kind')
+    object_id = models.PositiveBigIntegerField(verbose_name='object_id')
+    token = models.CharField(max_length=50, verbose_name='token')
+    weight = models.PositiveIntegerField(default=1, verbose_name='weight')
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.token}"
+
+    class Meta:
+        verbose_name = 'search token'
+        verbose_name_plural = 'search tokens'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id', 'token'], name='unique_search_token'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'token'], name='search_token_kind_token_idx'),
+        ]
@@ -0,0 +1,128 @@
+import functools
+import hashlib
+import re
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from dogs.services import get_model_cache_version, reference_cache_call
+
+# Метка места персонального фрагмента в закешированной странице. Пользовательские данные в шаблонах
+# экранируются, поэтому подделать метку через название породы или собаки нельзя.
+FRAGMENT_MARKER = '<!--page-fragment:{}-->'
+FRAGMENT_PATTERN = re.compile(r'<!--page-fragment:([\w/.-]+)-->')
+
+
+def fragment_marker(template_name):
+    """
+    Метка фрагмента для закешированной страницы.
+
+    Аргументы:
+        template_name (str): Шаблон фрагмента.
+
+    Возвращает:
+        str: Метка, которую stitch_fragments заменит на фрагмент текущего пользователя.
+    """
+    return mark_safe(FRAGMENT_MARKER.format(template_name))
+
+
+def render_fragment(context, template_name):
+    """
+    Вывод персонального фрагмента: при рендере страницы для кеша - метка, иначе - сам фрагмент.
+
+    Аргументы:
+        context (Context): Контекст шаблона страницы.
+        template_name (str): Шаблон фрагмента.
+
+    Возвращает:
+        str: Метка или HTML фрагмента.
+    """
+    request = context.get('request')
+    if getattr(request, 'page_cache_render', False):
+        return fragment_marker(template_name)
+    return render_to_string(template_name, context.flatten(), request)
+
+
+def stitch_fragments(content, request):
+    """
+    Замена меток в закешированной странице на фрагменты, отрендеренные для текущего запроса
+    (меню пользователя, CSRF-токен формы выхода).
+
+    Аргументы:
+        content (str): HTML страницы из кеша.
+        request (HttpRequest): Текущий запрос.
+
+    Возвращает:
+        str: Готовый HTML страницы.
+    """
+    fragments = {}
+
+    def replace(match):
+        template_name = match.group(1)
+        if template_name not in fragments:
+            fragments[template_name] = render_to_string(template_name, request=request)
+        return fragments[template_name]
+
+    return FRAGMENT_PATTERN.sub(replace, content)
+
+
+def page_cache_key(request, models):
+    """
+    Ключ страницы: путь с параметрами и версии кеша моделей, от которых зависит страница.
+    Сигналы моделей меняют версию, и страница перестраивается при следующем запросе.
+
+    Аргументы:
+        request (HttpRequest): Запрос.
+        models (tuple): Модели страницы.
+
+    Возвращает:
+        str: Ключ кеша.
+    """
+    versions = '.'.join(str(get_model_cache_version(model)) for model in models)
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{path}:{versions}'
+
+
+def page_cache(*models):
+    """
+    Декоратор представления: общая для всех пользователей часть страницы кешируется один раз,
+    а персональные фрагменты ({% page_fragment %}) подставляются при каждом ответе.
+    Для классов вешается на get через method_decorator, чтобы проверки доступа в dispatch выполнялись до кеша.
+
+    Аргументы:
+        *models (Model): Модели, версии кеша которых входят в ключ (сбрасываются сигналами в dogs.signals).
+
+    Возвращает:
+        function: Декоратор.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key = page_cache_key(request, models)
+            cached = reference_cache_call('get', key)
+            if cached is None:
+                request.page_cache_render = True
+                try:
+                    response = view(request, *args, **kwargs)
+                    if hasattr(response, 'render'):
+                        response.render()
+                finally:
+                    request.page_cache_render = False
+                if response.status_code != 200 or response.streaming:
+                    return response
+                content = response.content.decode(response.charset)
+                # Ответ с cookie (например, сообщениями) персональный и в кеш не попадает
+                if not response.cookies:
+                    reference_cache_call('set', key, (content, response['Content-Type']), settings.PAGE_CACHE_TIMEOUT)
+                response.content = stitch_fragments(content, request)
+                return response
+            content, content_type = cached
+            return HttpResponse(stitch_fragments(content, request), content_type=content_type)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,370 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+class CursorPage:
+    """
+    Страница курсорной пагинации. Вместо номера страницы хранит курсоры соседних страниц.
+
+    Атрибуты:
+        object_list (list): Объекты страницы.
+        next_cursor (str | None): Курсор следующей страницы.
+        previous_cursor (str | None): Курсор предыдущей страницы.
+        next_url (str | None): Строка запроса следующей страницы.
+        previous_url (str | None): Строка запроса предыдущей страницы.
+        is_cursor (bool): Признак курсорной страницы для шаблона пагинации.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.next_url = None
+        self.previous_url = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def get_cursor_fields(model, ordering):
+    """
+    Разбор сортировки курсора на поля модели и направления.
+
+    Аргументы:
+        model (Model): Класс модели.
+        ordering (list): Сортировка, например ['-timestamp', '-id']. Последнее поле должно быть первичным ключом.
+
+    Возвращает:
+        list: Пары (поле модели, по убыванию).
+
+    Исключения:
+        ImproperlyConfigured: Если сортировка не заканчивается первичным ключом.
+    """
+    fields = []
+    for name in ordering:
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+        field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        fields.append((field, descending))
+    if not fields or not fields[-1][0].primary_key:
+        raise ImproperlyConfigured(f'Сортировка курсора {ordering} должна заканчиваться первичным ключом')
+    return fields
+
+
+def cursor_value(value):
+    """
+    Преобразование значения поля сортировки для JSON. Даты сохраняются с микросекундами,
+    иначе курсор не совпадёт со значением в базе.
+
+    Аргументы:
+        value (object): Значение поля.
+
+    Возвращает:
+        str: Строковое представление значения.
+    """
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values):
+    """
+    Кодирование значений ключа сортировки в непрозрачный курсор.
+
+    Аргументы:
+        values (list): Значения полей сортировки строки.
+
+    Возвращает:
+        str: Курсор в base64 без выравнивания.
+    """
+    data = json.dumps(values, default=cursor_value, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """
+    Разбор курсора в значения полей сортировки.
+
+    Аргументы:
+        cursor (str): Курсор из строки запроса.
+        fields (list): Пары (поле модели, по убыванию).
+
+    Возвращает:
+        list: Значения полей сортировки.
+
+    Исключения:
+        Http404: Если курсор повреждён.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [field.to_python(value) for (field, descending), value in zip(fields, values)]
+    except (ValueError, TypeError, binascii.Error, ValidationError):
+        raise Http404('Неверный курсор страницы')
+
+
+def row_values(row, fields):
+    """
+    Значения полей сортировки строки: объекта модели или словаря из values().
+
+    Аргументы:
+        row (Model | dict): Строка страницы.
+        fields (list): Пары (поле модели, по убыванию).
+
+    Возвращает:
+        list: Значения полей сортировки.
+    """
+    if isinstance(row, dict):
+        return [row[field.attname] if field.attname in row else row['pk'] for field, descending in fields]
+    return [getattr(row, field.attname) for field, descending in fields]
+
+
+def cursor_filter(fields, values, backwards):
+    """
+    Условие «строго после курсора» для составного ключа сортировки:
+    (a < x) OR (a = x AND b < y) OR ... с учётом направления каждого поля.
+
+    Аргументы:
+        fields (list): Пары (поле модели, по убыванию).
+        values (list): Значения полей курсора.
+        backwards (bool): Выбор строк перед курсором.
+
+    Возвращает:
+        Q: Условие фильтрации.
+    """
+    condition = Q()
+    for position, (field, descending) in enumerate(fields):
+        lookup = 'lt' if descending != backwards else 'gt'
+        equal = {prev.attname: value for (prev, _), value in zip(fields[:position], values[:position])}
+        condition |= Q(**equal, **{f'{field.attname}__{lookup}': values[position]})
+    return condition
+
+
+def cursor_queryset(queryset, ordering, page_size, after=None, before=None):
+    """
+    Запрос страницы по курсору: сортировка, условие «после курсора» и срез на page_size + 1 строк.
+
+    Аргументы:
+        queryset (QuerySet): Строки для пагинации.
+        ordering (list): Сортировка, заканчивающаяся первичным ключом.
+        page_size (int): Количество строк на странице.
+        after (str | None): Курсор строки, после которой начинается страница.
+        before (str | None): Курсор строки, перед которой заканчивается страница.
+
+    Возвращает:
+        QuerySet: Срез строк страницы с одной лишней строкой для признака следующей страницы.
+    """
+    fields = get_cursor_fields(queryset.model, ordering)
+    backwards = bool(before)
+    cursor = before if backwards else after
+    if backwards:
+        ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(cursor_filter(fields, decode_cursor(cursor, fields), backwards))
+    return queryset[:page_size + 1]
+
+
+def cursor_page(rows, fields, page_size, after=None, before=None):
+    """
+    Страница из прочитанных строк запроса cursor_queryset.
+
+    Аргументы:
+        rows (list): Строки запроса (page_size + 1 или меньше).
+        fields (list): Пары (поле модели, по убыванию).
+        page_size (int): Количество строк на странице.
+        after (str | None): Курсор запроса.
+        before (str | None): Курсор запроса.
+
+    Возвращает:
+        CursorPage: Страница со строками и курсорами соседних страниц.
+    """
+    backwards = bool(before)
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+    first = encode_cursor(row_values(rows[0], fields)) if rows else None
+    last = encode_cursor(row_values(rows[-1], fields)) if rows else None
+    if backwards:
+        return CursorPage(rows, last or before, first if has_more else None)
+    return CursorPage(rows, last if has_more else None, first if after else None)
+
+
+def cursor_paginate(queryset, ordering, page_size, after=None, before=None):
+    """
+    Выбор страницы по курсору. Страница читается одним запросом на page_size + 1 строк без COUNT,
+    поэтому время выборки не зависит от глубины страницы при индексе по ключу сортировки.
+
+    Аргументы:
+        queryset (QuerySet): Строки для пагинации.
+        ordering (list): Сортировка, заканчивающаяся первичным ключом.
+        page_size (int): Количество строк на странице.
+        after (str | None): Курсор строки, после которой начинается страница.
+        before (str | None): Курсор строки, перед которой заканчивается страница.
+
+    Возвращает:
+        CursorPage: Страница со строками и курсорами соседних страниц.
+    """
+    rows = list(cursor_queryset(queryset, ordering, page_size, after, before))
+    return cursor_page(rows, get_cursor_fields(queryset.model, ordering), page_size, after, before)
+
+
+async def acursor_paginate(queryset, ordering, page_size, after=None, before=None):
+    """
+    Асинхронный вариант cursor_paginate: строки читаются асинхронным ORM.
+
+    Возвращает:
+        CursorPage: Страница со строками и курсорами соседних страниц.
+    """
+    rows = [row async for row in cursor_queryset(queryset, ordering, page_size, after, before)]
+    return cursor_page(rows, get_cursor_fields(queryset.model, ordering), page_size, after, before)
+
+
+class CursorPaginationMixin:
+    """
+    Миксин курсорной пагинации для ListView. Страницы адресуются непрозрачными курсорами ?after= и ?before=
+    по ключу (поле сортировки, pk) вместо номера страницы: нет COUNT(*) и OFFSET, глубокие страницы
+    читаются так же быстро, как первая. В шаблоне используется dogs/includes/inc_cursor_pagination.html.
+
+    Атрибуты:
+        cursor_ordering (list | None): Сортировка курсора. По умолчанию сортировка представления или модели.
+
+    Методы:
+        get_cursor_ordering(self): Получение сортировки курсора.
+        get_page_queryset(self, queryset): QuerySet, из которого читаются строки страницы.
+        get_page_objects(self, rows): Преобразование строк страницы в объекты для шаблона.
+        paginate_queryset(self, queryset, page_size): Курсорная пагинация.
+        apaginate_queryset(self, queryset, page_size): Курсорная пагинация асинхронным ORM.
+    """
+    cursor_ordering = None
+
+    def get_cursor_ordering(self):
+        """
+        Получение сортировки курсора.
+
+        Возвращает:
+            list: Сортировка, заканчивающаяся первичным ключом.
+        """
+        return list(self.cursor_ordering or self.get_ordering() or self.model._meta.ordering)
+
+    def get_page_queryset(self, queryset):
+        """
+        QuerySet, из которого читаются строки страницы.
+
+        Аргументы:
+            queryset (QuerySet): Строки списка.
+
+        Возвращает:
+            QuerySet: Строки списка.
+        """
+        return queryset
+
+    def get_page_objects(self, rows):
+        """
+        Преобразование строк страницы в объекты для шаблона.
+
+        Аргументы:
+            rows (list): Строки страницы.
+
+        Возвращает:
+            list: Объекты страницы.
+        """
+        return rows
+
+    def page_url(self, name, cursor):
+        """
+        Строка запроса соседней страницы с сохранением остальных параметров (например, q).
+
+        Аргументы:
+            name (str): Параметр курсора: after или before.
+            cursor (str): Курсор.
+
+        Возвращает:
+            str: Строка запроса.
+        """
+        query = self.request.GET.copy()
+        for key in ('after', 'before', 'page'):
+            query.pop(key, None)
+        query[name] = cursor
+        return f'?{query.urlencode()}'
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Курсорная пагинация.
+
+        Аргументы:
+            queryset (QuerySet): Строки списка.
+            page_size (int): Количество строк на странице.
+
+        Возвращает:
+            tuple: Пагинатор (None), страница, объекты страницы и признак пагинации.
+        """
+        page = cursor_paginate(
+            self.get_page_queryset(queryset), self.get_cursor_ordering(), page_size,
+            after=self.request.GET.get('after'), before=self.request.GET.get('before'),
+        )
+        page.object_list = self.get_page_objects(page.object_list)
+        return self.link_page(page)
+
+    async def aget_page_objects(self, rows):
+        """
+        Асинхронный вариант get_page_objects.
+
+        Аргументы:
+            rows (list): Строки страницы.
+
+        Возвращает:
+            list: Объекты страницы.
+        """
+        return self.get_page_objects(rows)
+
+    async def apaginate_queryset(self, queryset, page_size):
+        """
+        Асинхронный вариант paginate_queryset для AsyncListView.
+
+        Возвращает:
+            tuple: Пагинатор (None), страница, объекты страницы и признак пагинации.
+        """
+        page = await acursor_paginate(
+            self.get_page_queryset(queryset), self.get_cursor_ordering(), page_size,
+            after=self.request.GET.get('after'), before=self.request.GET.get('before'),
+        )
+        page.object_list = await self.aget_page_objects(page.object_list)
+        return self.link_page(page)
+
+    def link_page(self, page):
+        """
+        Ссылки на соседние страницы.
+
+        Аргументы:
+            page (CursorPage): Страница.
+
+        Возвращает:
+            tuple: Пагинатор (None), страница, объекты страницы и признак пагинации.
+        """
+        if page.has_next():
+            page.next_url = self.page_url('after', page.next_cursor)
+        if page.has_previous():
+            page.previous_url = self.page_url('before', page.previous_cursor)
+        return None, page, page.object_list, page.has_other_pages()
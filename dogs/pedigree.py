@@ -0,0 +1,297 @@
+from collections import defaultdict, deque
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+
+from dogs.models import Dog, DogAncestry, Parent
+
+# Сколько ID передаётся в одном IN: SQL Server принимает не больше 2100 параметров на запрос
+ID_CHUNK = 1000
+
+
+def chunks(items, size=ID_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def update_ancestry(added=(), removed=()):
+    """
+    Перенос изменений рёбер родословной в таблицу замыкания DogAncestry.
+    Каждое ребро стоит нескольких запросов независимо от глубины родословной:
+    предки родителя, потомки собаки, существующие строки и пакетная запись.
+
+    Аргументы:
+        added (iterable): Новые рёбра (ID собаки-родителя, ID собаки).
+        removed (iterable): Удалённые рёбра в том же виде; применяются до новых.
+
+    Исключения:
+        ValidationError: Если новое ребро делает собаку собственным предком.
+    """
+    with transaction.atomic():
+        for edges, sign in ((removed, -1), (added, 1)):
+            for parent_id, child_id in edges:
+                apply_edge(parent_id, child_id, sign)
+
+
+def apply_edge(parent_id, child_id, sign):
+    """
+    Добавление (sign=1) или удаление (sign=-1) одного ребра: пути от каждого предка родителя (и самого родителя)
+    к каждому потомку собаки (и самой собаке) удлиняются на это ребро.
+    """
+    ancestors = [(parent_id, 0, 1), *DogAncestry.objects.filter(descendant_id=parent_id).values_list(
+        'ancestor_id', 'depth', 'paths')]
+    if sign > 0 and any(ancestor_id == child_id for ancestor_id, _, _ in ancestors):
+        raise ValidationError('Собака не может быть собственным предком')
+    descendants = [(child_id, 0, 1), *DogAncestry.objects.filter(ancestor_id=child_id).values_list(
+        'descendant_id', 'depth', 'paths')]
+
+    deltas = defaultdict(int)
+    for ancestor_id, ancestor_depth, ancestor_paths in ancestors:
+        for descendant_id, descendant_depth, descendant_paths in descendants:
+            key = (ancestor_id, descendant_id, ancestor_depth + descendant_depth + 1)
+            deltas[key] += sign * ancestor_paths * descendant_paths
+    apply_deltas(deltas)
+
+
+def apply_deltas(deltas):
+    """
+    Изменение числа путей в DogAncestry: новые строки создаются одним bulk_create, существующие
+    обновляются одним UPDATE на каждое значение приращения, строки без путей удаляются.
+    Отсутствующие строки при уменьшении пропускаются: их уже удалило каскадное удаление собаки.
+
+    Аргументы:
+        deltas (dict): Словарь {(ID предка, ID потомка, расстояние): приращение числа путей}.
+    """
+    ancestor_ids = sorted({key[0] for key in deltas})
+    descendant_ids = sorted({key[1] for key in deltas})
+    existing = {}
+    for ancestor_chunk in chunks(ancestor_ids):
+        for descendant_chunk in chunks(descendant_ids):
+            rows = DogAncestry.objects.filter(ancestor_id__in=ancestor_chunk, descendant_id__in=descendant_chunk)
+            for pk, *key in rows.values_list('pk', 'ancestor_id', 'descendant_id', 'depth'):
+                existing[tuple(key)] = pk
+
+    created = []
+    updated = defaultdict(list)
+    for key, delta in deltas.items():
+        if key in existing:
+            updated[delta].append(existing[key])
+        elif delta > 0:
+            created.append(DogAncestry(ancestor_id=key[0], descendant_id=key[1], depth=key[2], paths=delta))
+    DogAncestry.objects.bulk_create(created)
+    for delta, pks in updated.items():
+        for chunk in chunks(pks):
+            DogAncestry.objects.filter(pk__in=chunk).update(paths=F('paths') + delta)
+            if delta < 0:
+                DogAncestry.objects.filter(pk__in=chunk, paths=0).delete()
+
+
+def rebuild_ancestry():
+    """
+    Полное перестроение DogAncestry по всем рёбрам Parent (после загрузки фикстур или массового импорта).
+    Собаки обходятся в топологическом порядке: замыкание собаки собирается из замыканий её родителей.
+
+    Возвращает:
+        tuple: Число строк замыкания и число собак, пропущенных из-за цикла в данных.
+    """
+    parents = defaultdict(list)
+    children = defaultdict(list)
+    for child_id, parent_id in Parent.objects.filter(parent_dog__isnull=False).values_list('dog_id', 'parent_dog_id'):
+        parents[child_id].append(parent_id)
+        children[parent_id].append(child_id)
+
+    waiting = {dog_id: len(dog_parents) for dog_id, dog_parents in parents.items()}
+    queue = deque(dog_id for dog_id in children if dog_id not in waiting)
+    closures = {}
+    rows = 0
+    with transaction.atomic():
+        DogAncestry.objects.all().delete()
+        batch = []
+        while queue:
+            dog_id = queue.popleft()
+            closure = defaultdict(int)
+            for parent_id in parents.get(dog_id, ()):
+                closure[(parent_id, 1)] += 1
+                for (ancestor_id, depth), paths in closures.get(parent_id, {}).items():
+                    closure[(ancestor_id, depth + 1)] += paths
+            closures[dog_id] = closure
+            batch += [DogAncestry(ancestor_id=ancestor_id, descendant_id=dog_id, depth=depth, paths=paths)
+                      for (ancestor_id, depth), paths in closure.items()]
+            for child_id in children.get(dog_id, ()):
+                waiting[child_id] -= 1
+                if not waiting[child_id]:
+                    queue.append(child_id)
+            if len(batch) >= 5000:
+                DogAncestry.objects.bulk_create(batch)
+                rows += len(batch)
+                batch = []
+        DogAncestry.objects.bulk_create(batch)
+        rows += len(batch)
+    return rows, sum(1 for count in waiting.values() if count)
+
+
+def ancestors(dog_id, max_depth=None):
+    """
+    Предки собаки до глубины max_depth одним запросом.
+
+    Аргументы:
+        dog_id (int): ID собаки.
+        max_depth (int): Наибольшее расстояние в поколениях или None для всех предков.
+
+    Возвращает:
+        QuerySet: Собаки с аннотацией generation (ближайшее расстояние), по возрастанию расстояния.
+    """
+    links = Q(descendant_links__descendant_id=dog_id)
+    if max_depth is not None:
+        links &= Q(descendant_links__depth__lte=max_depth)
+    return Dog.objects.filter(links).annotate(generation=Min('descendant_links__depth')).order_by('generation', 'pk')
+
+
+def descendants(dog_id, max_depth=None):
+    """
+    Потомки собаки до глубины max_depth одним запросом.
+
+    Аргументы:
+        dog_id (int): ID собаки.
+        max_depth (int): Наибольшее расстояние в поколениях или None для всех потомков.
+
+    Возвращает:
+        QuerySet: Собаки с аннотацией generation (ближайшее расстояние), по возрастанию расстояния.
+    """
+    links = Q(ancestor_links__ancestor_id=dog_id)
+    if max_depth is not None:
+        links &= Q(ancestor_links__depth__lte=max_depth)
+    return Dog.objects.filter(links).annotate(generation=Min('ancestor_links__depth')).order_by('generation', 'pk')
+
+
+def common_ancestors(dog_id, other_id, max_depth=None):
+    """
+    Общие предки двух собак одним запросом, ближайшие первыми.
+
+    Аргументы:
+        dog_id (int): ID первой собаки.
+        other_id (int): ID второй собаки.
+        max_depth (int): Наибольшее расстояние от каждой собаки или None.
+
+    Возвращает:
+        QuerySet: Собаки с аннотациями depth (до первой собаки) и other_depth (до второй).
+    """
+    links = Q(descendant_links__descendant_id__in=[dog_id, other_id])
+    if max_depth is not None:
+        links &= Q(descendant_links__depth__lte=max_depth)
+    return Dog.objects.filter(links).annotate(
+        relatives=Count('descendant_links__descendant_id', distinct=True),
+        depth=Min('descendant_links__depth', filter=Q(descendant_links__descendant_id=dog_id)),
+        other_depth=Min('descendant_links__depth', filter=Q(descendant_links__descendant_id=other_id)),
+    ).filter(relatives=2).order_by(F('depth') + F('other_depth'), 'pk')
+
+
+class Pedigree:
+    """
+    Родословная в памяти для расчёта коэффициентов родства табличным методом.
+    Учитываются первые два родителя-собаки каждой собаки; неизвестный родитель считается неродственным.
+
+    Атрибуты:
+        parents (dict): Словарь {ID собаки: список ID родителей}.
+
+    Методы:
+        kinship(self, dog_id, other_id): Коэффициент родства (коанцестрии) двух собак.
+        inbreeding(self, dog_id): Коэффициент инбридинга собаки.
+    """
+
+    def __init__(self, edges):
+        self.parents = defaultdict(list)
+        for dog_id, parent_id in edges:
+            if len(self.parents[dog_id]) < 2:
+                self.parents[dog_id].append(parent_id)
+        self.generations = {}
+        self.lineages = {}
+        self.kinships = {}
+
+    def generation(self, dog_id):
+        """
+        Номер поколения: 0 у собаки без известных родителей. Предок всегда старше потомка.
+        """
+        if dog_id not in self.generations:
+            self.generations[dog_id] = 1 + max((self.generation(p) for p in self.parents.get(dog_id, ())), default=-1)
+        return self.generations[dog_id]
+
+    def lineage(self, dog_id):
+        """
+        Собака и все её известные предки.
+        """
+        if dog_id not in self.lineages:
+            lineage = {dog_id}
+            for parent_id in self.parents.get(dog_id, ()):
+                lineage |= self.lineage(parent_id)
+            self.lineages[dog_id] = lineage
+        return self.lineages[dog_id]
+
+    def inbreeding(self, dog_id):
+        parents = self.parents.get(dog_id, ())
+        return self.kinship(*parents) if len(parents) == 2 else 0.0
+
+    def kinship(self, dog_id, other_id):
+        if dog_id == other_id:
+            return 0.5 * (1 + self.inbreeding(dog_id))
+        key = (dog_id, other_id) if dog_id < other_id else (other_id, dog_id)
+        if key not in self.kinships:
+            if self.lineage(dog_id).isdisjoint(self.lineage(other_id)):
+                value = 0.0
+            else:
+                # Раскрывается младшая собака: она не может быть предком второй
+                if self.generation(dog_id) < self.generation(other_id):
+                    dog_id, other_id = other_id, dog_id
+                value = sum(0.5 * self.kinship(parent_id, other_id) for parent_id in self.parents.get(dog_id, ()))
+            self.kinships[key] = value
+        return self.kinships[key]
+
+
+def load_pedigree(dog_ids, max_depth=None):
+    """
+    Рёбра родословной собак и всех их предков одним запросом.
+
+    Аргументы:
+        dog_ids (list): ID собак.
+        max_depth (int): Сколько поколений предков учитывать или None для всех.
+
+    Возвращает:
+        Pedigree: Родословная в памяти.
+    """
+    links = DogAncestry.objects.filter(descendant_id__in=dog_ids)
+    if max_depth is not None:
+        links = links.filter(depth__lt=max_depth)
+    edges = Parent.objects.filter(parent_dog__isnull=False).filter(
+        Q(dog_id__in=dog_ids) | Q(dog_id__in=links.values('ancestor_id'))
+    ).order_by('pk').values_list('dog_id', 'parent_dog_id')
+    return Pedigree(edges)
+
+
+def kinship(dog_id, other_id, max_depth=None):
+    """
+    Коэффициент родства двух собак: равен коэффициенту инбридинга их возможного потомка.
+
+    Аргументы:
+        dog_id (int): ID первой собаки.
+        other_id (int): ID второй собаки.
+        max_depth (int): Сколько поколений предков учитывать или None для всех.
+
+    Возвращает:
+        float: Коэффициент от 0 до 1.
+    """
+    return load_pedigree([dog_id, other_id], max_depth).kinship(dog_id, other_id)
+
+
+def inbreeding_coefficient(dog_id, max_depth=None):
+    """
+    Коэффициент инбридинга собаки (по Райту) одним запросом к базе.
+
+    Аргументы:
+        dog_id (int): ID собаки.
+        max_depth (int): Сколько поколений предков учитывать или None для всех.
+
+    Возвращает:
+        float: Коэффициент от 0 до 1; 0, если известно меньше двух родителей.
+    """
+    return load_pedigree([dog_id], max_depth).inbreeding(dog_id)
@@ -0,0 +1,398 @@
+import functools
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.expressions import RawSQL
+
+from dogs.models import Category, Dog, SearchKind, SearchToken
+from reviews.models import Review
+
+WORD_RE = re.compile(r'\w+')
+VOWELS = 'аеиоуыэюя'
+
+# Окончания облегчённого стеммера Портера (Snowball) для русского языка.
+# Во вторых группах окончание снимается, только если перед ним стоит «а» или «я».
+PERFECTIVE_GERUND = (('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв'), ('вшись', 'вши', 'в'))
+REFLEXIVE = (('ся', 'сь'), ())
+ADJECTIVE = ((
+    'ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+    'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею',
+), ())
+PARTICIPLE = (('ивш', 'ывш', 'ующ'), ('ем', 'нн', 'вш', 'ющ', 'щ'))
+VERB = ((
+    'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло',
+    'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+), ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'ешь', 'нно'))
+NOUN = ((
+    'иями', 'ями', 'иям', 'ием', 'иях', 'ами', 'ям', 'ем', 'ам', 'ом', 'ах', 'ях', 'ев', 'ов', 'ие', 'ье', 'еи', 'ии',
+    'ей', 'ой', 'ий', 'ию', 'ью', 'ия', 'ья', 'а', 'е', 'и', 'й', 'о', 'у', 'ы', 'ь', 'ю', 'я',
+), ())
+SUPERLATIVE = (('ейше', 'ейш'), ())
+DERIVATIONAL = (('ость', 'ост'), ())
+
+# Веса полей документов поискового индекса
+DOG_NAME_WEIGHT = 5
+CATEGORY_NAME_WEIGHT = 3
+REVIEW_TITLE_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+
+def strip_ending(word, endings):
+    """
+    Снятие самого длинного подходящего окончания.
+
+    Аргументы:
+        word (str): Слово или его часть.
+        endings (tuple): Пара групп окончаний: снимаемые всегда и снимаемые после «а»/«я».
+
+    Возвращает:
+        str | None: Слово без окончания или None, если окончание не найдено.
+    """
+    always, after_a = endings
+    for ending in sorted(always + after_a, key=len, reverse=True):
+        if word.endswith(ending):
+            if ending in always:
+                return word[:-len(ending)]
+            if word[:-len(ending)].endswith(('а', 'я')):
+                return word[:-len(ending)]
+    return None
+
+
+def region_after_vowel(word):
+    """
+    Позиция после первой гласной, за которой следует согласная (R1 по Snowball), или длина слова.
+
+    Аргументы:
+        word (str): Слово.
+
+    Возвращает:
+        int: Позиция начала области.
+    """
+    for position in range(1, len(word)):
+        if word[position - 1] in VOWELS and word[position] not in VOWELS:
+            return position + 1
+    return len(word)
+
+
+def stem(word):
+    """
+    Основа русского слова по облегчённому алгоритму Snowball. Слова без кириллицы не изменяются.
+
+    Аргументы:
+        word (str): Нормализованное слово.
+
+    Возвращает:
+        str: Основа слова.
+    """
+    start = next((position + 1 for position, char in enumerate(word) if char in VOWELS), None)
+    if start is None:
+        return word
+    prefix, rv = word[:start], word[start:]
+
+    result = strip_ending(rv, PERFECTIVE_GERUND)
+    if result is None:
+        reflexive = strip_ending(rv, REFLEXIVE)
+        if reflexive is not None:
+            rv = reflexive
+        result = strip_ending(rv, ADJECTIVE)
+        if result is not None:
+            result = strip_ending(result, PARTICIPLE) or result
+        else:
+            result = strip_ending(rv, VERB)
+            if result is None:
+                result = strip_ending(rv, NOUN)
+                if result is None:
+                    result = rv
+    rv = result[:-1] if result.endswith('и') else result
+
+    r1 = region_after_vowel(word)
+    r2 = r1 + region_after_vowel(word[r1:])
+    for ending in DERIVATIONAL[0]:
+        if rv.endswith(ending) and len(prefix) + len(rv) - len(ending) >= r2:
+            rv = rv[:-len(ending)]
+            break
+
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    else:
+        superlative = strip_ending(rv, SUPERLATIVE)
+        if superlative is not None:
+            rv = superlative[:-1] if superlative.endswith('нн') else superlative
+        elif rv.endswith('ь'):
+            rv = rv[:-1]
+    return prefix + rv
+
+
+def normalize(text):
+    """
+    Разбиение текста на основы слов: регистр, «ё» → «е», стемминг, обрезка до длины поля индекса.
+
+    Аргументы:
+        text (str): Текст документа или поисковый запрос.
+
+    Возвращает:
+        list: Основы слов в порядке появления.
+    """
+    text = (text or '').casefold().replace('ё', 'е')
+    return [stem(word)[:50] for word in WORD_RE.findall(text) if len(word) > 1 or word.isdigit()]
+
+
+def weigh(counter, text, weight):
+    """
+    Добавление основ текста в документ с весом поля.
+
+    Аргументы:
+        counter (Counter): Основы документа и их веса.
+        text (str): Текст поля.
+        weight (int): Вес поля.
+    """
+    for token in normalize(text):
+        counter[token] += weight
+
+
+def dog_documents(pks):
+    """
+    Документы поискового индекса собак: кличка, порода и тексты активных отзывов.
+
+    Аргументы:
+        pks (Iterable): ID собак.
+
+    Возвращает:
+        dict: Основы и веса документа каждой собаки.
+    """
+    documents = {}
+    for pk, name, category_name in Dog.objects.filter(pk__in=pks).values_list('pk', 'name', 'category__name'):
+        documents[pk] = Counter()
+        weigh(documents[pk], name, DOG_NAME_WEIGHT)
+        weigh(documents[pk], category_name, CATEGORY_NAME_WEIGHT)
+    reviews = Review.objects.filter(dog_id__in=documents, sign_of_review=True).values_list('dog_id', 'title', 'content')
+    for dog_id, title, content in reviews:
+        weigh(documents[dog_id], title, REVIEW_TITLE_WEIGHT)
+        weigh(documents[dog_id], content, TEXT_WEIGHT)
+    return documents
+
+
+def category_documents(pks):
+    """
+    Документы поискового индекса пород: название и описание.
+
+    Аргументы:
+        pks (Iterable): ID пород.
+
+    Возвращает:
+        dict: Основы и веса документа каждой породы.
+    """
+    documents = {}
+    for pk, name, description in Category.objects.filter(pk__in=pks).values_list('pk', 'name', 'description'):
+        documents[pk] = Counter()
+        weigh(documents[pk], name, CATEGORY_NAME_WEIGHT)
+        weigh(documents[pk], description, TEXT_WEIGHT)
+    return documents
+
+
+DOCUMENT_BUILDERS = {
+    SearchKind.DOG: dog_documents,
+    SearchKind.CATEGORY: category_documents,
+}
+
+
+def index_objects(kind, pks, batch_size=500):
+    """
+    Переиндексация документов: старые основы удаляются, новые вставляются одним bulk_create.
+    Удалённые объекты просто удаляются из индекса.
+
+    Аргументы:
+        kind (SearchKind): Тип документа.
+        pks (Iterable): ID объектов.
+        batch_size (int): Размер пачки bulk_create.
+
+    Возвращает:
+        int: Количество записанных основ.
+    """
+    pks = list(pks)
+    if not pks:
+        return 0
+    documents = DOCUMENT_BUILDERS[kind](pks)
+    with transaction.atomic():
+        SearchToken.objects.filter(kind=kind, object_id__in=pks).delete()
+        tokens = SearchToken.objects.bulk_create([
+            SearchToken(kind=kind, object_id=pk, token=token, weight=weight)
+            for pk, document in documents.items()
+            for token, weight in document.items()
+        ], batch_size=batch_size)
+    return len(tokens)
+
+
+def token_index_enabled():
+    """
+    Нужно ли поддерживать инвертированный индекс сигналами.
+
+    Возвращает:
+        bool: True, если поиск идёт по индексу SearchToken.
+    """
+    return isinstance(get_search_backend(), TokenSearchBackend)
+
+
+class TokenSearchBackend:
+    """
+    Поиск по инвертированному индексу SearchToken. Каждое слово запроса ищется как префикс основы
+    (LIKE 'основа%' по индексу (kind, token)), документ должен содержать все слова запроса,
+    ранг равен сумме весов найденных основ.
+
+    Методы:
+        search(self, queryset, kind, query): Отбор и ранжирование документов.
+    """
+
+    def search(self, queryset, kind, query):
+        """
+        Отбор и ранжирование документов.
+
+        Аргументы:
+            queryset (QuerySet): Собаки или породы, среди которых идёт поиск.
+            kind (SearchKind): Тип документа.
+            query (str): Поисковый запрос.
+
+        Возвращает:
+            QuerySet: Найденные объекты с полем search_rank, отсортированные по рангу.
+        """
+        terms = list(dict.fromkeys(normalize(query)))
+        if not terms:
+            return queryset.none()
+        matches = SearchToken.objects.filter(kind=kind).filter(
+            functools.reduce(lambda condition, term: condition | Q(token__startswith=term), terms, Q())
+        )
+        ranks = matches.values('object_id').annotate(
+            rank=Sum('weight'),
+            **{
+                f'term_{position}': Max(Case(When(token__startswith=term, then=Value(1)), default=Value(0)))
+                for position, term in enumerate(terms)
+            },
+        ).filter(**{f'term_{position}': 1 for position in range(len(terms))})
+        return queryset.filter(pk__in=ranks.values('object_id')).annotate(
+            search_rank=Subquery(ranks.filter(object_id=OuterRef('pk')).values('rank')[:1]),
+        ).order_by('-search_rank', 'pk')
+
+
+class FullTextSearchBackend:
+    """
+    Поиск по полнотекстовому каталогу MSSQL (CONTAINSTABLE) с русской морфологией (LANGUAGE 1049).
+    Ранг собаки складывается из рангов клички, породы и активных отзывов о ней.
+
+    Методы:
+        search(self, queryset, kind, query): Отбор и ранжирование документов.
+    """
+
+    def contains_query(self, query):
+        """
+        Условие CONTAINSTABLE: все слова запроса в любой словоформе или как префикс.
+
+        Аргументы:
+            query (str): Поисковый запрос.
+
+        Возвращает:
+            str | None: Условие поиска или None для пустого запроса.
+        """
+        words = list(dict.fromkeys(WORD_RE.findall((query or '').casefold().replace('ё', 'е'))))
+        if not words:
+            return None
+        return ' AND '.join(f'(FORMSOF(INFLECTIONAL, "{word}") OR "{word}*")' for word in words)
+
+    def search(self, queryset, kind, query):
+        """
+        Отбор и ранжирование документов.
+
+        Аргументы:
+            queryset (QuerySet): Собаки или породы, среди которых идёт поиск.
+            kind (SearchKind): Тип документа.
+            query (str): Поисковый запрос.
+
+        Возвращает:
+            QuerySet: Найденные объекты с полем search_rank, отсортированные по рангу.
+        """
+        condition = self.contains_query(query)
+        if condition is None:
+            return queryset.none()
+        if kind == SearchKind.CATEGORY:
+            rank = RawSQL(
+                'SELECT ft.[RANK] FROM CONTAINSTABLE(dogs_category, (name, description), %s, LANGUAGE 1049) ft '
+                'WHERE ft.[KEY] = dogs_category.id',
+                (condition,), output_field=IntegerField(),
+            )
+        else:
+            rank = RawSQL(
+                f'SELECT SUM(ranks.[RANK] * ranks.weight) FROM ('
+                f'SELECT ft.[RANK], {DOG_NAME_WEIGHT} AS weight FROM CONTAINSTABLE(dogs_dog, name, %s, LANGUAGE 1049) ft '
+                f'WHERE ft.[KEY] = dogs_dog.id '
+                f'UNION ALL SELECT ft.[RANK], {CATEGORY_NAME_WEIGHT} FROM CONTAINSTABLE(dogs_category, name, %s, LANGUAGE 1049) ft '
+                f'WHERE ft.[KEY] = dogs_dog.category_id '
+                f'UNION ALL SELECT ft.[RANK], {TEXT_WEIGHT} FROM CONTAINSTABLE(reviews_review, (title, content), %s, LANGUAGE 1049) ft '
+                f'JOIN reviews_review r ON r.id = ft.[KEY] WHERE r.dog_id = dogs_dog.id AND r.sign_of_review = 1'
+                f') ranks',
+                (condition, condition, condition), output_field=IntegerField(),
+            )
+        return queryset.annotate(search_rank=rank).filter(search_rank__gt=0).order_by('-search_rank', 'pk')
+
+
+@functools.cache
+def fulltext_available():
+    """
+    Проверка полнотекстового поиска MSSQL: компонент установлен и на таблицах есть полнотекстовые индексы.
+    Результат запоминается на время жизни процесса.
+
+    Возвращает:
+        bool: True, если можно использовать FullTextSearchBackend.
+    """
+    if connection.vendor != 'microsoft':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT FULLTEXTSERVICEPROPERTY('IsFullTextInstalled'), "
+            "OBJECTPROPERTY(OBJECT_ID('dogs_dog'), 'TableFulltextCatalogId'), "
+            "OBJECTPROPERTY(OBJECT_ID('dogs_category'), 'TableFulltextCatalogId'), "
+            "OBJECTPROPERTY(OBJECT_ID('reviews_review'), 'TableFulltextCatalogId')"
+        )
+        return all(cursor.fetchone())
+
+
+def get_search_backend():
+    """
+    Выбор поискового бэкенда по настройке SEARCH_BACKEND: fulltext, token или auto
+    (полнотекстовый каталог MSSQL, если он есть, иначе инвертированный индекс).
+
+    Возвращает:
+        FullTextSearchBackend | TokenSearchBackend: Поисковый бэкенд.
+    """
+    if settings.SEARCH_BACKEND == 'fulltext' or settings.SEARCH_BACKEND == 'auto' and fulltext_available():
+        return FullTextSearchBackend()
+    return TokenSearchBackend()
+
+
+def search_dogs(queryset, query):
+    """
+    Поиск собак по кличке, породе и активным отзывам.
+
+    Аргументы:
+        queryset (QuerySet): Собаки, среди которых идёт поиск.
+        query (str): Поисковый запрос.
+
+    Возвращает:
+        QuerySet: Найденные собаки по убыванию ранга.
+    """
+    return get_search_backend().search(queryset, SearchKind.DOG, query)
+
+
+def search_categories(queryset, query):
+    """
+    Поиск пород по названию и описанию.
+
+    Аргументы:
+        queryset (QuerySet): Породы, среди которых идёт поиск.
+        query (str): Поисковый запрос.
+
+    Возвращает:
+        QuerySet: Найденные породы по убыванию ранга.
+    """
+    return get_search_backend().search(queryset, SearchKind.CATEGORY, query)
@@ -1,66 +1,302 @@
+import time
+
+from django.apps import apps
 from django.conf import settings
-from django.core.cache import cache
-from django.core.mail import send_mail
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
 from celery import shared_task
-from django.shortcuts import get_object_or_404
+from redis.exceptions import RedisError
 
-from dogs.models import Category, Dog
+from dogs.counters import flush_view_counts
+from dogs.images import build_variants, current_variants, obsolete_variant_names
+from dogs.models import Category, Dog, DogViewMilestone, SearchKind
+from dogs.search import index_objects
+from reviews.models import Review
+from users.models import OutgoingMail, User
 
 
-def get_categories_cache():
+REFERENCE_CACHE_MODELS = (Category,)
+
+# Модели строк списков: их версия кеша входит в ETag списков (dogs/conditional.py)
+LIST_VERSION_MODELS = (Dog, Review, User)
+
+# Модель: (поле изображения, JSON-поле его вариантов)
+IMAGE_VARIANT_FIELDS = {
+    'dogs.dog': ('photo', 'photo_variants'),
+    'users.user': ('avatar', 'avatar_variants'),
+}
+
+
+def reference_cache_call(method, *args, fallback=True):
+    """
+    Вызов метода кеша по умолчанию. Если Redis недоступен, используется локальный кеш процесса.
+
+    Параметры:
+        method (str): Имя метода кеша.
+        *args: Аргументы метода.
+        fallback (bool): Использовать локальный кеш при недоступном Redis; иначе ошибка передаётся вызывающему.
+
+    Возвраты:
+        object: Результат вызова метода кеша.
+    """
+    try:
+        return getattr(caches['default'], method)(*args)
+    except (OSError, RedisError):
+        if not fallback:
+            raise
+        return getattr(caches['local'], method)(*args)
+
+
+def get_model_cache_version(model, fallback=True):
+    """
+    Получение текущей версии кеша модели. Версия меняется при каждом изменении строк модели.
+
+    Параметры:
+        model (Model): Класс модели.
+        fallback (bool): Читать версию из локального кеша, если Redis недоступен (см. reference_cache_call).
+
+    Возвраты:
+        int: Версия кеша модели.
+    """
+    key = f'reference:{model._meta.label_lower}:version'
+    version = reference_cache_call('get', key, fallback=fallback)
+    if version is None:
+        reference_cache_call('add', key, time.time_ns(), None, fallback=fallback)
+        version = reference_cache_call('get', key, fallback=fallback) or 0
+    return version
+
+
+def invalidate_model_cache(model):
+    """
+    Сброс кеша модели сменой его версии. Старые записи перестают читаться и вытесняются по таймауту.
+    Версия меняется после фиксации транзакции: иначе параллельный запрос успел бы прочитать из базы
+    ещё старые строки и положить их в кеш под новой версией.
+
+    Параметры:
+        model (Model): Класс модели.
+    """
+    key = f'reference:{model._meta.label_lower}:version'
+
+    def bump_version():
+        try:
+            reference_cache_call('incr', key)
+        except ValueError:
+            reference_cache_call('set', key, time.time_ns(), None)
+
+    transaction.on_commit(bump_version)
+
+
+def get_model_rows(model):
     """
-    Получение списка категорий из кеша. Если кеш включен, то возвращается кэшированный список категорий, иначе создается новый список.
+    Получение всех строк небольшой справочной модели через кеш (read-through).
+    В кеше хранится вычисленный список объектов, а не QuerySet.
 
     Параметры:
-        key (str): Ключ для доступа к списку категорий в кеше.
+        model (Model): Класс модели из REFERENCE_CACHE_MODELS.
+
+    Возвраты:
+        list: Список объектов модели, отсортированный по pk.
+    """
+    key = f'reference:{model._meta.label_lower}:{get_model_cache_version(model)}:rows'
+    rows = reference_cache_call('get', key)
+    if rows is None:
+        rows = list(model.objects.order_by('pk'))
+        reference_cache_call('set', key, rows, settings.REFERENCE_CACHE_TIMEOUT)
+    return rows
+
+
+def get_categories_cache():
+    """
+    Получение списка категорий из кеша.
 
     Возвраты:
         list: Список категорий.
     """
-    if settings.CACHE_ENABLED:
-        key = 'category_list'
-        category_list = cache.get(key)
-        if category_list is None:
-            category_list = Category.objects.all()
-            cache.set(key, category_list)
-    else:
-        category_list = Category.objects.all()
+    return get_model_rows(Category)
+
 
-    return category_list
+def get_category(pk):
+    """
+    Получение категории по первичному ключу из кеша.
 
+    Параметры:
+        pk (int): Первичный ключ категории.
 
-def send_congratulation_mail(email, obj, count):
+    Возвраты:
+        Category | None: Категория или None, если её нет.
     """
-    Отправка поздравления по поводу достижения определенного количества просмотров.
+    for category in get_categories_cache():
+        if category.pk == pk:
+            return category
+    return None
+
+
+def congratulation_mail(email, dog_name, count):
+    """
+    Письмо с поздравлением по поводу достижения определенного количества просмотров.
 
     Параметры:
         email (str): Электронный адрес получателя.
-        obj (Dog): Объект собаки, достигшей определенного количества просмотров.
+        dog_name (str): Имя собаки, достигшей определенного количества просмотров.
         count (int): Количество достигнутых просмотров.
 
     Возврат:
-        None: Функция выполняет отправку сообщения.
+        OutgoingMail: Несохранённое письмо очереди отправки.
     """
-    send_mail(
+    return OutgoingMail(
         subject=f'Поздравляем {count} просмотров!!',
-        message=f'Ваша собака - {obj.name}, преодолела {count} просмотров!!',
-        from_email=settings.EMAIL_HOST_USER,
-        recipient_list=[email],
+        message=f'Ваша собака - {dog_name}, преодолела {count} просмотров!!',
+        recipient=email,
     )
 
 
-@shared_task
-def send_congratulation_mail_task(email, obj_id, count):
+@shared_task(ignore_result=True)
+def send_milestone_mails_task():
+    """
+    Постановка в очередь писем с поздравлениями по всем ещё не обработанным порогам просмотров через задачу Celery.
+
+    Ставится один раз на сброс буфера счётчиков. Необработанные пороги блокируются, данные для писем
+    читаются одним запросом, письма создаются одним bulk_create, пороги помечаются временем обработки в той же транзакции.
+    Отправляет письма задача drain_outbox_task.
+
+    Возврат:
+        int: Количество поставленных в очередь писем.
+    """
+    with transaction.atomic():
+        pks = list(
+            DogViewMilestone.objects.select_for_update(skip_locked=True)
+            .filter(notified_at__isnull=True)
+            .values_list('pk', flat=True)
+        )
+        milestones = DogViewMilestone.objects.filter(pk__in=pks, dog__owner__isnull=False).values_list(
+            'threshold', 'dog__name', 'dog__owner__email',
+        )
+        mails = OutgoingMail.objects.bulk_create([
+            congratulation_mail(email, dog_name, threshold)
+            for threshold, dog_name, email in milestones
+        ])
+        DogViewMilestone.objects.filter(pk__in=pks).update(notified_at=timezone.now())
+    return len(mails)
+
+
+@shared_task(ignore_result=True)
+def flush_view_counts_task():
+    """
+    Периодическая задача Celery, переносящая накопленные просмотры собак в базу данных.
+
+    Возврат:
+        int: Количество записанных просмотров.
+    """
+    return flush_view_counts()
+
+
+def schedule_image_variants(instance):
     """
-    Отправка поздравления по достижении определенного количества просмотров через задачу Celery.
+    Постановка задачи построения вариантов изображения, если файл поля изменился после последнего построения.
+    Задача ставится после фиксации транзакции, чтобы воркер увидел новый файл.
 
     Параметры:
-        email (str): Электронный адрес получателя.
-        obj_id (int): ID объекта собаки.
-        count (int): Количество достигнутых просмотров.
+        instance (Model): Сохранённая собака или пользователь.
+
+    Возврат:
+        bool: True, если задача поставлена.
+    """
+    label = instance._meta.label_lower
+    field_name, variants_field = IMAGE_VARIANT_FIELDS[label]
+    field_file = getattr(instance, field_name)
+    variants = getattr(instance, variants_field)
+    if (variants or {}).get('source', '') == (field_file.name or ''):
+        return False
+    transaction.on_commit(lambda: build_image_variants_task.delay(label, instance.pk))
+    return True
+
+
+@shared_task(ignore_result=True)
+def build_image_variants_task(model_label, pk):
+    """
+    Задача Celery, строящая уменьшенные WebP/JPEG варианты изображения и записывающая их в JSON-поле модели.
+    Запись идёт через update() вместе с updated_at только если файл не сменился за время построения; файлы прежних вариантов удаляются.
+
+    Параметры:
+        model_label (str): Метка модели из IMAGE_VARIANT_FIELDS.
+        pk (int): ID объекта.
+
+    Возврат:
+        int: Количество построенных вариантов.
+    """
+    model = apps.get_model(model_label)
+    field_name, variants_field = IMAGE_VARIANT_FIELDS[model_label]
+    instance = model.objects.filter(pk=pk).only(field_name, variants_field).first()
+    if instance is None:
+        return 0
+    field_file = getattr(instance, field_name)
+    old_variants = getattr(instance, variants_field)
+    if field_file and current_variants(field_file, old_variants):
+        return 0
+    try:
+        new_variants = build_variants(field_file)
+    except OSError:
+        return 0
+    unchanged = {field_name: field_file.name} if field_file else {}
+    updated = model.objects.filter(pk=pk, **unchanged).update(**{variants_field: new_variants}, updated_at=timezone.now())
+    if not updated:
+        return 0
+    # update() не отправляет сигналов, а варианты выводятся в карточках списков
+    invalidate_model_cache(model)
+    for name in obsolete_variant_names(old_variants, new_variants):
+        field_file.storage.delete(name)
+    return len(new_variants.get('variants', []))
+
+
+def schedule_search_index(kind, pks):
+    """
+    Постановка переиндексации документов в очередь после фиксации транзакции: документ собаки включает
+    все её активные отзывы, поэтому запрос не ждёт его перестроения.
+
+    Параметры:
+        kind (SearchKind): Тип документа.
+        pks (Iterable): ID объектов.
 
     Возврат:
-        None: Задача выполняется асинхронно.
+        bool: True, если задача поставлена.
     """
-    obj = get_object_or_404(Dog, id=obj_id)
-    return send_congratulation_mail(email, obj, count)
+    pks = list(pks)
+    if not pks:
+        return False
+    transaction.on_commit(lambda: index_objects_task.delay(kind, pks))
+    return True
+
+
+@shared_task(ignore_result=True)
+def index_objects_task(kind, pks):
+    """
+    Задача Celery, переиндексирующая документы поискового индекса.
+
+    Параметры:
+        kind (str): Тип документа SearchKind.
+        pks (list): ID объектов.
+
+    Возврат:
+        int: Количество записанных основ.
+    """
+    return index_objects(SearchKind(kind), pks)
+
+
+@shared_task(ignore_result=True)
+def index_category_dogs_task(category_id, batch_size=500):
+    """
+    Задача Celery, переиндексирующая собак породы пачками (название породы входит в документ собаки).
+
+    Параметры:
+        category_id (int): ID породы.
+        batch_size (int): Количество собак в пачке.
+
+    Возврат:
+        int: Количество записанных основ.
+    """
+    pks = list(Dog.objects.filter(category_id=category_id).order_by('pk').values_list('pk', flat=True))
+    return sum(
+        index_objects(SearchKind.DOG, pks[offset:offset + batch_size], batch_size=batch_size)
+        for offset in range(0, len(pks), batch_size)
+    )
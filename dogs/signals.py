@@ -1,21 +1,137 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from dogs.models import Dog
-from dogs.services import send_congratulation_mail_task
+from dogs.models import Category, Dog, Parent, SearchKind
+from dogs.pedigree import update_ancestry
+from dogs.search import token_index_enabled
+from dogs.services import (
+    LIST_VERSION_MODELS, REFERENCE_CACHE_MODELS, index_category_dogs_task, invalidate_model_cache,
+    schedule_image_variants, schedule_search_index,
+)
+
+
+def invalidate_reference_cache(sender, **kwargs):
+    """
+    Сброс кеша справочной модели при сохранении или удалении её строки после фиксации транзакции.
+
+    Аргументы:
+       sender (Model): Класс изменённой модели.
+       kwargs: Параметры, переданные сигналом.
+    """
+    invalidate_model_cache(sender)
+
+
+for model in REFERENCE_CACHE_MODELS:
+    post_save.connect(invalidate_reference_cache, sender=model, dispatch_uid=f'reference_cache_save_{model._meta.label_lower}')
+    post_delete.connect(invalidate_reference_cache, sender=model, dispatch_uid=f'reference_cache_delete_{model._meta.label_lower}')
+
+
+def invalidate_list_version(sender, update_fields=None, **kwargs):
+    """
+    Смена версии модели, строки которой выводятся в списках: версия входит в ETag списков (dogs/conditional.py).
+    Обновление одного last_login при входе списки не затрагивает.
+
+    Аргументы:
+       sender (Model): Класс изменённой модели.
+       update_fields (frozenset): Сохранённые поля.
+       kwargs: Параметры, переданные сигналом.
+    """
+    if update_fields != frozenset({'last_login'}):
+        invalidate_model_cache(sender)
+
+
+for model in LIST_VERSION_MODELS:
+    post_save.connect(invalidate_list_version, sender=model, dispatch_uid=f'list_version_save_{model._meta.label_lower}')
+    post_delete.connect(invalidate_list_version, sender=model, dispatch_uid=f'list_version_delete_{model._meta.label_lower}')
+
+
+@receiver([post_save, post_delete], sender=Dog)
+def index_dog(sender, instance, raw=False, **kwargs):
+    """
+    Постановка переиндексации собаки в очередь при сохранении или удалении.
+
+    Аргументы:
+       instance (Dog): Изменённая собака.
+       raw (bool): Загрузка фикстуры, индекс строится командой rebuild_search_index.
+       kwargs: Параметры, переданные сигналом.
+    """
+    if not raw and token_index_enabled():
+        schedule_search_index(SearchKind.DOG, [instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Category)
+def index_category(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Постановка переиндексации породы и её собак в очередь (название породы входит в документ собаки).
+    Собаки породы переиндексируются задачей пачками, а не в запросе.
+
+    Аргументы:
+       instance (Category): Изменённая порода.
+       created (bool): Порода только что создана.
+       raw (bool): Загрузка фикстуры, индекс строится командой rebuild_search_index.
+       kwargs: Параметры, переданные сигналом.
+    """
+    if not raw and token_index_enabled():
+        schedule_search_index(SearchKind.CATEGORY, [instance.pk])
+        if not created:
+            category_id = instance.pk
+            transaction.on_commit(lambda: index_category_dogs_task.delay(category_id))
 
 
 @receiver(post_save, sender=Dog)
-def congratulation_mail(sender, instance, **kwargs):
+def build_dog_photo_variants(sender, instance, raw=False, **kwargs):
+    """
+    Постановка задачи построения вариантов фотографии собаки после её загрузки или замены.
+
+    Аргументы:
+       instance (Dog): Сохранённая собака.
+       raw (bool): Загрузка фикстуры, варианты строятся командой build_image_variants.
+       kwargs: Параметры, переданные сигналом.
+    """
+    if not raw:
+        schedule_image_variants(instance)
+
+
+@receiver(post_save, sender=Parent)
+def update_parent_ancestry(sender, instance, raw=False, **kwargs):
     """
-    Отправка уведомления о достижении определённого числа просмотров собакой.
+    Перенос изменённого ребра родословной в таблицу замыкания DogAncestry.
 
     Аргументы:
-       instance (Dog): Инстанция модели собаки, владельца которой необходимо уведомить.
+       instance (Parent): Сохранённый родитель.
+       raw (bool): Загрузка фикстуры, замыкание строится командой rebuild_ancestry.
        kwargs: Параметры, переданные сигналом.
+    """
+    loaded_edge = getattr(instance, '_loaded_edge', None)
+    if not raw and loaded_edge != instance.edge:
+        update_ancestry(added=[instance.edge] if instance.edge else [],
+                        removed=[loaded_edge] if loaded_edge else [])
+    instance._loaded_edge = instance.edge
+
+
+@receiver(post_delete, sender=Parent)
+def remove_parent_ancestry(sender, instance, **kwargs):
+    """
+    Удаление ребра родословной удалённого родителя из таблицы замыкания.
 
-    Действие:
-       Если количество просмотров кратно 100, отправляется уведомление владельцу о достижении данного порога.
+    Аргументы:
+       instance (Parent): Удалённый родитель.
+       kwargs: Параметры, переданные сигналом.
+    """
+    edge = getattr(instance, '_loaded_edge', instance.edge)
+    if edge:
+        update_ancestry(removed=[edge])
+
+
+@receiver(pre_delete, sender=Dog)
+def remove_offspring_ancestry(sender, instance, **kwargs):
+    """
+    Удаление рёбер от удаляемой собаки к её детям: ссылки на неё обнуляются (SET_NULL) без сигналов Parent,
+    а пути между её предками и потомками иначе остались бы в таблице замыкания.
+
+    Аргументы:
+       instance (Dog): Удаляемая собака.
+       kwargs: Параметры, переданные сигналом.
     """
-    if instance.view_count % 100 == 0 and instance.owner:
-        send_congratulation_mail_task.delay(instance.owner.email, instance.id, instance.view_count)
+    update_ancestry(removed=list(Parent.objects.filter(parent_dog=instance).values_list('parent_dog_id', 'dog_id')))
@@ -1,4 +1,8 @@
 from django import template
+from django.templatetags.static import static
+
+from dogs.images import variant_srcset, variant_url
+from dogs.page_cache import render_fragment
 
 register = template.Library()
 
@@ -6,10 +10,54 @@ register = template.Library()
 def dogs_media(value):
     if value:
         return fr'/media/{value}'
-    return '/static/dummydog.jpg'
+    return static('dummydog.jpg')
 
 @register.filter
 def user_media(value):
     if value:
         return fr'/media/{value}'
-    return '/static/noavatar.png'
\ No newline at end of file
+    return static('noavatar.png')
+
+@register.filter
+def dog_photo(dog, width):
+    """
+    URL варианта фотографии собаки не уже заданной ширины, оригинал или заглушка.
+    """
+    return variant_url(dog.photo, dog.photo_variants, int(width)) or static('dummydog.jpg')
+
+@register.filter
+def dog_photo_srcset(dog, image_format='jpeg'):
+    """
+    srcset вариантов фотографии собаки в формате webp или jpeg.
+    """
+    return variant_srcset(dog.photo, dog.photo_variants, image_format)
+
+@register.filter
+def user_avatar(user, width):
+    """
+    URL варианта аватара пользователя не уже заданной ширины, оригинал или заглушка.
+    """
+    return variant_url(user.avatar, user.avatar_variants, int(width)) or static('noavatar.png')
+
+@register.filter
+def user_avatar_srcset(user, image_format='jpeg'):
+    """
+    srcset вариантов аватара пользователя в формате webp или jpeg.
+    """
+    return variant_srcset(user.avatar, user.avatar_variants, image_format)
+
+@register.filter
+def card_viewer(user, owner_id):
+    """
+    Отношение пользователя к карточке (владелец или автор, сотрудник, суперпользователь): от него зависят
+    кнопки изменения, поэтому оно входит в ключ кеша карточки.
+    """
+    is_owner = user.is_authenticated and user.pk == owner_id
+    return f'{is_owner:d}{user.is_staff:d}{user.is_superuser:d}'
+
+@register.simple_tag(takes_context=True)
+def page_fragment(context, template_name):
+    """
+    Персональный фрагмент страницы из page_cache: в кеш попадает метка, фрагмент подставляется при ответе.
+    """
+    return render_fragment(context, template_name)
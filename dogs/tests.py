@@ -1,3 +1,1028 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+from inspect import iscoroutinefunction
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.contrib.auth.models import update_last_login
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.http import Http404
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from config.db.routers import PrimaryReplicaRouter
+from config.middleware import ReplicaRoutingMiddleware
+
+from dogs.async_views import select_view
+from dogs.catalog import CSV_FIELDS, DOG_EXPORT_FIELDS, aiter_export, iter_export
+from dogs import counters
+from dogs.counters import LocalViewCounter, apply_view_counts, flush_on_shutdown
+from dogs.forms import ParentFormset
+from dogs.models import Category, Dog, DogAncestry, Parent, SearchKind, SearchToken
+from dogs.pagination import cursor_paginate, decode_cursor, encode_cursor, get_cursor_fields
+from dogs.pedigree import ancestors, common_ancestors, descendants, inbreeding_coefficient, kinship, rebuild_ancestry
+from dogs.search import (
+    FullTextSearchBackend, TokenSearchBackend, get_search_backend, index_objects, normalize, search_categories,
+    search_dogs, stem, token_index_enabled,
+)
+from dogs.services import get_categories_cache
+from dogs.views import AsyncDogDetailView, AsyncDogListView, DogDetailView, DogListView, acategory_dogs, category_dogs
+from reviews.models import Review
+from reviews.views import AllDogReviewListView, AllInactiveDogReviewListView, AsyncAllDogReviewListView, \
+    AsyncAllInactiveDogReviewListView, AsyncDogReviewDetailView, AsyncDogReviewListView, \
+    AsyncInactiveDogReviewListView, DogReviewDetailView, DogReviewListView, InactiveDogReviewListView
+from users.models import User, UserRoles
+
+# Кеш в памяти, без фонового сброса счётчика просмотров, кеша карточек отзывов и реплик:
+# все запросы считаются по основной базе. Тесты идут в одном процессе, поэтому кеш в памяти для них общий
+QUERY_BUDGET_SETTINGS = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'budget'},
+               'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'budget-local'}},
+    'VIEW_COUNTER_FLUSH_INTERVAL': float('inf'),
+    'REVIEW_CARD_CACHE': False,
+    'DATABASE_REPLICAS': [],
+    'SHARED_CACHE': True,
+}
+
+
+class ViewCounterTestMixin:
+    """
+    Отдельный локальный буфер просмотров на каждый тест, пустой в начале и очищаемый в конце:
+    просмотры тестовых страниц не копятся в буфере процесса (или в Redis) и не попадают в базу из настроек.
+
+    Атрибуты:
+        view_counter (LocalViewCounter): Буфер просмотров теста.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.view_counter = LocalViewCounter()
+        patcher = mock.patch.object(counters, '_counter', self.view_counter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.view_counter.drain()
+        super().tearDown()
+
+
+class QueryBudgetMixin(ViewCounterTestMixin):
+    """
+    Тестовые данные и проверка количества SQL-запросов страниц dogs, reviews и users.
+
+    Атрибуты:
+        rows (int): Количество собак и отзывов в тестовых данных.
+
+    Методы:
+        setUpTestData(cls): Пользователи всех ролей, порода, собаки, отзывы и поисковый индекс.
+        setUp(self): Очистка кеша и прогрев кеша пород.
+        assertQueryBudget(self, name, args, role, budget, not_modified_budget, query_string): Проверка бюджета страницы.
+    """
+    rows = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            role: User.objects.create(email=f'budget-{role}@example.com', role=role,
+                                      is_staff=role != UserRoles.USER, is_superuser=role == UserRoles.ADMIN)
+            for role in UserRoles.values
+        }
+        cls.category = Category.objects.create(name='Bench category', description='Bench')
+        cls.dogs = Dog.objects.bulk_create([
+            Dog(name=f'Bench dog {n}', category=cls.category, owner=cls.users[UserRoles.USER], is_active=n % 2 == 0)
+            for n in range(cls.rows)
+        ])
+        cls.reviews = Review.objects.bulk_create([
+            Review(title=f'Bench review {n}', slug=f'bench-review-{n}', content='Bench', dog=cls.dogs[0],
+                   author=cls.users[UserRoles.USER], sign_of_review=n % 2 == 0)
+            for n in range(cls.rows)
+        ])
+        # Задачи индексации ставятся после фиксации транзакции, а setUpTestData её не фиксирует
+        index_objects(SearchKind.CATEGORY, [cls.category.pk])
+        index_objects(SearchKind.DOG, [dog.pk for dog in cls.dogs])
+
+    def setUp(self):
+        super().setUp()
+        for alias in QUERY_BUDGET_SETTINGS['CACHES']:
+            caches[alias].clear()
+        # Кеш пород прогрет, как на работающем сервере: его заполнение не входит в бюджет страницы
+        get_categories_cache()
+
+    def assertQueryBudget(self, name, args, role, budget, not_modified_budget=None, query_string=''):
+        """
+        Открытие страницы с подсчётом запросов. Страница с ETag открывается повторно с If-None-Match
+        и должна ответить 304 в отдельном бюджете.
+
+        Аргументы:
+            name (str): Имя URL.
+            args (list): Аргументы URL.
+            role (str): Роль пользователя или None для анонима.
+            budget (int): Количество запросов страницы.
+            not_modified_budget (int): Количество запросов ответа 304 или None, если страница не отдаёт ETag.
+            query_string (str): Строка запроса.
+        """
+        client = Client()
+        if role is not None:
+            client.force_login(self.users[role])
+        url = reverse(name, args=args) + query_string
+        with self.assertNumQueries(budget):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        if not_modified_budget is not None:
+            with self.assertNumQueries(not_modified_budget):
+                response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS)
+class DogQueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """Бюджет SQL-запросов страниц dogs."""
+
+    def test_index(self):
+        self.assertQueryBudget('dogs:index', [], None, 0)
+
+    def test_categories(self):
+        self.assertQueryBudget('dogs:categories', [], UserRoles.USER, 2)
+
+    def test_category_dogs(self):
+        self.assertQueryBudget('dogs:category_dogs', [self.category.pk], None, 1, 0)
+
+    def test_list_dogs(self):
+        self.assertQueryBudget('dogs:list_dogs', [], None, 1, 0)
+        self.assertQueryBudget('dogs:list_dogs', [], UserRoles.USER, 3, 2)
+
+    def test_search(self):
+        self.assertQueryBudget('dogs:search_dogs', [], UserRoles.USER, 4, query_string='?q=Bench')
+        self.assertQueryBudget('dogs:search_categories', [], UserRoles.USER, 4, query_string='?q=Bench')
+
+    def test_deactivated_list_dogs(self):
+        self.assertQueryBudget('dogs:deactivated_list_dogs', [], UserRoles.USER, 3, 2)
+
+    def test_detail_dog(self):
+        self.assertQueryBudget('dogs:detail_dog', [self.dogs[0].pk], None, 2, 1)
+
+    def test_update_dog(self):
+        self.assertQueryBudget('dogs:update_dog', [self.dogs[0].pk], UserRoles.ADMIN, 5)
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS)
+class ConditionalGetTestCase(QueryBudgetMixin, TestCase):
+    """
+    Ответы 304: списки проверяются по версиям кеша моделей, страницы объектов - по агрегатам строки.
+    Версии меняются после фиксации транзакции, поэтому изменения выполняются с запуском on_commit.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # Не автор отзывов и не владелец собак: смена их строк не меняет пользователя страницы
+        self.client.force_login(self.users[UserRoles.MODERATOR])
+
+    def get(self, name, args=(), etag=None):
+        """
+        Открытие страницы, с If-None-Match, если задан ETag.
+
+        Возвращает:
+            HttpResponse: Ответ страницы.
+        """
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(reverse(name, args=args), headers=headers)
+
+    def assertNotModified(self, name, args=()):
+        """
+        Повторный запрос страницы с её ETag получает 304 с теми же валидаторами.
+
+        Возвращает:
+            str: ETag страницы.
+        """
+        response = self.get(name, args)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        not_modified = self.get(name, args, response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        return response['ETag']
+
+    def assertModified(self, name, args, etag):
+        self.assertEqual(self.get(name, args, etag).status_code, 200)
+
+    def test_list_changes(self):
+        etag = self.assertNotModified('dogs:list_dogs')
+        with self.captureOnCommitCallbacks(execute=True):
+            Dog.objects.filter(pk=self.dogs[0].pk).get().save()
+        self.assertModified('dogs:list_dogs', (), etag)
+
+        etag = self.assertNotModified('reviews:all_reviews')
+        author = self.users[UserRoles.USER]
+        with self.captureOnCommitCallbacks(execute=True):
+            author.first_name = 'Renamed'
+            author.save()
+        self.assertModified('reviews:all_reviews', (), etag)
+
+        etag = self.assertNotModified('dogs:category_dogs', [self.category.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dogs[2].delete()
+        self.assertModified('dogs:category_dogs', [self.category.pk], etag)
+
+    def test_list_ignores_login(self):
+        etag = self.assertNotModified('users:users_list')
+        with self.captureOnCommitCallbacks(execute=True):
+            update_last_login(None, self.users[UserRoles.ADMIN])
+        self.assertEqual(self.get('users:users_list', etag=etag).status_code, 304)
+
+    def test_list_changes_on_view_flush(self):
+        # Каждый просмотр версию не меняет, сброс счётчика в базу - меняет один раз
+        etag = self.assertNotModified('dogs:list_dogs')
+        self.view_counter.incr(self.dogs[0].pk, 5)
+        self.assertEqual(self.get('dogs:list_dogs', etag=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(counters.flush_view_counts(), 5)
+        self.assertModified('dogs:list_dogs', (), etag)
+
+    def test_list_without_shared_cache(self):
+        etag = self.assertNotModified('dogs:list_dogs')
+        # Версии только в памяти процесса или Redis недоступен: ETag списка не выдаётся, 304 не бывает
+        with override_settings(SHARED_CACHE=False):
+            response = self.get('dogs:list_dogs', etag=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('ETag', response)
+        redis = mock.Mock(**{'get.side_effect': ConnectionError, 'add.side_effect': ConnectionError})
+        with mock.patch('dogs.services.caches', {'default': redis, 'local': caches['local']}):
+            for name, args in (('dogs:list_dogs', ()), ('dogs:category_dogs', [self.category.pk])):
+                response = self.get(name, args, etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('ETag', response)
+            # Страницы объектов проверяются агрегатами и от кеша не зависят
+            self.assertNotModified('dogs:detail_dog', [self.dogs[0].pk])
+
+    def test_detail_views(self):
+        dog = self.dogs[0]
+        updated_at = Dog.objects.values_list('updated_at', flat=True).get(pk=dog.pk)
+        etag = self.assertNotModified('dogs:detail_dog', [dog.pk])
+        # Просмотры не меняют updated_at, но входят в ETag страницы собаки
+        apply_view_counts({dog.pk: 5})
+        self.assertEqual(Dog.objects.values_list('updated_at', flat=True).get(pk=dog.pk), updated_at)
+        self.assertModified('dogs:detail_dog', [dog.pk], etag)
+
+        review = self.reviews[0]
+        etag = self.assertNotModified('reviews:review_detail', [review.slug])
+        review.content = 'Changed'
+        review.save()
+        self.assertModified('reviews:review_detail', [review.slug], etag)
+
+    def test_etag_per_user(self):
+        etag = self.assertNotModified('dogs:list_dogs')
+        self.client.force_login(self.users[UserRoles.USER])
+        self.assertModified('dogs:list_dogs', (), etag)
+        self.client.logout()
+        response = self.get('dogs:list_dogs')
+        self.assertNotIn('private', response['Cache-Control'])
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS)
+class ViewCounterTestCase(QueryBudgetMixin, TestCase):
+    """Просмотры копятся в буфере теста и записываются в базу только явным сбросом."""
+
+    def test_views_stay_in_test_buffer(self):
+        dog = self.dogs[0]
+        for _ in range(3):
+            self.client.get(reverse('dogs:detail_dog', args=[dog.pk]))
+        self.assertEqual(self.view_counter.drain(), {dog.pk: 3})
+        self.assertEqual(Dog.objects.get(pk=dog.pk).view_count, 0)
+
+    def test_flush_on_shutdown(self):
+        dog = self.dogs[0]
+        self.view_counter.incr(dog.pk, 2)
+        self.assertEqual(flush_on_shutdown(), 2)
+        self.assertEqual(Dog.objects.get(pk=dog.pk).view_count, 2)
+        self.assertEqual(self.view_counter.drain(), {})
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS)
+class CursorPaginationTestCase(QueryBudgetMixin, TestCase):
+    """Курсорная пагинация: курсоры, совпадающие ключи сортировки и повреждённые курсоры."""
+
+    ordering = ['-timestamp', '-id']
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Половина отзывов с одним временем: порядок среди них задаёт только id
+        same = datetime.datetime(2024, 5, 1, 12, 0, 0, 123456, tzinfo=datetime.timezone.utc)
+        Review.objects.filter(pk__in=[review.pk for review in cls.reviews[::2]]).update(timestamp=same)
+        cls.expected = list(Review.objects.order_by(*cls.ordering).values_list('pk', flat=True))
+
+    def test_cursor_round_trip(self):
+        fields = get_cursor_fields(Review, self.ordering)
+        values = [datetime.datetime(2024, 5, 1, 12, 0, 0, 123456, tzinfo=datetime.timezone.utc), 42]
+        self.assertEqual(decode_cursor(encode_cursor(values), fields), values)
+
+    def test_pages_forward_and_backward(self):
+        pages, after = [], None
+        while True:
+            page = cursor_paginate(Review.objects.all(), self.ordering, 3, after=after)
+            pages.append([review.pk for review in page])
+            if not page.has_next():
+                break
+            after = page.next_cursor
+        self.assertEqual([pk for page in pages for pk in page], self.expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 3, 1])
+
+        before = page.previous_cursor
+        for expected in reversed(pages[:-1]):
+            page = cursor_paginate(Review.objects.all(), self.ordering, 3, before=before)
+            self.assertEqual([review.pk for review in page], expected)
+            before = page.previous_cursor
+        self.assertIsNone(before)
+
+    def test_view_pages(self):
+        User.objects.create(email='cursor@example.com')
+        url = base = reverse('users:users_list')
+        pages = []
+        while url:
+            page = self.client.get(url).context['page_obj']
+            pages.append([user.pk for user in page])
+            url = page.next_url and base + page.next_url
+        self.assertEqual([len(page) for page in pages], [3, 1])
+        self.assertEqual([pk for page in pages for pk in page],
+                         list(User.objects.order_by('pk').values_list('pk', flat=True)))
+
+    def test_tampered_cursor(self):
+        fields = get_cursor_fields(Review, self.ordering)
+        for cursor in ('not-base64!', encode_cursor([1]), encode_cursor(['not a date', 1]), encode_cursor({'a': 1})):
+            with self.subTest(cursor=cursor), self.assertRaises(Http404):
+                decode_cursor(cursor, fields)
+        self.assertEqual(self.client.get(reverse('dogs:list_dogs'), {'after': 'garbage'}).status_code, 404)
+
+
+def parent_formset_data(rows, parent_category, **fields):
+    """
+    Данные POST формсета родителей собаки.
+
+    Аргументы:
+        rows (list): Строки формсета: словари полей родителя, у существующих - с id.
+        parent_category (Category): Порода родителей, если строка её не задаёт.
+        **fields: Поля формы собаки.
+
+    Возвращает:
+        dict: Данные формы.
+    """
+    data = {
+        **fields,
+        'parent_set-TOTAL_FORMS': len(rows),
+        'parent_set-INITIAL_FORMS': sum('id' in row for row in rows),
+        'parent_set-MIN_NUM_FORMS': 0, 'parent_set-MAX_NUM_FORMS': 1000,
+    }
+    for index, row in enumerate(rows):
+        data.update({f'parent_set-{index}-{field}': value for field, value in {'category': parent_category.pk, **row}.items()})
+    return data
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS)
+class ParentFormsetTestCase(TestCase):
+    """Сохранение родословной на странице редактирования собаки разницей строк формсета с базой."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='pedigree@example.com', role=UserRoles.USER)
+        cls.category = Category.objects.create(name='Pedigree category', description='Pedigree')
+        cls.dog = Dog.objects.create(name='Pedigree dog', category=cls.category, owner=cls.user)
+        cls.kept = Parent.objects.create(dog=cls.dog, name='Kept', category=cls.category)
+        cls.renamed = Parent.objects.create(dog=cls.dog, name='Old name', category=cls.category)
+        cls.deleted = Parent.objects.create(dog=cls.dog, name='Deleted', category=cls.category)
+
+    def setUp(self):
+        for alias in QUERY_BUDGET_SETTINGS['CACHES']:
+            caches[alias].clear()
+        self.client.force_login(self.user)
+
+    def post(self, rows, name='Pedigree dog'):
+        """
+        Отправка формы собаки и формсета родителей.
+
+        Аргументы:
+            rows (list): Строки формсета (см. parent_formset_data).
+            name (str): Имя собаки.
+
+        Возвращает:
+            HttpResponse: Ответ страницы редактирования.
+        """
+        data = parent_formset_data(rows, self.category, name=name, category=self.category.pk)
+        return self.client.post(reverse('dogs:update_dog', args=[self.dog.pk]), data)
+
+    def test_diff(self):
+        rows = [
+            {'id': self.kept.pk, 'name': 'Kept'},
+            {'id': self.renamed.pk, 'name': 'New name'},
+            {'id': self.deleted.pk, 'name': 'Deleted', 'DELETE': 'on'},
+            {'name': 'Added'},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(rows)
+        self.assertRedirects(response, reverse('dogs:detail_dog', args=[self.dog.pk]), fetch_redirect_response=False)
+        self.assertQuerySetEqual(Parent.objects.filter(dog=self.dog).order_by('pk').values_list('name', flat=True),
+                                 ['Kept', 'New name', 'Added'])
+        self.assertFalse(Parent.objects.filter(pk=self.deleted.pk).exists())
+        # Одно UPDATE на изменённые строки, и в нём только изменённое поле
+        updates = [query['sql'] for query in queries if query['sql'].startswith(f'UPDATE "{Parent._meta.db_table}"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"name"', updates[0])
+        self.assertNotIn('"category_id"', updates[0])
+
+    def test_invalid_formset_does_not_save_dog(self):
+        response = self.post([{'id': self.kept.pk, 'name': ''}], name='Renamed dog')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['formset'].errors[0])
+        self.dog.refresh_from_db()
+        self.assertEqual(self.dog.name, 'Pedigree dog')
+        self.assertTrue(Parent.objects.filter(pk=self.kept.pk, name='Kept').exists())
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS)
+class PedigreeTestCase(TestCase):
+    """
+    Таблица замыкания DogAncestry: после каждого изменения родословной инкрементальное состояние
+    совпадает с полной перестройкой rebuild_ancestry.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='ancestry@example.com', role=UserRoles.USER)
+        cls.category = Category.objects.create(name='Ancestry category', description='Ancestry')
+        # Сводные брат и сестра sire и dam от общего предка founder, их потомок puppy
+        cls.founder, cls.sire, cls.dam, cls.puppy, cls.other = [
+            Dog.objects.create(name=name, category=cls.category, owner=cls.user)
+            for name in ('Founder', 'Sire', 'Dam', 'Puppy', 'Other')
+        ]
+        for child, parent in ((cls.sire, cls.founder), (cls.dam, cls.founder), (cls.puppy, cls.sire),
+                              (cls.puppy, cls.dam)):
+            cls.add_parent(child, parent)
+
+    @classmethod
+    def add_parent(cls, dog, parent_dog):
+        return Parent.objects.create(dog=dog, parent_dog=parent_dog, name=parent_dog.name, category=cls.category)
+
+    def assertAncestryConsistent(self):
+        """Инкрементальная таблица замыкания совпадает с перестроенной с нуля."""
+        def snapshot():
+            return sorted(DogAncestry.objects.values_list('ancestor_id', 'descendant_id', 'depth', 'paths'))
+
+        incremental = snapshot()
+        rebuild_ancestry()
+        self.assertEqual(incremental, snapshot())
+
+    def generations(self, queryset):
+        return {dog.pk: dog.generation for dog in queryset}
+
+    def test_queries(self):
+        self.assertAncestryConsistent()
+        self.assertEqual(self.generations(ancestors(self.puppy.pk)),
+                         {self.sire.pk: 1, self.dam.pk: 1, self.founder.pk: 2})
+        self.assertEqual(self.generations(ancestors(self.puppy.pk, max_depth=1)), {self.sire.pk: 1, self.dam.pk: 1})
+        self.assertEqual(self.generations(descendants(self.founder.pk)),
+                         {self.sire.pk: 1, self.dam.pk: 1, self.puppy.pk: 2})
+        self.assertEqual([dog.pk for dog in common_ancestors(self.sire.pk, self.dam.pk)], [self.founder.pk])
+        self.assertEqual(inbreeding_coefficient(self.puppy.pk), 0.125)
+        self.assertEqual(kinship(self.sire.pk, self.dam.pk), 0.125)
+
+    def test_cycle_rejected(self):
+        with self.assertRaises(ValidationError):
+            Parent(dog=self.founder, parent_dog=self.puppy, name='Puppy', category=self.category).full_clean()
+
+    def test_parent_changes(self):
+        parent = self.add_parent(self.dam, self.other)
+        self.assertAncestryConsistent()
+        self.assertEqual(self.generations(ancestors(self.puppy.pk))[self.other.pk], 2)
+
+        parent.parent_dog = self.sire
+        parent.save()
+        self.assertAncestryConsistent()
+        self.assertEqual(self.generations(descendants(self.other.pk)), {})
+
+        parent.delete()
+        self.assertAncestryConsistent()
+        self.assertFalse(ancestors(self.dam.pk).filter(pk=self.sire.pk).exists())
+
+    def test_dog_delete(self):
+        self.sire.delete()
+        self.assertAncestryConsistent()
+        self.assertEqual(self.generations(ancestors(self.puppy.pk)), {self.dam.pk: 1, self.founder.pk: 2})
+        self.assertEqual(inbreeding_coefficient(self.puppy.pk), 0)
+
+    def test_formset(self):
+        sire_link = Parent.objects.get(dog=self.puppy, parent_dog=self.sire)
+        dam_link = Parent.objects.get(dog=self.puppy, parent_dog=self.dam)
+        rows = [
+            {'id': sire_link.pk, 'name': 'Sire', 'parent_dog': self.other.pk},
+            {'id': dam_link.pk, 'name': 'Dam', 'parent_dog': self.dam.pk, 'DELETE': 'on'},
+            {'name': 'Founder', 'parent_dog': self.founder.pk},
+        ]
+        formset = ParentFormset(parent_formset_data(rows, self.category), instance=self.puppy)
+        self.assertTrue(formset.is_valid(), formset.errors)
+        formset.save()
+        self.assertAncestryConsistent()
+        self.assertEqual(self.generations(ancestors(self.puppy.pk)), {self.other.pk: 1, self.founder.pk: 1})
+
+
+class ViewVariantTestCase(SimpleTestCase):
+    """Синхронные представления для WSGI и их асинхронные варианты для ASGI."""
+
+    def test_view_variants(self):
+        variants = [
+            (DogListView, AsyncDogListView),
+            (DogDetailView, AsyncDogDetailView),
+            (AllDogReviewListView, AsyncAllDogReviewListView),
+            (AllInactiveDogReviewListView, AsyncAllInactiveDogReviewListView),
+            (DogReviewListView, AsyncDogReviewListView),
+            (InactiveDogReviewListView, AsyncInactiveDogReviewListView),
+            (DogReviewDetailView, AsyncDogReviewDetailView),
+        ]
+        for view, async_view in variants:
+            with self.subTest(view=view.__name__):
+                self.assertFalse(view.view_is_async)
+                self.assertTrue(async_view.view_is_async)
+        self.assertFalse(iscoroutinefunction(category_dogs))
+        self.assertTrue(iscoroutinefunction(acategory_dogs))
+
+    def test_select_view(self):
+        with override_settings(ASYNC_VIEWS=False):
+            self.assertIs(select_view(DogListView, AsyncDogListView), DogListView)
+        with override_settings(ASYNC_VIEWS=True):
+            self.assertIs(select_view(DogListView, AsyncDogListView), AsyncDogListView)
+
+
+@skipUnless('replica1' in settings.DATABASES, 'Нет реплики replica1: config.settings добавляет её зеркалом default')
+@override_settings(**{**QUERY_BUDGET_SETTINGS, 'DATABASE_REPLICAS': ['replica1']})
+class ReplicaRoutingTestCase(TestCase):
+    """
+    Маршрутизация запросов между основной базой и репликой replica1 - зеркалом default (TEST MIRROR).
+    Отдельное соединение зеркала не видело бы незафиксированных данных теста (а в MSSQL ждало бы их блокировок),
+    поэтому на время тестов реплика - то же соединение, что и default, а база каждого чтения и записи
+    проверяется по решениям маршрутизатора.
+    """
+    # Без реплики класс пропускается, но раннер всё равно проверяет базы из databases
+    databases = {alias for alias in (DEFAULT_DB_ALIAS, 'replica1') if alias in settings.DATABASES}
+
+    @classmethod
+    def setUpClass(cls):
+        replica = connections['replica1']
+        connections['replica1'] = connections['default']
+        cls.addClassCleanup(connections.__setitem__, 'replica1', replica)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='routing@example.com', role=UserRoles.USER)
+        cls.category = Category.objects.create(name='Routing category', description='Routing')
+        cls.dog = Dog.objects.create(name='Routing dog', category=cls.category, owner=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def request(self, method, url, data=None, client=None):
+        """
+        Запрос с записью баз, выбранных маршрутизатором.
+
+        Возвращает:
+            tuple: Ответ, множество баз чтений и множество баз записей.
+        """
+        reads, writes = set(), set()
+        db_for_read, db_for_write = PrimaryReplicaRouter.db_for_read, PrimaryReplicaRouter.db_for_write
+
+        def read(router, model, **hints):
+            alias = db_for_read(router, model, **hints)
+            reads.add(alias)
+            return alias
+
+        def write(router, model, **hints):
+            alias = db_for_write(router, model, **hints)
+            writes.add(alias)
+            return alias
+
+        with mock.patch.object(PrimaryReplicaRouter, 'db_for_read', read), \
+                mock.patch.object(PrimaryReplicaRouter, 'db_for_write', write):
+            response = getattr(client or self.client, method)(url, data)
+        return response, reads, writes
+
+    def create_review(self):
+        data = {'dog': self.dog.pk, 'title': 'Routing review', 'content': 'Routing', 'slug': 'routing-review'}
+        return self.request('post', reverse('reviews:review_create', args=[self.dog.pk]), data)
+
+    def test_reads_go_to_replica(self):
+        response, reads, writes = self.request('get', reverse('dogs:list_dogs'), client=Client())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reads, {'replica1'})
+        self.assertEqual(writes, set())
+
+    def test_write_goes_to_primary(self):
+        response, reads, writes = self.create_review()
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(reads, {DEFAULT_DB_ALIAS})
+        self.assertEqual(writes, {DEFAULT_DB_ALIAS})
+        self.assertTrue(Review.objects.filter(slug='routing-review').exists())
+
+    def test_reads_after_write_are_pinned_to_primary(self):
+        started = int(time.time())
+        self.create_review()
+        cookie = self.client.cookies[ReplicaRoutingMiddleware.cookie_name]
+        self.assertEqual(cookie['max-age'], settings.DATABASE_PRIMARY_PIN_SECONDS)
+        self.assertGreaterEqual(int(cookie.value), started + settings.DATABASE_PRIMARY_PIN_SECONDS)
+
+        response, reads, writes = self.request('get', reverse('reviews:reviews_list', args=[self.dog.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reads, {DEFAULT_DB_ALIAS})
+
+    def test_pin_expires(self):
+        self.create_review()
+        expired = time.time() + settings.DATABASE_PRIMARY_PIN_SECONDS + 1
+        with mock.patch('config.middleware.time.time', return_value=expired):
+            response, reads, writes = self.request('get', reverse('reviews:reviews_list', args=[self.dog.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reads, {'replica1'})
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS)
+class MetricsAccessTestCase(TestCase):
+    """Доступ к /metrics и заголовку Server-Timing."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='metrics-user@example.com', role=UserRoles.USER)
+        cls.moderator = User.objects.create(email='metrics-moderator@example.com', role=UserRoles.MODERATOR,
+                                            is_staff=True)
+
+    def test_metrics_forbidden_for_visitors(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    def test_metrics_for_staff(self):
+        self.client.force_login(self.moderator)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'http_request_duration_seconds')
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_metrics_token(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong-token')
+        self.assertEqual(response.status_code, 403)
+
+    def test_server_timing_only_for_staff(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('dogs:index')))
+        self.client.force_login(self.moderator)
+        self.assertIn('Server-Timing', self.client.get(reverse('dogs:index')))
+
+    @override_settings(DEBUG=True)
+    def test_server_timing_in_debug(self):
+        self.assertIn('Server-Timing', self.client.get(reverse('dogs:index')))
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS, SEARCH_BACKEND='token')
+class SearchTestCase(TestCase):
+    """
+    Поиск: стемминг, ранжирование по весам полей, выбор бэкенда, обновление индекса задачами
+    после фиксации транзакции и перестроение индекса пачками.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='search@example.com', role=UserRoles.USER)
+        cls.category = Category.objects.create(name='Овчарка', description='Пастушья собака')
+        cls.named = Dog.objects.create(name='Рыжик', category=cls.category, owner=cls.user)
+        cls.reviewed = Dog.objects.create(name='Барсик', category=cls.category, owner=cls.user)
+        Review.objects.create(title='Отзыв', slug='search-active', content='Рыжая и весёлая', dog=cls.reviewed,
+                              author=cls.user)
+        Review.objects.create(title='Отзыв', slug='search-inactive', content='Злая', dog=cls.reviewed,
+                              author=cls.user, sign_of_review=False)
+        # Задачи сигналов ставятся после фиксации транзакции, а setUpTestData её не фиксирует
+        index_objects(SearchKind.CATEGORY, [cls.category.pk])
+        index_objects(SearchKind.DOG, [cls.named.pk, cls.reviewed.pk])
+
+    def tokens(self):
+        """
+        Содержимое поискового индекса.
+
+        Возвращает:
+            set: Тип, ID объекта, основа и вес каждой записи.
+        """
+        return set(SearchToken.objects.values_list('kind', 'object_id', 'token', 'weight'))
+
+    def test_stem(self):
+        self.assertEqual({stem(word) for word in ('собака', 'собаки', 'собакой', 'собак')}, {'собак'})
+        self.assertEqual(stem('рыжая'), stem('рыжий'))
+        self.assertEqual(stem('dog'), 'dog')
+        # Регистр и «ё» приводятся до стемминга, однобуквенные слова кроме цифр отбрасываются
+        self.assertEqual(normalize('Ёжик, ёжики! a 7 dog'), ['ежик', 'ежик', '7', 'dog'])
+        self.assertEqual(normalize(None), [])
+
+    def test_ranking(self):
+        # Совпадение в кличке весит больше, чем в тексте отзыва
+        found = search_dogs(Dog.objects.all(), 'рыжий')
+        self.assertEqual([(dog, dog.search_rank) for dog in found], [(self.named, 5), (self.reviewed, 1)])
+        # Порода входит в документ собаки, ранг равный, порядок по ID
+        self.assertQuerySetEqual(search_dogs(Dog.objects.all(), 'овчарки'), [self.named, self.reviewed])
+
+    def test_all_terms_required(self):
+        self.assertQuerySetEqual(search_dogs(Dog.objects.all(), 'рыжая весёлая'), [self.reviewed])
+        self.assertQuerySetEqual(search_dogs(Dog.objects.all(), 'рыжик весёлый'), [])
+        self.assertQuerySetEqual(search_dogs(Dog.objects.all(), 'злая'), [])
+        self.assertQuerySetEqual(search_dogs(Dog.objects.all(), '!!'), [])
+
+    def test_search_views(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dogs:search_dogs'), {'q': 'Рыжие'})
+        self.assertEqual(list(response.context['object_list']), [self.named, self.reviewed])
+        response = self.client.get(reverse('dogs:search_categories'), {'q': 'пастушьи'})
+        self.assertEqual(list(response.context['object_list']), [self.category])
+
+    def test_index_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Лайка'
+            self.category.save()
+            self.assertQuerySetEqual(search_dogs(Dog.objects.all(), 'лайка'), [])
+        self.assertQuerySetEqual(search_dogs(Dog.objects.all(), 'лайки'), [self.named, self.reviewed])
+        self.assertQuerySetEqual(search_categories(Category.objects.all(), 'лайка'), [self.category])
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(title='Пушистый', slug='search-new', content='Пёс', dog=self.named, author=self.user)
+        self.assertQuerySetEqual(search_dogs(Dog.objects.all(), 'пушистого'), [self.named])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.named.delete()
+        self.assertFalse(SearchToken.objects.filter(kind=SearchKind.DOG, object_id=self.named.pk).exists())
+
+    def test_rebuild_search_index(self):
+        tokens = self.tokens()
+        SearchToken.objects.filter(kind=SearchKind.DOG, object_id=self.named.pk).delete()
+        stale = [
+            SearchToken(kind=SearchKind.DOG, object_id=object_id, token='устар', weight=1)
+            for object_id in (self.named.pk - 1, self.named.pk, self.reviewed.pk, self.reviewed.pk + 1)
+        ]
+        SearchToken.objects.bulk_create(stale)
+        with redirect_stdout(io.StringIO()):
+            call_command('rebuild_search_index', batch_size=1)
+        self.assertEqual(self.tokens(), tokens)
+
+    def test_backend_choice(self):
+        self.assertIsInstance(get_search_backend(), TokenSearchBackend)
+        self.assertTrue(token_index_enabled())
+        with override_settings(SEARCH_BACKEND='fulltext'):
+            self.assertIsInstance(get_search_backend(), FullTextSearchBackend)
+            self.assertFalse(token_index_enabled())
+        with override_settings(SEARCH_BACKEND='auto'):
+            with mock.patch('dogs.search.fulltext_available', return_value=True):
+                self.assertIsInstance(get_search_backend(), FullTextSearchBackend)
+            with mock.patch('dogs.search.fulltext_available', return_value=False):
+                self.assertIsInstance(get_search_backend(), TokenSearchBackend)
+
+    def test_fulltext_condition(self):
+        backend = FullTextSearchBackend()
+        self.assertEqual(
+            backend.contains_query('Ёж  рыжий ёж'),
+            '(FORMSOF(INFLECTIONAL, "еж") OR "еж*") AND (FORMSOF(INFLECTIONAL, "рыжий") OR "рыжий*")',
+        )
+        self.assertIsNone(backend.contains_query(' !! '))
+        with self.assertNumQueries(0):
+            self.assertQuerySetEqual(backend.search(Dog.objects.all(), SearchKind.DOG, ''), [])
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS, SEARCH_BACKEND='token')
+class ImportCatalogTestCase(TestCase):
+    """
+    Команда import_catalog на небольших файлах NDJSON и CSV: пачки, ID родителей и индекса из bulk_create,
+    пропуск строк с ошибками и фотографии только из каталога --photos.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(email='import-owner@example.com', role=UserRoles.USER)
+        cls.category = Category.objects.create(name='Овчарка', description='')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        media = override_settings(MEDIA_ROOT=os.path.join(self.directory, 'media'))
+        media.enable()
+        self.addCleanup(media.disable)
+        self.photos = os.path.join(self.directory, 'photos')
+        os.mkdir(self.photos)
+        Image.new('RGB', (40, 30), 'red').save(os.path.join(self.photos, 'rex.jpg'))
+        Image.new('RGB', (40, 30), 'blue').save(os.path.join(self.directory, 'secret.jpg'))
+        os.symlink(os.path.join(self.directory, 'secret.jpg'), os.path.join(self.photos, 'link.jpg'))
+
+    def write(self, name, text):
+        """
+        Запись файла каталога во временный каталог теста.
+
+        Аргументы:
+            name (str): Имя файла.
+            text (str): Содержимое.
+
+        Возвращает:
+            str: Путь к файлу.
+        """
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(text)
+        return path
+
+    def import_catalog(self, path, **options):
+        """
+        Запуск import_catalog с выполнением действий после фиксации пачек (копирование фотографий).
+
+        Аргументы:
+            path (str): Файл каталога.
+            options: Параметры команды.
+
+        Возвращает:
+            str: Вывод команды.
+        """
+        output = io.StringIO()
+        with redirect_stdout(output), self.captureOnCommitCallbacks(execute=True):
+            call_command('import_catalog', path, **options)
+        return output.getvalue()
+
+    def parents(self, dog):
+        return list(Parent.objects.filter(dog=dog).order_by('pk').values_list('name', 'category__name', 'birth_date'))
+
+    def test_ndjson(self):
+        records = [
+            {'name': 'Рекс', 'category': 'Овчарка', 'birth_date': '2020-05-01', 'owner': self.owner.email,
+             'parents': [{'name': 'Граф', 'birth_date': '2015-03-02'}, {'name': 'Альма', 'category': 'Лайка'}]},
+            {'name': 'Найда', 'category': 'Лайка', 'is_active': False},
+            None,
+            {'name': 'Шарик', 'category': 'Лайка', 'owner': 'nobody@example.com'},
+            {'name': 'Тузик', 'category': 'Лайка', 'birth_date': '1900-01-01'},
+            {'name': 'Бобик', 'category': 'Такса', 'parents': [{'name': 'Мать'}]},
+        ]
+        text = '\n'.join('{' if record is None else json.dumps(record, ensure_ascii=False) for record in records)
+        output = self.import_catalog(self.write('dogs.ndjson', text), batch_size=2)
+
+        self.assertIn('Импортировано собак: 3, новых пород: 2, ошибок: 3', output)
+        for number in (3, 4, 5):
+            self.assertIn(f'Строка {number}:', output)
+        dogs = {dog.name: dog for dog in Dog.objects.select_related('category')}
+        self.assertEqual(set(dogs), {'Рекс', 'Найда', 'Бобик'})
+        self.assertEqual(dogs['Рекс'].owner, self.owner)
+        self.assertEqual(dogs['Рекс'].category, self.category)
+        self.assertFalse(dogs['Найда'].is_active)
+        # Порода, появившаяся в первой пачке, во второй берётся из карты, а не создаётся повторно
+        self.assertEqual(Category.objects.filter(name='Лайка').count(), 1)
+        self.assertEqual(self.parents(dogs['Рекс']), [
+            ('Граф', 'Овчарка', datetime.date(2015, 3, 2)), ('Альма', 'Лайка', None),
+        ])
+        self.assertEqual(self.parents(dogs['Бобик']), [('Мать', 'Такса', None)])
+        self.assertQuerySetEqual(search_dogs(Dog.objects.all(), 'таксы'), [dogs['Бобик']])
+        self.assertQuerySetEqual(search_categories(Category.objects.all(), 'лайки'), [dogs['Найда'].category])
+
+    def test_csv(self):
+        rows = [
+            {'name': 'Рекс', 'category': 'Овчарка', 'birth_date': '2020-05-01', 'is_active': 'да',
+             'parent_1_name': 'Граф', 'parent_2_name': 'Альма', 'parent_2_category': 'Лайка'},
+            {'name': '', 'category': 'Овчарка'},
+            {'name': 'Найда', 'category': 'Лайка', 'is_active': 'нет', 'parent_2_name': 'Мать'},
+        ]
+        path = os.path.join(self.directory, 'dogs.csv')
+        # Файл с BOM, как его сохраняет Excel
+        with open(path, 'w', encoding='utf-8-sig', newline='') as stream:
+            writer = csv.DictWriter(stream, CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        output = self.import_catalog(path, owner=self.owner.email, batch_size=1)
+
+        self.assertIn('Импортировано собак: 2, новых пород: 1, ошибок: 1', output)
+        self.assertIn('Строка 3: name: обязательное поле', output)
+        rex, naida = Dog.objects.order_by('pk')
+        self.assertEqual((rex.name, rex.is_active, rex.owner), ('Рекс', True, self.owner))
+        self.assertEqual((naida.name, naida.is_active, naida.owner), ('Найда', False, self.owner))
+        self.assertEqual(self.parents(rex), [('Граф', 'Овчарка', None), ('Альма', 'Лайка', None)])
+        self.assertEqual(self.parents(naida), [('Мать', 'Лайка', None)])
+
+    def test_photos(self):
+        names = ['rex.jpg', '../secret.jpg', os.path.join(self.directory, 'secret.jpg'), 'link.jpg', 'missing.jpg']
+        text = '\n'.join(
+            json.dumps({'name': f'Собака {number}', 'category': 'Овчарка', 'photo': name})
+            for number, name in enumerate(names, 1)
+        )
+        path = self.write('photos.ndjson', text)
+        output = self.import_catalog(path, photos=self.photos)
+
+        self.assertIn('Импортировано собак: 1, новых пород: 0, ошибок: 4', output)
+        for number in (2, 3, 4):
+            self.assertIn(f'Строка {number}: photo: файл {names[number - 1]} вне каталога --photos', output)
+        self.assertIn('Строка 5: photo: файл missing.jpg не найден', output)
+        dog = Dog.objects.get()
+        self.assertEqual(dog.name, 'Собака 1')
+        self.assertTrue(dog.photo.name.startswith('dogs/'))
+        self.assertTrue(dog.photo.storage.exists(dog.photo.name))
+        with Image.open(dog.photo.path) as image:
+            self.assertEqual(image.size, (40, 30))
+        # Без --photos фотографии не читаются вовсе, а несуществующий каталог - ошибка команды
+        output = self.import_catalog(path)
+        self.assertIn('Строка 1: photo: не задан каталог --photos', output)
+        with self.assertRaisesMessage(CommandError, 'Каталог фотографий не найден'):
+            self.import_catalog(path, photos=os.path.join(self.directory, 'missing'))
+        self.assertEqual(Dog.objects.count(), 1)
+
+
+def export_rows(response, fmt):
+    """
+    Строки потоковой выгрузки.
+
+    Аргументы:
+        response (StreamingHttpResponse): Ответ страницы выгрузки.
+        fmt (str): Формат выгрузки.
+
+    Возвращает:
+        list: Строки как словари колонка: значение (в CSV значения - строки).
+    """
+    content = b''.join(response.streaming_content).decode()
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(content)))
+    return [json.loads(line) for line in content.splitlines()]
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS)
+class DogExportTestCase(QueryBudgetMixin, TestCase):
+    """
+    Выгрузка собак: потоковый CSV и NDJSON, неактивные собаки в выгрузке, пользователь видит только своих собак.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = User.objects.create(email='export-other@example.com', role=UserRoles.USER)
+        cls.other_dog = Dog.objects.create(name='Other dog', category=cls.category, owner=cls.other, is_active=False)
+
+    def export(self, role, fmt=None):
+        """
+        Запрос выгрузки собак.
+
+        Аргументы:
+            role (str): Роль пользователя или None для анонима.
+            fmt (str): Параметр format или None.
+
+        Возвращает:
+            HttpResponse: Ответ страницы.
+        """
+        if role is not None:
+            self.client.force_login(self.users[role])
+        return self.client.get(reverse('dogs:export_dogs'), {'format': fmt} if fmt else {})
+
+    def test_csv_for_owner(self):
+        response = self.export(UserRoles.USER)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="dogs.csv"')
+        rows = export_rows(response, 'csv')
+        # Свои собаки вместе с неактивными, чужой собаки нет
+        self.assertEqual([int(row['id']) for row in rows], [dog.pk for dog in self.dogs])
+        self.assertEqual(list(rows[0]), [column for column, _ in DOG_EXPORT_FIELDS])
+        self.assertEqual([row['is_active'] for row in rows[:2]], ['True', 'False'])
+        self.assertEqual({(row['category'], row['owner']) for row in rows},
+                         {(self.category.name, self.users[UserRoles.USER].email)})
+
+    def test_ndjson_for_staff(self):
+        for role in (UserRoles.MODERATOR, UserRoles.ADMIN):
+            response = self.export(role, 'ndjson')
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+            rows = export_rows(response, 'ndjson')
+            self.assertEqual([row['id'] for row in rows], [dog.pk for dog in self.dogs] + [self.other_dog.pk])
+            self.assertEqual(rows[-1], {
+                'id': self.other_dog.pk, 'name': 'Other dog', 'category': self.category.name, 'birth_date': None,
+                'photo': '', 'owner': self.other.email, 'is_active': False, 'view_count': 0,
+            })
+
+    def test_other_user(self):
+        self.client.force_login(self.other)
+        rows = export_rows(self.client.get(reverse('dogs:export_dogs')), 'csv')
+        self.assertEqual([int(row['id']) for row in rows], [self.other_dog.pk])
+
+    def test_anonymous_and_unknown_format(self):
+        response = self.export(None)
+        self.assertRedirects(response, f'{settings.LOGIN_URL}?next={reverse("dogs:export_dogs")}',
+                             fetch_redirect_response=False)
+        self.assertEqual(self.export(UserRoles.USER, 'xml').status_code, 400)
+
+    def test_chunks(self):
+        # Заголовок и 11 строк фрагментами по 4 строки; асинхронная выгрузка отдаёт те же фрагменты
+        chunks = list(iter_export(Dog.objects.all(), DOG_EXPORT_FIELDS, 'csv', chunk_size=4))
+        self.assertEqual([chunk.count('\r\n') for chunk in chunks], [4, 4, 4, 0])
+
+        async def collect():
+            return [chunk async for chunk in aiter_export(Dog.objects.all(), DOG_EXPORT_FIELDS, 'csv', chunk_size=4)]
+
+        self.assertEqual(async_to_sync(collect)(), chunks)
@@ -1,22 +1,25 @@
 from django.urls import path
-from django.views.decorators.cache import cache_page, never_cache
+from django.views.decorators.cache import never_cache
 
-from dogs.views import index, category_dogs, DogListView, DogCreateView, DogDetailView, DogUpdateView, \
-    DogDeleteView, CategoryListView, DogDeactivateListView, dog_toggle_activity, DogSearchListView, CategorySearchListView
+from dogs.async_views import select_view
+from dogs.views import index, category_dogs, acategory_dogs, DogListView, AsyncDogListView, DogCreateView, \
+    DogDetailView, AsyncDogDetailView, DogUpdateView, DogDeleteView, CategoryListView, DogDeactivateListView, \
+    dog_toggle_activity, DogSearchListView, CategorySearchListView, export_dogs
 from dogs.apps import DogsConfig
 
 app_name = DogsConfig.name
 
 urlpatterns = [
-    path('', cache_page(60)(index), name='index'),
-    path('categories/', cache_page(60)(CategoryListView.as_view()), name='categories'),
-    path('categories/<int:pk>/dogs/', category_dogs, name='category_dogs'),
-    path('dogs/', DogListView.as_view(), name='list_dogs'),
+    path('', index, name='index'),
+    path('categories/', CategoryListView.as_view(), name='categories'),
+    path('categories/<int:pk>/dogs/', select_view(category_dogs, acategory_dogs), name='category_dogs'),
+    path('dogs/', select_view(DogListView, AsyncDogListView).as_view(), name='list_dogs'),
     path('dogs/search/', DogSearchListView.as_view(), name='search_dogs'),
     path('dogs/category/search/', CategorySearchListView.as_view(), name='search_categories'),
     path('dogs/deactivate/', DogDeactivateListView.as_view(), name='deactivated_list_dogs'),
+    path('dogs/export/', export_dogs, name='export_dogs'),
     path('dogs/create', DogCreateView.as_view(), name='create_dog'),
-    path('dogs/detail/<int:pk>/', DogDetailView.as_view(), name='detail_dog'),
+    path('dogs/detail/<int:pk>/', select_view(DogDetailView, AsyncDogDetailView).as_view(), name='detail_dog'),
     path('dogs/update/<int:pk>/', never_cache(DogUpdateView.as_view()), name='update_dog'),
     path('dogs/toggle/<int:pk>/', dog_toggle_activity, name='toggle_activity'),
     path('dogs/delete/<int:pk>/', DogDeleteView.as_view(), name='delete_dog'),
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+
+MAX_DOG_AGE_YEARS = 100
+
+
+def validate_birth_date(value):
+    """
+    Валидация даты рождения собаки. Общее правило форм собак и импорта каталога.
+
+    Аргументы:
+        value (date): Дата рождения или None.
+
+    Поднимает исключение:
+        ValidationError: Если собака старше 100 лет.
+    """
+    if value and datetime.now().year - value.year > MAX_DOG_AGE_YEARS:
+        raise ValidationError('Собака должна быть моложе 100 лет')
@@ -1,17 +1,33 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
-from django.forms import inlineformset_factory
-from django.http import Http404
+from django.db import transaction
+from django.db.models import Max
+from django.http import Http404, HttpResponseRedirect
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.response import TemplateResponse
 from django.urls import reverse, reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views.generic import CreateView, ListView, UpdateView, DeleteView, DetailView
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
-from django.db.models import Q
 
-from dogs.models import Category, Dog, Parent
-from dogs.forms import DogForm, ParentForm, DogAdminForm
+from config.db.routers import use_primary
+from dogs.async_views import AsyncDetailView, AsyncListView
+from dogs.catalog import DOG_EXPORT_FIELDS, export_response, export_scope
+from dogs.conditional import AsyncConditionalGetMixin, ConditionalGetMixin, get_list_validators, \
+    not_modified_response, set_validators
+from dogs.counters import arecord_dog_view, record_dog_view
+from dogs.pagination import CursorPaginationMixin
+from dogs.search import search_categories, search_dogs
+from dogs.models import Category, Dog
+from dogs.page_cache import page_cache
+from dogs.forms import DogForm, DogAdminForm, ParentFormset
+from dogs.services import get_categories_cache, get_category
 from users.models import UserRoles
 
 
+@page_cache(Category)
 def index(request):
     """
     Отображение главной страницы сайта.
@@ -20,19 +36,20 @@ def index(request):
         request (HttpRequest): Запрос от клиента.
 
     Контекст:
-        category_object_list (QuerySet): Список первых трех записей из таблицы категорий.
+        category_object_list (list): Список первых трех категорий из кеша.
         title (str): Заголовок страницы.
 
     Возвращает:
         HttpResponse: Ответ с рендером главной страницы.
     """
     context = {
-        'category_object_list': Category.objects.all()[:3],
+        'category_object_list': get_categories_cache()[:3],
         'title': 'Главная'
     }
     return render(request, 'dogs/index.html', context)
 
 
+@method_decorator(page_cache(Category), name='get')
 class CategoryListView(LoginRequiredMixin, ListView):
     """
     Представление списка всех категорий.
@@ -41,6 +58,9 @@ class CategoryListView(LoginRequiredMixin, ListView):
         model (Model): Модель категории.
         extra_context (dict): Дополнительный контекст для шаблона.
         template_name (str): Имя файла шаблона.
+
+    Методы:
+        get_queryset(): Получение списка категорий из кеша.
     """
     model = Category
     extra_context = {
@@ -48,10 +68,20 @@ class CategoryListView(LoginRequiredMixin, ListView):
     }
     template_name = 'dogs/categories.html'
 
+    def get_queryset(self):
+        """
+        Получение списка категорий из кеша.
+
+        Возвращает:
+            list: Список всех категорий.
+        """
+        return get_categories_cache()
+
 
 def category_dogs(request, pk):
     """
     Отображение страницы с собаками определенной породы.
+    Повторный запрос с совпадающим ETag получает ответ 304 без чтения собак.
 
     Параметры:
         request (HttpRequest): Запрос от клиента.
@@ -63,23 +93,69 @@ def category_dogs(request, pk):
         category_pk (int): Идентификатор категории.
 
     Возвращает:
-        HttpResponse: Ответ с рендером страницы с собаками определенной породы.
+        HttpResponse: Ответ с рендером страницы с собаками определенной породы или 304.
+
+    Исключения:
+        Http404: Если категория не найдена.
     """
-    category_item = Category.objects.get(pk=pk)
+    category_item = get_category(pk)
+    if category_item is None:
+        raise Http404
+    etag, last_modified = get_list_validators(request, (Dog, Category))
+    response = not_modified_response(request, etag, last_modified)
+    if response is not None:
+        return response
     context = {
-        'object_list': Dog.objects.filter(category_id=pk),
+        'object_list': Dog.objects.select_related('category').filter(category_id=pk),
         'title': f'Собаки породы - {category_item.name}',
         'category_pk': category_item.pk,
     }
-    return render(request, 'dogs/dogs.html', context)
+    return set_validators(request, render(request, 'dogs/dogs.html', context), etag, last_modified)
 
 
-class DogListView(ListView):
+async def acategory_dogs(request, pk):
     """
-    Представление списка активных собак.
+    Асинхронный вариант category_dogs для ASGI: собаки читаются асинхронным ORM,
+    повторный запрос с совпадающим ETag получает ответ 304 без чтения собак.
+
+    Параметры:
+        request (HttpRequest): Запрос от клиента.
+        pk (int): Первичный ключ категории.
+
+    Контекст:
+        object_list (QuerySet): Список собак выбранной категории.
+        title (str): Заголовок страницы.
+        category_pk (int): Идентификатор категории.
+
+    Возвращает:
+        HttpResponse: Ответ с рендером страницы с собаками определенной породы или 304.
+
+    Исключения:
+        Http404: Если категория не найдена.
+    """
+    category_item = await sync_to_async(get_category)(pk)
+    if category_item is None:
+        raise Http404
+    request.user = await request.auser()
+    etag, last_modified = await sync_to_async(get_list_validators)(request, (Dog, Category))
+    response = not_modified_response(request, etag, last_modified)
+    if response is not None:
+        return response
+    context = {
+        'object_list': [dog async for dog in Dog.objects.select_related('category').filter(category_id=pk)],
+        'title': f'Собаки породы - {category_item.name}',
+        'category_pk': category_item.pk,
+    }
+    return set_validators(request, TemplateResponse(request, 'dogs/dogs.html', context), etag, last_modified)
+
+
+class DogListView(ConditionalGetMixin, CursorPaginationMixin, ListView):
+    """
+    Представление списка активных собак с курсорной пагинацией и условным GET.
 
     Атрибуты:
         model (Model): Модель собаки.
+        validator_models (tuple): Собаки и породы: названия пород выводятся в карточках.
         paginate_by (int): Количество объектов на странице.
         extra_context (dict): Дополнительный контекст для шаблона.
         template_name (str): Имя файла шаблона.
@@ -89,6 +165,7 @@ class DogListView(ListView):
     """
     model = Dog
     paginate_by = 6
+    validator_models = (Dog, Category)
     extra_context = {
         'title': 'Все наши собаки'
     }
@@ -96,22 +173,29 @@ class DogListView(ListView):
 
     def get_queryset(self):
         """
-        Получение QuerySet с активными собаками.
+        Получение QuerySet с активными собаками и их категориями.
 
         Возвращает:
             QuerySet: Фильтрованный список активных собак.
         """
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('category')
         queryset = queryset.filter(is_active=True)
         return queryset
 
 
-class DogDeactivateListView(LoginRequiredMixin, ListView):
+class AsyncDogListView(AsyncConditionalGetMixin, AsyncListView, DogListView):
+    """
+    Асинхронный вариант DogListView для ASGI: строки страницы читаются асинхронным ORM.
+    """
+
+
+class DogDeactivateListView(LoginRequiredMixin, ConditionalGetMixin, ListView):
     """
-    Представление списка неактивных собак.
+    Представление списка неактивных собак с условным GET.
 
     Атрибуты:
         model (Model): Модель собаки.
+        validator_models (tuple): Собаки и породы: названия пород выводятся в карточках.
         extra_context (dict): Дополнительный контекст для шаблона.
         template_name (str): Имя файла шаблона.
 
@@ -119,6 +203,7 @@ class DogDeactivateListView(LoginRequiredMixin, ListView):
         get_queryset(): Переопределенный метод получения QuerySet, который фильтрует неактивные собаки в зависимости от роли пользователя.
     """
     model = Dog
+    validator_models = (Dog, Category)
     extra_context = {
         'title': 'Неактивные собаки'
     }
@@ -131,7 +216,7 @@ class DogDeactivateListView(LoginRequiredMixin, ListView):
         Возвращает:
             QuerySet: Фильтрованный список неактивных собак в зависимости от роли пользователя.
         """
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('category')
         if self.request.user.role in [UserRoles.MODERATOR, UserRoles.ADMIN]:
             queryset = queryset.filter(is_active=False)
         elif self.request.user.role == UserRoles.USER:
@@ -141,34 +226,33 @@ class DogDeactivateListView(LoginRequiredMixin, ListView):
 
 class DogSearchListView(LoginRequiredMixin, ListView):
     """
-    Представление списка результатов поиска собак.
+    Представление списка результатов поиска собак по кличке, породе и отзывам.
 
     Атрибуты:
         model (Model): Модель собаки.
+        paginate_by (int): Количество собак на странице.
         template_name (str): Имя файла шаблона.
 
     Методы:
-        get_queryset(): Переопределенный метод получения QuerySet, который фильтрует результаты поиска.
+        get_queryset(): Переопределенный метод получения QuerySet, который ищет собак поисковым бэкендом.
         get_context_data(**kwargs): Переопределенный метод добавления дополнительного контекста для шаблона.
     """
     model = Dog
+    paginate_by = settings.SEARCH_PAGINATE_BY
     template_name = 'dogs/dogs.html'
 
     def get_queryset(self):
         """
-        Получение QuerySet с результатами поиска собак.
+        Получение QuerySet с результатами поиска собак по убыванию ранга.
 
         Параметры:
-            q (str): Строка запроса.
+            q (str): Строка запроса. Пустой или отсутствующий запрос дает пустой список.
 
         Возвращает:
-            QuerySet: Фильтрованный список собак, соответствующих запросу.
+            QuerySet: Активные собаки, соответствующие запросу.
         """
-        query = self.request.GET.get('q')
-        object_list = Dog.objects.filter(
-            Q(name__icontains=query), is_active=True,
-        )
-        return object_list
+        query = self.request.GET.get('q', '').strip()
+        return search_dogs(Dog.objects.select_related('category').filter(is_active=True), query)
 
     def get_context_data(self, **kwargs):
         """
@@ -181,40 +265,40 @@ class DogSearchListView(LoginRequiredMixin, ListView):
             dict: Обновленный контекст для шаблона.
         """
         context = super().get_context_data(**kwargs)
-        context['title'] = f'Поиск собаки: {self.request.GET.get("q")}'
+        context['q'] = self.request.GET.get('q', '').strip()
+        context['title'] = f'Поиск собаки: {context["q"]}'
         return context
 
 
 class CategorySearchListView(LoginRequiredMixin, ListView):
     """
-    Представление списка результатов поиска пород собак.
+    Представление списка результатов поиска пород собак по названию и описанию.
 
     Атрибуты:
         model (Model): Модель категории.
+        paginate_by (int): Количество пород на странице.
         template_name (str): Имя файла шаблона.
 
     Методы:
-        get_queryset(): Переопределенный метод получения QuerySet, который фильтрует результаты поиска.
+        get_queryset(): Переопределенный метод получения QuerySet, который ищет породы поисковым бэкендом.
         get_context_data(**kwargs): Переопределенный метод добавления дополнительного контекста для шаблона.
     """
     model = Category
+    paginate_by = settings.SEARCH_PAGINATE_BY
     template_name = 'dogs/categories.html'
 
     def get_queryset(self):
         """
-        Получение QuerySet с результатами поиска пород собак.
+        Получение QuerySet с результатами поиска пород по убыванию ранга.
 
         Параметры:
-            q (str): Строка запроса.
+            q (str): Строка запроса. Пустой или отсутствующий запрос дает пустой список.
 
         Возвращает:
-            QuerySet: Фильтрованный список категорий, соответствующих запросу.
+            QuerySet: Породы, соответствующие запросу.
         """
-        query = self.request.GET.get('q')
-        object_list = Category.objects.filter(
-            Q(name__icontains=query),
-        )
-        return object_list
+        query = self.request.GET.get('q', '').strip()
+        return search_categories(Category.objects.all(), query)
 
     def get_context_data(self, **kwargs):
         """
@@ -227,7 +311,8 @@ class CategorySearchListView(LoginRequiredMixin, ListView):
             dict: Обновленный контекст для шаблона.
         """
         context = super().get_context_data(**kwargs)
-        context['title'] = f'Поиск породы: {self.request.GET.get("q")}'
+        context['q'] = self.request.GET.get('q', '').strip()
+        context['title'] = f'Поиск породы: {context["q"]}'
         return context
 
 
@@ -264,25 +349,41 @@ class DogCreateView(LoginRequiredMixin, CreateView):
         """
         if self.request.user.role != UserRoles.USER:
             raise PermissionDenied()
-        self.object = form.save()
-        self.object.owner = self.request.user
-        self.object.save()
-        return super().form_valid(form)
+        # Владелец задаётся до сохранения: собака создаётся одним INSERT
+        form.instance.owner = self.request.user
+        with transaction.atomic():
+            return super().form_valid(form)
 
 
-class DogDetailView(DetailView):
+class DogDetailView(ConditionalGetMixin, DetailView):
     """
     Представление детальной информации о собаке.
+    Повторный запрос с совпадающим ETag получает ответ 304, просмотр при этом всё равно учитывается.
 
     Атрибуты:
         model (Model): Модель собаки.
+        queryset (QuerySet): Собаки вместе с владельцами.
         template_name (str): Имя файла шаблона.
+        validator_fields (tuple): Время изменения собаки и владельца (его имя и телефон на странице) и просмотры:
+            счётчик записывается без смены updated_at.
 
     Методы:
-        get_object(queryset=None): Переопределенный метод получения объекта.
+        get_validator_aggregates(): Владелец собаки для учёта просмотра при ответе 304.
+        not_modified(): Учёт просмотра при ответе 304.
+        get_object(queryset=None): Переопределенный метод получения объекта. Просмотр учитывается в буфере счётчиков.
     """
     model = Dog
+    queryset = Dog.objects.select_related('owner')
     template_name = 'dogs/detail.html'
+    validator_fields = ('updated_at', 'view_count', 'owner__updated_at')
+
+    def get_validator_aggregates(self):
+        return {'owner_id': Max('owner_id')}
+
+    def not_modified(self):
+        owner_id = self.validator_row['owner_id']
+        if self.request.user.pk is None or self.request.user.pk != owner_id:
+            record_dog_view(int(self.kwargs['pk']))
 
     def get_object(self, queryset=None):
         """
@@ -298,28 +399,68 @@ class DogDetailView(DetailView):
             Http404: Если объект не найден.
         """
         self.object = super().get_object(queryset=queryset)
-        if self.request.user != self.object.owner:
+        if self.request.user.pk is None or self.request.user.pk != self.object.owner_id:
+            record_dog_view(self.object.pk)
+            self.object.view_count += 1
+        return self.object
+
+
+class AsyncDogDetailView(AsyncConditionalGetMixin, AsyncDetailView, DogDetailView):
+    """
+    Асинхронный вариант DogDetailView для ASGI: собака читается асинхронным ORM,
+    просмотр учитывается без блокировки цикла событий.
+
+    Методы:
+        anot_modified(): Учёт просмотра при ответе 304.
+        aget_object(queryset=None): Асинхронное получение объекта с учётом просмотра.
+    """
+
+    async def anot_modified(self):
+        owner_id = self.validator_row['owner_id']
+        if self.request.user.pk is None or self.request.user.pk != owner_id:
+            await arecord_dog_view(int(self.kwargs['pk']))
+
+    async def aget_object(self, queryset=None):
+        """
+        Получение объекта собаки.
+
+        Параметры:
+            queryset (QuerySet): Набор запросов.
+
+        Возвращает:
+            Dog: Объект собаки.
+
+        Исключения:
+            Http404: Если объект не найден.
+        """
+        self.object = await super().aget_object(queryset=queryset)
+        if self.request.user.pk is None or self.request.user.pk != self.object.owner_id:
+            await arecord_dog_view(self.object.pk)
             self.object.view_count += 1
-            self.object.save()
         return self.object
 
 
 class DogUpdateView(LoginRequiredMixin, UpdateView):
     """
-    Представление обновления информации о собаке.
+    Представление обновления информации о собаке вместе с родословной.
 
     Атрибуты:
         model (Model): Модель собаки.
+        queryset (QuerySet): Собаки вместе с владельцами (шаблон сравнивает владельца с пользователем).
         template_name (str): Имя файла шаблона.
 
     Методы:
         get_success_url(): Получение URL для перенаправления после успешного обновления.
         get_object(queryset=None): Переопределенный метод получения объекта.
+        get_formset(): Формсет родословной собаки.
         get_context_data(**kwargs): Переопределенный метод добавления дополнительного контекста для шаблона.
-        form_valid(form): Переопределенный метод обработки формы при успешной валидации.
+        post(request, *args, **kwargs): Проверка формы собаки и формсета родословной.
+        form_valid(form, formset): Переопределенный метод обработки формы при успешной валидации.
+        form_invalid(form, formset): Повторный показ формы и формсета с ошибками.
         get_form_class(): Получение класса формы в зависимости от роли пользователя.
     """
     model = Dog
+    queryset = Dog.objects.select_related('owner')
     template_name = 'dogs/create_update.html'
 
     def get_success_url(self):
@@ -345,10 +486,21 @@ class DogUpdateView(LoginRequiredMixin, UpdateView):
             PermissionDenied: Если пользователь не является владельцем или администратором.
         """
         self.object = super().get_object(queryset=queryset)
-        if self.request.user != self.object.owner and self.request.user.role != UserRoles.ADMIN:
+        if self.request.user.pk != self.object.owner_id and self.request.user.role != UserRoles.ADMIN:
             raise PermissionDenied()
         return self.object
 
+    def get_formset(self):
+        """
+        Формсет родословной собаки: связанный с данными POST или пустой для GET.
+
+        Возвращает:
+            ParentFormset: Формсет родителей собаки.
+        """
+        if self.request.method == 'POST':
+            return ParentFormset(self.request.POST, self.request.FILES, instance=self.object)
+        return ParentFormset(instance=self.object)
+
     def get_context_data(self, **kwargs):
         """
         Добавление дополнительного контекста для шаблона.
@@ -359,32 +511,49 @@ class DogUpdateView(LoginRequiredMixin, UpdateView):
         Возвращает:
             dict: Обновленный контекст для шаблона.
         """
-        context_data = super().get_context_data(**kwargs)
-        ParentFormset = inlineformset_factory(Dog, Parent, form=ParentForm, extra=1)
-        if self.request.method == 'POST':
-            formset = ParentFormset(self.request.POST, instance=self.object)
-        else:
-            formset = ParentFormset(instance=self.object)
-        context_data['formset'] = formset
-        return context_data
+        if 'formset' not in kwargs:
+            kwargs['formset'] = self.get_formset()
+        return super().get_context_data(**kwargs)
 
-    def form_valid(self, form):
+    def post(self, request, *args, **kwargs):
         """
-        Обработка формы при успешной валидации.
+        Проверка формы собаки и формсета родословной. Формсет строится один раз на запрос.
+
+        Возвращает:
+            HttpResponse: Перенаправление после сохранения или форма с ошибками.
+        """
+        self.object = self.get_object()
+        form = self.get_form()
+        formset = self.get_formset()
+        if form.is_valid() and formset.is_valid():
+            return self.form_valid(form, formset)
+        return self.form_invalid(form, formset)
+
+    def form_valid(self, form, formset):
+        """
+        Обработка формы при успешной валидации: собака и родословная сохраняются в одной транзакции.
 
         Параметры:
             form (DogForm): Форма для обновления собаки.
+            formset (ParentFormset): Формсет родословной.
 
         Возвращает:
             HttpResponseRedirect: Перенаправление на страницу успеха.
         """
-        context_data = self.get_context_data()
-        formset = context_data['formset']
-        self.object = form.save()
-        if formset.is_valid():
+        with transaction.atomic():
+            self.object = form.save()
             formset.instance = self.object
             formset.save()
-        return super().form_valid(form)
+        return HttpResponseRedirect(self.get_success_url())
+
+    def form_invalid(self, form, formset):
+        """
+        Повторный показ формы собаки и формсета родословной с ошибками.
+
+        Возвращает:
+            HttpResponse: Страница редактирования.
+        """
+        return self.render_to_response(self.get_context_data(form=form, formset=formset))
 
     def get_form_class(self):
         """
@@ -437,6 +606,7 @@ class DogDeleteView(LoginRequiredMixin, DeleteView, PermissionRequiredMixin):
         return self.object
 
 
+@use_primary
 def dog_toggle_activity(request, pk):
     """
     Переключение активности собаки.
@@ -458,3 +628,19 @@ def dog_toggle_activity(request, pk):
         dog_item.is_active = True
     dog_item.save()
     return redirect(reverse('dogs:list_dogs'))
+
+
+@login_required
+def export_dogs(request):
+    """
+    Потоковая выгрузка собак в CSV или NDJSON (параметр format). Модератор и администратор
+    выгружают всех собак, пользователь - только своих. Колонки совпадают с форматом import_catalog.
+
+    Параметры:
+        request (HttpRequest): Запрос от клиента.
+
+    Возвращает:
+        StreamingHttpResponse: Файл выгрузки.
+    """
+    queryset = export_scope(Dog.objects.all(), request.user, 'owner')
+    return export_response(request, queryset, DOG_EXPORT_FIELDS, 'dogs')
@@ -0,0 +1,10 @@
+# Настройки gunicorn: gunicorn config.wsgi подхватывает этот файл из текущего каталога
+
+
+def worker_exit(server, worker):
+    """
+    Сброс локального буфера просмотров при остановке воркера (выполняется в процессе воркера).
+    """
+    from dogs.counters import flush_on_shutdown
+
+    flush_on_shutdown()
@@ -13,18 +13,32 @@ class ReviewForm(StyleFormMixin, forms.ModelForm):
         dog (ModelChoiceField): Скрытое поле для выбора собаки, к которой относится отзыв.
         title (CharField): Заголовок отзыва.
         content (TextInput): Содержимое отзыва.
-        slug (SlugField): Скрытое поле для уникального идентификатора отзыва.
+        slug (SlugField): Скрытое поле для уникального идентификатора отзыва. У нового отзыва пустое,
+            слаг выделяется при сохранении.
 
     Метаданные:
         model (Review): Модель отзыва.
         fields (list): Список полей, включаемых в форму.
+
+    Методы:
+        clean_slug(self): Слаг из формы или текущий слаг отзыва.
     """
 
     dog = forms.ModelChoiceField(queryset=Dog.objects.all(), required=False, widget=forms.HiddenInput())
     title = forms.CharField(max_length=150, label='Заголовок')
     content = forms.TextInput()
-    slug = forms.SlugField(max_length=20, initial='temp_slug', widget=forms.HiddenInput())
+    slug = forms.SlugField(max_length=25, required=False, widget=forms.HiddenInput())
 
     class Meta:
         model = Review
         fields = ['dog', 'title', 'content', 'slug']
+
+    def clean_slug(self):
+        """
+        Слаг отзыва. Пустой слаг при редактировании не затирает текущий, а у нового отзыва
+        остаётся пустым до выделения в insert_with_slug.
+
+        Возвращает:
+            str: Слаг или None.
+        """
+        return self.cleaned_data['slug'] or self.instance.slug or None
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.9 on 2026-10-17 18:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dogs', '0009_dog_indexes'),
+        ('reviews', '0002_alter_review_options_alter_review_slug'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='review',
+            options={'ordering': ['-timestamp', '-id'], 'verbose_name': 'review', 'verbose_name_plural': 'reviews'},
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('sign_of_review', True)), fields=['-timestamp', '-id'], name='review_active_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('sign_of_review', False)), fields=['-timestamp', '-id'], name='review_inactive_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('sign_of_review', True)), fields=['dog', '-timestamp', '-id'], name='review_dog_active_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('sign_of_review', False)), fields=['dog', '-timestamp', '-id'], name='review_dog_inactive_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('sign_of_review', False)), fields=['author', '-timestamp', '-id'], name='review_author_inactive_ts_idx'),
+        ),
+    ]
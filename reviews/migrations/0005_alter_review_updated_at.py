@@ -0,0 +1,19 @@
+# Generated by Django 5.0.9 on 2026-10-17 20:34
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_review_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='review',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_default=django.db.models.functions.datetime.Now(), verbose_name='updated_at'),
+        ),
+    ]
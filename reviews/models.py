@@ -1,10 +1,35 @@
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Now
 from django.conf import settings
 from django.urls import reverse
 from users.models import NULLABLE
 from dogs.models import Dog
 
 
+class ReviewQuerySet(models.QuerySet):
+    """
+    Набор запросов отзывов.
+
+    Методы:
+        cards(): Плоская проекция для карточек отзывов.
+    """
+
+    def cards(self):
+        """
+        Плоская проекция отзыва для карточек: поля отзыва, имя и порода собаки, имя и фамилия автора одним запросом.
+
+        Возвращает:
+            QuerySet: Отзывы с аннотациями dog_name, dog_breed, author_first_name и author_last_name.
+        """
+        return self.only('title', 'slug', 'timestamp', 'sign_of_review', 'author', 'dog').annotate(
+            dog_name=F('dog__name'),
+            dog_breed=F('dog__category__name'),
+            author_first_name=F('author__first_name'),
+            author_last_name=F('author__last_name'),
+        )
+
+
 class Review(models.Model):
     """
     Модель отзыва.
@@ -17,6 +42,7 @@ class Review(models.Model):
         sign_of_review (BooleanField): Признак наличия подписи под отзывом.
         author (ForeignKey): Автор отзыва.
         dog (ForeignKey): Собака, к которой относится отзыв.
+        updated_at (DateTimeField): Время последнего изменения (валидатор условного GET).
 
     Методы:
         __str__(): Возвращает заголовок отзыва.
@@ -25,16 +51,21 @@ class Review(models.Model):
     Метакласс:
         verbose_name: Название модели в единственном числе.
         verbose_name_plural: Название модели во множественном числе.
+        ordering: Сортировка от новых к старым, id разрешает совпадения времени.
+        indexes: Частичные индексы активных и неактивных отзывов под фильтры и сортировку списков.
     """
 
     title = models.CharField(max_length=150, verbose_name='title')
     slug = models.SlugField(max_length=25, unique=True, db_index=True, verbose_name='URL')
     content = models.TextField(verbose_name='content')
     timestamp = models.DateTimeField(auto_now_add=True, verbose_name='timestamp')
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now(), verbose_name='updated_at')
     sign_of_review = models.BooleanField(default=True, verbose_name='sign of')
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, **NULLABLE, verbose_name='author')
     dog = models.ForeignKey(Dog, on_delete=models.CASCADE, verbose_name='dog')
 
+    objects = ReviewQuerySet.as_manager()
+
     def __str__(self):
         """
         Возвращает строковое представление объекта отзыва.
@@ -50,3 +81,14 @@ class Review(models.Model):
     class Meta:
         verbose_name = 'review'
         verbose_name_plural = 'reviews'
+        ordering = ['-timestamp', '-id']
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], condition=Q(sign_of_review=True), name='review_active_ts_idx'),
+            models.Index(fields=['-timestamp', '-id'], condition=Q(sign_of_review=False), name='review_inactive_ts_idx'),
+            models.Index(fields=['dog', '-timestamp', '-id'], condition=Q(sign_of_review=True),
+                         name='review_dog_active_ts_idx'),
+            models.Index(fields=['dog', '-timestamp', '-id'], condition=Q(sign_of_review=False),
+                         name='review_dog_inactive_ts_idx'),
+            models.Index(fields=['author', '-timestamp', '-id'], condition=Q(sign_of_review=False),
+                         name='review_author_inactive_ts_idx'),
+        ]
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from reviews.models import Review
+
+REVIEW_CARD_FIELDS = (
+    'pk', 'title', 'slug', 'timestamp', 'sign_of_review', 'author_id', 'dog_id',
+    'dog_name', 'dog_breed', 'author_first_name', 'author_last_name',
+)
+# Выгрузка отзывов: (колонка, поле values_list), см. dogs.catalog.export_response
+REVIEW_EXPORT_FIELDS = (
+    ('id', 'pk'), ('slug', 'slug'), ('title', 'title'), ('content', 'content'), ('is_active', 'sign_of_review'),
+    ('timestamp', 'timestamp'), ('dog_id', 'dog_id'), ('dog', 'dog__name'), ('author', 'author__email'),
+)
+
+
+def review_card_key(pk):
+    """
+    Ключ кеша карточки отзыва.
+
+    Аргументы:
+        pk (int): ID отзыва.
+
+    Возвращает:
+        str: Ключ кеша.
+    """
+    return f'review_card:{pk}'
+
+
+def get_review_cards(pks):
+    """
+    Получение карточек отзывов из кеша. Отсутствующие карточки строятся одним запросом проекции и кешируются.
+
+    Аргументы:
+        pks (list): ID отзывов в нужном порядке.
+
+    Возвращает:
+        list: Карточки отзывов (словари с полями REVIEW_CARD_FIELDS) в порядке pks.
+    """
+    cards = {
+        card['pk']: card
+        for card in cache.get_many([review_card_key(pk) for pk in pks]).values()
+    }
+    missing = [pk for pk in pks if pk not in cards]
+    if missing:
+        built = {
+            card['pk']: card
+            for card in Review.objects.filter(pk__in=missing).cards().values(*REVIEW_CARD_FIELDS)
+        }
+        cache.set_many(
+            {review_card_key(pk): card for pk, card in built.items()},
+            settings.REVIEW_CARD_CACHE_TIMEOUT,
+        )
+        cards.update(built)
+    return [cards[pk] for pk in pks if pk in cards]
+
+
+def invalidate_review_cards(pks):
+    """
+    Удаление карточек отзывов из кеша после фиксации транзакции: иначе параллельный запрос успел бы
+    прочитать из базы ещё старые строки и снова положить в кеш устаревшую карточку.
+    ID читаются сразу, пока изменённые строки видны в транзакции.
+
+    Аргументы:
+        pks (Iterable): ID отзывов.
+    """
+    keys = [review_card_key(pk) for pk in pks]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
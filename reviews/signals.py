@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from dogs.models import Category, Dog, SearchKind
+from dogs.search import token_index_enabled
+from dogs.services import schedule_search_index
+from reviews.models import Review
+from reviews.services import invalidate_review_cards
+from users.models import User
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_review_card(sender, instance, **kwargs):
+    """
+    Сброс карточки изменённого или удалённого отзыва.
+
+    Аргументы:
+       instance (Review): Изменённый отзыв.
+       kwargs: Параметры, переданные сигналом.
+    """
+    if settings.REVIEW_CARD_CACHE:
+        invalidate_review_cards([instance.pk])
+
+
+@receiver(post_save, sender=Dog)
+def invalidate_dog_review_cards(sender, instance, **kwargs):
+    """
+    Сброс карточек отзывов о собаке, имя или порода которой могли измениться.
+
+    Аргументы:
+       instance (Dog): Изменённая собака.
+       kwargs: Параметры, переданные сигналом.
+    """
+    if settings.REVIEW_CARD_CACHE:
+        invalidate_review_cards(Review.objects.filter(dog=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Category)
+def invalidate_category_review_cards(sender, instance, **kwargs):
+    """
+    Сброс карточек отзывов о собаках изменённой породы.
+
+    Аргументы:
+       instance (Category): Изменённая порода.
+       kwargs: Параметры, переданные сигналом.
+    """
+    if settings.REVIEW_CARD_CACHE:
+        invalidate_review_cards(Review.objects.filter(dog__category=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_review_cards(sender, instance, update_fields=None, **kwargs):
+    """
+    Сброс карточек отзывов автора, имя или фамилия которого могли измениться.
+    Обновление одного last_login при входе карточки не затрагивает.
+
+    Аргументы:
+       instance (User): Изменённый пользователь.
+       update_fields (frozenset): Сохранённые поля.
+       kwargs: Параметры, переданные сигналом.
+    """
+    if settings.REVIEW_CARD_CACHE and update_fields != frozenset({'last_login'}):
+        invalidate_review_cards(Review.objects.filter(author=instance).values_list('pk', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Review)
+def index_review_dog(sender, instance, raw=False, **kwargs):
+    """
+    Постановка переиндексации собаки в очередь: тексты отзывов о ней входят в её поисковый документ.
+
+    Аргументы:
+       instance (Review): Изменённый отзыв.
+       raw (bool): Загрузка фикстуры, индекс строится командой rebuild_search_index.
+       kwargs: Параметры, переданные сигналом.
+    """
+    if not raw and token_index_enabled():
+        schedule_search_index(SearchKind.DOG, [instance.dog_id])
@@ -1,3 +1,161 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from dogs.models import Category, Dog
+from dogs.tests import QUERY_BUDGET_SETTINGS, QueryBudgetMixin, export_rows
+from reviews import utils
+from reviews.models import Review
+from reviews.services import get_review_cards, review_card_key
+from users.models import User, UserRoles
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS)
+class ReviewQueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """Бюджет SQL-запросов страниц reviews."""
+
+    def test_all_reviews(self):
+        self.assertQueryBudget('reviews:all_reviews', [], UserRoles.USER, 3, 2)
+        self.assertQueryBudget('reviews:all_inactive_reviews', [], UserRoles.USER, 3, 2)
+
+    def test_dog_reviews(self):
+        self.assertQueryBudget('reviews:reviews_list', [self.dogs[0].pk], UserRoles.USER, 4, 2)
+        self.assertQueryBudget('reviews:inactive_reviews_list', [self.dogs[0].pk], UserRoles.USER, 4, 2)
+
+    def test_review_detail(self):
+        self.assertQueryBudget('reviews:review_detail', [self.reviews[0].slug], UserRoles.USER, 4, 3)
+
+
+class ReviewSlugTestCase(TestCase):
+    """Создание отзыва одним INSERT с повтором при занятом слаге и выделение слагов для импорта."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='slug-user@example.com', role=UserRoles.USER)
+        cls.dog = Dog.objects.create(name='Slug dog', category=Category.objects.create(name='Slug category'),
+                                     owner=cls.user)
+        cls.review = Review.objects.create(title='Taken', slug='taken-slug', content='Taken', dog=cls.dog,
+                                           author=cls.user)
+
+    def new_review(self, **kwargs):
+        return Review(title='New', content='New', dog=self.dog, author=self.user, **kwargs)
+
+    def patch_slugs(self, *slugs):
+        return mock.patch.object(utils, 'slug_generator', side_effect=slugs)
+
+    def test_retry_on_taken_slug(self):
+        with self.patch_slugs('taken-slug', 'taken-slug', 'free-slug'):
+            review = utils.insert_with_slug(self.new_review())
+        self.assertEqual(review.slug, 'free-slug')
+        self.assertTrue(Review.objects.filter(pk=review.pk, slug='free-slug').exists())
+
+    def test_manual_slug_is_not_replaced(self):
+        with self.patch_slugs('free-slug') as generator, self.assertRaises(IntegrityError):
+            utils.insert_with_slug(self.new_review(slug='taken-slug'))
+        generator.assert_not_called()
+
+    def test_attempts_exhausted(self):
+        with self.patch_slugs('taken-slug', 'taken-slug'), self.assertRaises(IntegrityError):
+            utils.insert_with_slug(self.new_review(), attempts=2)
+        self.assertEqual(Review.objects.count(), 1)
+
+    def test_create_view(self):
+        self.client.force_login(self.user)
+        with self.patch_slugs('taken-slug', 'view-slug'):
+            response = self.client.post(reverse('reviews:review_create', args=[self.dog.pk]),
+                                        {'title': 'From view', 'content': 'From view'})
+        self.assertRedirects(response, reverse('reviews:review_detail', args=['view-slug']),
+                             fetch_redirect_response=False)
+        self.assertEqual(Review.objects.get(slug='view-slug').author, self.user)
+
+    def test_allocate_slugs(self):
+        with self.patch_slugs('taken-slug', 'first', 'first', 'second', 'third'), \
+                mock.patch.object(utils, 'SLUG_CHECK_CHUNK', 1):
+            slugs = utils.allocate_slugs(Review, 2)
+        self.assertCountEqual(slugs, ['first', 'second'])
+
+
+@override_settings(**{**QUERY_BUDGET_SETTINGS, 'REVIEW_CARD_CACHE': True})
+class ReviewCardCacheTestCase(QueryBudgetMixin, TestCase):
+    """Карточки отзывов удаляются из кеша только после фиксации изменившей их транзакции."""
+
+    def assertCachedTitle(self, review, title):
+        self.assertEqual(cache.get(review_card_key(review.pk))['title'], title)
+
+    def test_review_change(self):
+        review = self.reviews[0]
+        get_review_cards([review.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            review.title = 'Changed'
+            review.save()
+            # До фиксации параллельный запрос видит старую строку, поэтому карточка ещё в кеше
+            self.assertCachedTitle(review, 'Bench review 0')
+        self.assertIsNone(cache.get(review_card_key(review.pk)))
+        self.assertEqual(get_review_cards([review.pk])[0]['title'], 'Changed')
+
+    def test_author_change(self):
+        get_review_cards([review.pk for review in self.reviews])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            author = self.users[UserRoles.USER]
+            author.first_name = 'Renamed'
+            author.save()
+        self.assertTrue(callbacks)
+        self.assertEqual(cache.get_many([review_card_key(review.pk) for review in self.reviews]), {})
+        self.assertEqual({card['author_first_name'] for card in get_review_cards([self.reviews[0].pk])}, {'Renamed'})
+
+    def test_uncommitted_change_keeps_card(self):
+        review = self.reviews[0]
+        get_review_cards([review.pk])
+        with self.captureOnCommitCallbacks(execute=False):
+            review.title = 'Rolled back'
+            review.save()
+        self.assertCachedTitle(review, 'Bench review 0')
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS)
+class ReviewExportTestCase(QueryBudgetMixin, TestCase):
+    """
+    Выгрузка отзывов: потоковый CSV и NDJSON, неактивные отзывы в выгрузке, пользователь видит только свои отзывы,
+    в том числе о чужих собаках.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = User.objects.create(email='export-other@example.com', role=UserRoles.USER)
+        other_dog = Dog.objects.create(name='Other dog', category=cls.category, owner=cls.other)
+        cls.other_review = Review.objects.create(title='Other review', slug='export-other', content='Other',
+                                                 dog=other_dog, author=cls.other, sign_of_review=False)
+        # Отзыв пользователя о чужой собаке
+        cls.own_review = Review.objects.create(title='Own review', slug='export-own', content='Own',
+                                               dog=other_dog, author=cls.users[UserRoles.USER])
+
+    def export(self, user, fmt='csv'):
+        self.client.force_login(user)
+        return self.client.get(reverse('reviews:export_reviews'), {'format': fmt})
+
+    def test_csv_for_author(self):
+        response = self.export(self.users[UserRoles.USER])
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="reviews.csv"')
+        rows = export_rows(response, 'csv')
+        self.assertEqual([int(row['id']) for row in rows],
+                         [review.pk for review in self.reviews] + [self.own_review.pk])
+        self.assertEqual([row['is_active'] for row in rows[:2]], ['True', 'False'])
+        self.assertEqual(rows[-1]['dog'], 'Other dog')
+
+    def test_ndjson_for_staff(self):
+        for role in (UserRoles.MODERATOR, UserRoles.ADMIN):
+            rows = export_rows(self.export(self.users[role], 'ndjson'), 'ndjson')
+            self.assertEqual({row['id'] for row in rows},
+                             {review.pk for review in self.reviews} | {self.other_review.pk, self.own_review.pk})
+            other = next(row for row in rows if row['id'] == self.other_review.pk)
+            self.assertEqual((other['slug'], other['is_active'], other['author'], other['dog_id']),
+                             ('export-other', False, self.other.email, self.other_review.dog_id))
+
+    def test_other_user(self):
+        rows = export_rows(self.export(self.other), 'csv')
+        self.assertEqual([int(row['id']) for row in rows], [self.other_review.pk])
@@ -1,9 +1,16 @@
+import secrets
 import string
-import random
+
+from django.db import IntegrityError, router, transaction
+
+# Сколько слагов проверяется одним запросом: SQL Server принимает не больше 2100 параметров
+SLUG_CHECK_CHUNK = 1000
+
 
 def slug_generator(size=20, chars=string.ascii_letters + string.digits):
     """
     Генерирует уникальный слаг (случайная строка символов).
+    Используется secrets: после fork воркеров последовательности не повторяются.
 
     Аргументы:
         size (int): Длина генерируемого слога. По умолчанию 20.
@@ -12,4 +19,69 @@ def slug_generator(size=20, chars=string.ascii_letters + string.digits):
     Возвращает:
         str: Сгенерированный слаг заданной длины.
     """
-    return ''.join(random.choice(chars) for _ in range(size))
\ No newline at end of file
+    return ''.join(secrets.choice(chars) for _ in range(size))
+
+
+def allocate_slugs(model, count, size=20, field='slug'):
+    """
+    Выделение слагов для массового создания объектов (импорт): слаги не совпадают между собой
+    и с уже сохранёнными. Занятые слаги ищутся одним запросом на SLUG_CHECK_CHUNK кандидатов,
+    совпавшие генерируются заново.
+
+    Аргументы:
+        model (Model): Модель с уникальным полем слага.
+        count (int): Сколько слагов нужно.
+        size (int): Длина слага.
+        field (str): Имя поля слага.
+
+    Возвращает:
+        list: Список из count свободных слагов.
+    """
+    slugs = set()
+    while len(slugs) < count:
+        candidates = set()
+        while len(slugs) + len(candidates) < count:
+            slug = slug_generator(size)
+            if slug not in slugs:
+                candidates.add(slug)
+        pending = list(candidates)
+        for start in range(0, len(pending), SLUG_CHECK_CHUNK):
+            chunk = pending[start:start + SLUG_CHECK_CHUNK]
+            candidates -= set(model._default_manager.filter(**{f'{field}__in': chunk}).values_list(field, flat=True))
+        slugs |= candidates
+    return list(slugs)
+
+
+def insert_with_slug(instance, size=20, field='slug', attempts=5):
+    """
+    Создание объекта одним INSERT. Если слаг не задан, он генерируется; при конфликте уникальности
+    слага (другой запрос занял его раньше) INSERT повторяется с новым слагом.
+    Заданный вручную слаг не заменяется, ошибка поднимается как есть.
+
+    Аргументы:
+        instance (Model): Новый, ещё не сохранённый объект.
+        size (int): Длина генерируемого слага.
+        field (str): Имя поля слага.
+        attempts (int): Число попыток вставки.
+
+    Исключения:
+        IntegrityError: Если слаг задан вручную и занят, попытки исчерпаны или нарушено другое ограничение.
+
+    Возвращает:
+        Model: Сохранённый объект.
+    """
+    model = type(instance)
+    using = router.db_for_write(model, instance=instance)
+    generated = not getattr(instance, field)
+    for attempt in range(attempts):
+        if generated:
+            setattr(instance, field, slug_generator(size))
+        try:
+            with transaction.atomic(using=using):
+                instance.save(force_insert=True, using=using)
+            return instance
+        except IntegrityError:
+            # Повтор только при занятом слаге: другие нарушения целостности новый слаг не исправит
+            if not generated or attempt == attempts - 1 or not model._default_manager.using(using).filter(
+                    **{field: getattr(instance, field)}).exists():
+                raise
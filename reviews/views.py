@@ -1,18 +1,87 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
+from django.db import transaction
 from django.http import HttpResponseRedirect, HttpResponseForbidden
-from django.shortcuts import get_object_or_404
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.urls import reverse
-from django.views.generic import CreateView, ListView, DetailView, DeleteView, UpdateView
+from django.views.generic import CreateView, DeleteView, DetailView, ListView, UpdateView
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 
-from dogs.models import Dog
+from config.db.routers import use_primary
+from dogs.async_views import AsyncDetailView, AsyncListView, AsyncLoginRequiredMixin
+from dogs.conditional import AsyncConditionalGetMixin, ConditionalGetMixin
+from dogs.catalog import export_response, export_scope
+from dogs.models import Category, Dog
+from dogs.pagination import CursorPaginationMixin
 from reviews.forms import ReviewForm
 from reviews.models import Review
-from reviews.utils import slug_generator
-from users.models import UserRoles
+from reviews.services import REVIEW_EXPORT_FIELDS, get_review_cards
+from reviews.utils import insert_with_slug
+from users.models import User, UserRoles
 
 
-class AllDogReviewListView(LoginRequiredMixin, ListView):
+class ReviewCardListMixin(ConditionalGetMixin, CursorPaginationMixin):
+    """
+    Миксин для списков отзывов с курсорной пагинацией и условным GET. Карточки страницы строятся одним запросом
+    плоской проекции Review.objects.cards(). При включенном REVIEW_CARD_CACHE страница выбирает
+    только ID и время отзывов, а карточки берутся из кеша.
+
+    Атрибуты:
+        validator_models (tuple): Отзывы, собаки, авторы и породы собак, выводимые в карточках.
+
+    Методы:
+        get_page_queryset(self, queryset): QuerySet строк страницы.
+        get_page_objects(self, rows): Подстановка карточек отзывов.
+        aget_page_objects(self, rows): Подстановка карточек отзывов в асинхронном представлении.
+    """
+    validator_models = (Review, Dog, User, Category)
+
+    def get_page_queryset(self, queryset):
+        """
+        QuerySet строк страницы: проекция карточек или только ключ сортировки при кеше карточек.
+
+        Аргументы:
+            queryset (QuerySet): Отзывы списка.
+
+        Возвращает:
+            QuerySet: Строки страницы.
+        """
+        if settings.REVIEW_CARD_CACHE:
+            return queryset.values('id', 'timestamp')
+        return queryset.cards()
+
+    def get_page_objects(self, rows):
+        """
+        Подстановка карточек отзывов из кеша.
+
+        Аргументы:
+            rows (list): Строки страницы.
+
+        Возвращает:
+            list: Карточки отзывов.
+        """
+        if settings.REVIEW_CARD_CACHE:
+            return get_review_cards([row['id'] for row in rows])
+        return rows
+
+    async def aget_page_objects(self, rows):
+        """
+        Подстановка карточек отзывов из кеша: обращение к кешу и догрузка карточек выполняются в потоке.
+
+        Аргументы:
+            rows (list): Строки страницы.
+
+        Возвращает:
+            list: Карточки отзывов.
+        """
+        if settings.REVIEW_CARD_CACHE:
+            return await sync_to_async(get_review_cards)([row['id'] for row in rows])
+        return rows
+
+
+class AllDogReviewListView(LoginRequiredMixin, ReviewCardListMixin, ListView):
     """
     Представление для отображения списка всех активированных отзывов о собаках.
 
@@ -45,7 +114,13 @@ class AllDogReviewListView(LoginRequiredMixin, ListView):
         return queryset
 
 
-class AllInactiveDogReviewListView(LoginRequiredMixin, ListView):
+class AsyncAllDogReviewListView(AsyncLoginRequiredMixin, AsyncConditionalGetMixin, AsyncListView, AllDogReviewListView):
+    """
+    Асинхронный вариант AllDogReviewListView для ASGI: отзывы читаются асинхронным ORM.
+    """
+
+
+class AllInactiveDogReviewListView(LoginRequiredMixin, ReviewCardListMixin, ListView):
     """
     Представление для отображения списка всех неактивных отзывов о собаках.
 
@@ -80,7 +155,14 @@ class AllInactiveDogReviewListView(LoginRequiredMixin, ListView):
         return queryset
 
 
-class DogReviewListView(LoginRequiredMixin, ListView):
+class AsyncAllInactiveDogReviewListView(AsyncLoginRequiredMixin, AsyncConditionalGetMixin, AsyncListView,
+                                        AllInactiveDogReviewListView):
+    """
+    Асинхронный вариант AllInactiveDogReviewListView для ASGI: отзывы читаются асинхронным ORM.
+    """
+
+
+class DogReviewListView(LoginRequiredMixin, ReviewCardListMixin, ListView):
     """
     Представление для отображения списка активированных отзывов о конкретной собаке.
 
@@ -119,12 +201,38 @@ class DogReviewListView(LoginRequiredMixin, ListView):
             dict: Контекст для рендеринга шаблона.
         """
         context = super().get_context_data(**kwargs)
-        context['title'] = f'Отзывы о собаке: {get_object_or_404(Dog, pk=self.kwargs['pk'])}'
+        dog = get_object_or_404(Dog.objects.select_related('category'), pk=self.kwargs['pk'])
+        context['title'] = f'Отзывы о собаке: {dog}'
         context['pk'] = self.kwargs['pk']
         return context
 
 
-class InactiveDogReviewListView(LoginRequiredMixin, ListView):
+class AsyncDogReviewListView(AsyncLoginRequiredMixin, AsyncConditionalGetMixin, AsyncListView, DogReviewListView):
+    """
+    Асинхронный вариант DogReviewListView для ASGI: отзывы и собака читаются асинхронным ORM.
+
+    Методы:
+        aget_context_data(self, **kwargs): Формирование дополнительного контекста для передачи в шаблон.
+    """
+
+    async def aget_context_data(self, **kwargs):
+        """
+        Формирование дополнительного контекста для передачи в шаблон.
+
+        Аргументы:
+            **kwargs: Именованные аргументы.
+
+        Возвращает:
+            dict: Контекст для рендеринга шаблона.
+        """
+        context = await super().aget_context_data(**kwargs)
+        dog = await aget_object_or_404(Dog.objects.select_related('category'), pk=self.kwargs['pk'])
+        context['title'] = f'Отзывы о собаке: {dog}'
+        context['pk'] = self.kwargs['pk']
+        return context
+
+
+class InactiveDogReviewListView(LoginRequiredMixin, ReviewCardListMixin, ListView):
     """
     Представление для отображения списка неактивированных отзывов о конкретной собаке.
 
@@ -165,7 +273,34 @@ class InactiveDogReviewListView(LoginRequiredMixin, ListView):
             dict: Контекст для рендеринга шаблона.
         """
         context = super().get_context_data(**kwargs)
-        context['title'] = f'Неактивные отзывы о собаке: {get_object_or_404(Dog, pk=self.kwargs['pk'])}'
+        dog = get_object_or_404(Dog.objects.select_related('category'), pk=self.kwargs['pk'])
+        context['title'] = f'Неактивные отзывы о собаке: {dog}'
+        context['pk'] = self.kwargs['pk']
+        return context
+
+
+class AsyncInactiveDogReviewListView(AsyncLoginRequiredMixin, AsyncConditionalGetMixin, AsyncListView,
+                                     InactiveDogReviewListView):
+    """
+    Асинхронный вариант InactiveDogReviewListView для ASGI: отзывы и собака читаются асинхронным ORM.
+
+    Методы:
+        aget_context_data(self, **kwargs): Формирование дополнительного контекста для передачи в шаблон.
+    """
+
+    async def aget_context_data(self, **kwargs):
+        """
+        Формирование дополнительного контекста для передачи в шаблон.
+
+        Аргументы:
+            **kwargs: Именованные аргументы.
+
+        Возвращает:
+            dict: Контекст для рендеринга шаблона.
+        """
+        context = await super().aget_context_data(**kwargs)
+        dog = await aget_object_or_404(Dog.objects.select_related('category'), pk=self.kwargs['pk'])
+        context['title'] = f'Неактивные отзывы о собаке: {dog}'
         context['pk'] = self.kwargs['pk']
         return context
 
@@ -246,12 +381,11 @@ class DogReviewCreateView(LoginRequiredMixin, CreateView):
             return HttpResponseForbidden()
         if not form.instance.dog_id:
             form.instance.dog_id = self.kwargs['pk']
-        self.object = form.save()
-        if self.object.slug == 'temp_slug':
-            self.object.slug = slug_generator()
-        self.object.author = self.request.user
-        self.object.save()
-        return super().form_valid(form)
+        form.instance.author = self.request.user
+        # Один INSERT с уже выделенным слагом и автором вместо вставки и повторного сохранения
+        with transaction.atomic():
+            self.object = insert_with_slug(form.save(commit=False))
+        return HttpResponseRedirect(self.get_success_url())
 
     def get_success_url(self):
         """
@@ -302,17 +436,29 @@ class DogReviewDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteVie
         return reverse('reviews:reviews_list', args=[self.object.dog.pk])
 
 
-class DogReviewDetailView(LoginRequiredMixin, DetailView):
+class DogReviewDetailView(LoginRequiredMixin, ConditionalGetMixin, DetailView):
     """
     Представление для отображения деталей конкретного отзыва.
+    Повторный запрос с совпадающим ETag получает ответ 304.
 
     Атрибуты:
         model (Review): Модель отзывов.
+        queryset (QuerySet): Отзывы вместе с авторами.
+        validator_fields (tuple): Время изменения отзыва и автора.
     """
 
     model = Review
+    queryset = Review.objects.select_related('author')
+    validator_fields = ('updated_at', 'author__updated_at')
 
 
+class AsyncDogReviewDetailView(AsyncLoginRequiredMixin, AsyncConditionalGetMixin, AsyncDetailView, DogReviewDetailView):
+    """
+    Асинхронный вариант DogReviewDetailView для ASGI: отзыв читается асинхронным ORM.
+    """
+
+
+@use_primary
 def review_toggle_activity(request, slug):
     """
     Переключение статуса активности отзыва.
@@ -333,3 +479,19 @@ def review_toggle_activity(request, slug):
         review.sign_of_review = True
         review.save()
         return HttpResponseRedirect(reverse('reviews:reviews_list', args=[review.dog.pk]))
+
+
+@login_required
+def export_reviews(request):
+    """
+    Потоковая выгрузка отзывов в CSV или NDJSON (параметр format). Модератор и администратор
+    выгружают все отзывы, пользователь - только свои.
+
+    Параметры:
+        request (HttpRequest): Запрос от клиента.
+
+    Возвращает:
+        StreamingHttpResponse: Файл выгрузки.
+    """
+    queryset = export_scope(Review.objects.all(), request.user, 'author')
+    return export_response(request, queryset, REVIEW_EXPORT_FIELDS, 'reviews')
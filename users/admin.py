@@ -1,8 +1,14 @@
 from django.contrib import admin
-from users.models import User
+from users.models import User, OutgoingMail
 
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ('email', 'first_name', 'last_name', 'role', 'pk', 'is_active')
     list_filter = ('last_name',)
+
+
+@admin.register(OutgoingMail)
+class OutgoingMailAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
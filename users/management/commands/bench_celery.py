@@ -0,0 +1,82 @@
+import multiprocessing
+import time
+
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from config.celery import app as celery_app
+from dogs.management.commands.bench_urls import percentile
+
+# Отдельное приложение с брокером в памяти процесса: замер не требует Redis и не трогает очереди проекта
+bench_app = Celery('bench', set_as_current=False)
+
+# Очередь завершений создаётся до запуска воркера, чтобы её унаследовали процессы prefork-пула
+completions = None
+
+
+@bench_app.task(name='bench.io_task', ignore_result=True, shared=False)
+def io_task(sent_at, duration):
+    """
+    Задача, ожидающая ввода-вывода (как отправка письма по SMTP): спит duration секунд.
+    В очередь завершений кладёт время ожидания в очереди.
+    """
+    started = time.time()
+    time.sleep(duration)
+    completions.put(started - sent_at)
+
+
+class Command(BaseCommand):
+    help = ('Маршруты задач Celery проекта и замер пропускной способности пулов воркера (solo, threads, prefork) '
+            'с брокером в памяти')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=200, help='Задач на замер')
+        parser.add_argument('--task-ms', type=float, default=20, help='Длительность задачи, мс')
+        parser.add_argument('--concurrency', type=int, default=8, help='Процессов или потоков пула')
+        parser.add_argument('--prefetch-multiplier', type=int, default=settings.CELERY_WORKER_PREFETCH_MULTIPLIER)
+        parser.add_argument('--pools', default='solo,threads,prefork', help='Пулы через запятую')
+        parser.add_argument('--queue', default='mail', help='Очередь, в которую отправляются задачи')
+
+    def handle(self, *args, **options):
+        self.print_routes()
+
+        global completions
+        completions = multiprocessing.SimpleQueue()
+        bench_app.conf.update(
+            broker_url='memory://',
+            # Брокер в памяти опрашивается, а не будит воркер: без короткого интервала замер упирается в опрос
+            broker_transport_options={'polling_interval': 0.001},
+            result_backend='cache+memory://',
+            task_queues=settings.CELERY_TASK_QUEUES,
+            task_default_queue=settings.CELERY_TASK_DEFAULT_QUEUE,
+            worker_prefetch_multiplier=options['prefetch_multiplier'],
+            worker_hijack_root_logger=False,
+        )
+        duration = options['task_ms'] / 1000
+        print(f'\n{"пул":<10} {"потоков":>8} {"задач/с":>9} {"ожидание p50 мс":>16} {"p95 мс":>8}')
+        for pool in options['pools'].split(','):
+            concurrency = 1 if pool == 'solo' else options['concurrency']
+            with start_worker(bench_app, pool=pool, concurrency=concurrency, queues=[options['queue']],
+                              perform_ping_check=False, shutdown_timeout=60):
+                start = time.perf_counter()
+                for _ in range(options['tasks']):
+                    io_task.apply_async((time.time(), duration), queue=options['queue'])
+                waits = [completions.get() * 1000 for _ in range(options['tasks'])]
+                elapsed = time.perf_counter() - start
+            print(f'{pool:<10} {concurrency:>8} {options["tasks"] / elapsed:>9.0f} '
+                  f'{percentile(waits, 50):>16.1f} {percentile(waits, 95):>8.1f}')
+
+    def print_routes(self):
+        """
+        Очередь и ignore_result каждой задачи проекта по настройкам CELERY_TASK_ROUTES.
+        """
+        celery_app.loader.import_default_modules()
+        names = sorted(name for name in celery_app.tasks if not name.startswith('celery.'))
+        if not names:
+            raise CommandError('Задачи проекта не найдены')
+        print(f'{"задача":<45} {"очередь":<12} ignore_result')
+        for name in names:
+            queue = celery_app.amqp.router.route({}, name)['queue'].name
+            print(f'{name:<45} {queue:<12} {celery_app.tasks[name].ignore_result}')
@@ -0,0 +1,51 @@
+import tempfile
+import time
+import uuid
+
+from django.core import mail
+from django.core.mail import send_mail
+from django.core.management import BaseCommand
+from django.test.utils import override_settings
+
+from users.models import OutgoingMail
+from users.services import drain_outbox, queue_mail
+
+BACKENDS = {
+    'locmem': 'django.core.mail.backends.locmem.EmailBackend',
+    'file': 'django.core.mail.backends.filebased.EmailBackend',
+}
+
+
+class Command(BaseCommand):
+    help = 'Замер пропускной способности очереди писем против отправки send_mail по одному письму'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--backend', choices=BACKENDS, default='locmem')
+
+    def handle(self, *args, **options):
+        count = options['messages']
+        recipients = [f'bench{n}@example.com' for n in range(count)]
+        subject = f'bench {uuid.uuid4().hex}'
+        with tempfile.TemporaryDirectory() as file_path, \
+                override_settings(EMAIL_BACKEND=BACKENDS[options['backend']], EMAIL_FILE_PATH=file_path):
+            mail.outbox = []
+            start = time.perf_counter()
+            for recipient in recipients:
+                send_mail(subject, 'bench', None, [recipient])
+            elapsed = time.perf_counter() - start
+            print(f'send_mail: {count} писем за {elapsed:.3f} с ({count / elapsed:.0f} писем/с), соединений: {count}')
+
+            queue_mail(subject, 'bench', recipients)
+            bench_mails = OutgoingMail.objects.filter(subject=subject)
+            try:
+                mail.outbox = []
+                start = time.perf_counter()
+                sent, failed = drain_outbox(batch_size=options['batch_size'], queryset=bench_mails)
+                elapsed = time.perf_counter() - start
+                connections = -(-count // options['batch_size'])
+                print(f'outbox: {sent} писем за {elapsed:.3f} с ({sent / elapsed:.0f} писем/с), '
+                      f'ошибок: {failed}, соединений: {connections}')
+            finally:
+                bench_mails.delete()
@@ -1,13 +1,58 @@
-from django.core.management import BaseCommand
+import os
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
 
 from config.celery import app as celery_app
 
+# На Windows prefork не работает, поэтому там по умолчанию solo
+DEFAULT_POOL = 'solo' if os.name == 'nt' else 'prefork'
+
+
 class Command(BaseCommand):
+    help = ('Запуск воркера Celery: пул (prefork, threads, gevent, solo), число процессов или потоков, '
+            'prefetch, автомасштабирование и очереди (mail, counters, media, maintenance)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pool', choices=('prefork', 'threads', 'gevent', 'solo'), default=DEFAULT_POOL,
+                            help='gevent запускается напрямую через celery -A config worker -P gevent')
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Процессов или потоков пула (по умолчанию - число ядер)')
+        parser.add_argument('--prefetch-multiplier', type=int, default=settings.CELERY_WORKER_PREFETCH_MULTIPLIER,
+                            help='Сколько задач на процесс или поток брать из брокера заранее')
+        parser.add_argument('--autoscale', default=None, help='Пределы prefork-пула в виде max,min')
+        parser.add_argument('--queues', default=','.join(queue.name for queue in settings.CELERY_TASK_QUEUES),
+                            help='Очереди через запятую')
+        parser.add_argument('--hostname', default=None, help='Имя узла (по умолчанию - по очередям)')
+        parser.add_argument('--beat', action='store_true',
+                            help='Запускать расписание celery beat в этом воркере (нужно ровно в одном)')
+        parser.add_argument('--loglevel', default='info')
 
     def handle(self, *args, **options):
+        pool = options['pool']
+        queues = [name.strip() for name in options['queues'].split(',') if name.strip()]
+        known = {queue.name for queue in settings.CELERY_TASK_QUEUES}
+        if not queues or set(queues) - known:
+            raise CommandError(f'Неизвестные очереди: {options["queues"]}. Доступны: {", ".join(sorted(known))}')
+        if options['autoscale'] and pool != 'prefork':
+            raise CommandError('--autoscale работает только с пулом prefork')
+        if pool == 'gevent':
+            # Патч gevent должен примениться до импорта Django и драйверов базы, а команда запускается
+            # уже после них, поэтому такой воркер запускается самим celery
+            raise CommandError('Пул gevent запускается напрямую: celery -A config worker -P gevent')
+
         argv = [
             'worker',
-            '--loglevel=info',
-            '--pool=solo'
+            f'--loglevel={options["loglevel"]}',
+            f'--pool={pool}',
+            f'--prefetch-multiplier={options["prefetch_multiplier"]}',
+            f'--queues={",".join(queues)}',
+            f'--hostname={options["hostname"] or "-".join(queues) + "@%h"}',
         ]
+        if options['concurrency']:
+            argv.append(f'--concurrency={options["concurrency"]}')
+        if options['autoscale']:
+            argv.append(f'--autoscale={options["autoscale"]}')
+        if options['beat']:
+            argv.append('--beat')
         celery_app.worker_main(argv)
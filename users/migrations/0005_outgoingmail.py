@@ -0,0 +1,34 @@
+# Generated by Django 5.0.9 on 2026-10-17 18:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_role'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingMail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='subject')),
+                ('message', models.TextField(verbose_name='message')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='recipient')),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('sent', 'sent'), ('failed', 'failed')], default='pending', max_length=7)),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='attempts')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='next_attempt_at')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='last_error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created_at')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='sent_at')),
+            ],
+            options={
+                'verbose_name': 'Outgoing mail',
+                'verbose_name_plural': 'Outgoing mails',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outgoing_mail_pending_idx')],
+            },
+        ),
+    ]
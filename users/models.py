@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Now
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 NULLABLE = {'blank': True, 'null': True}
@@ -27,7 +29,9 @@ class User(AbstractUser):
         phone (CharField): Номер телефона (необязательное поле).
         telegram (CharField): Никнейм в Telegram (необязательное поле).
         avatar (ImageField): Аватар пользователя (необязательное поле).
+        avatar_variants (JSONField): Уменьшенные варианты аватара (строятся задачей build_image_variants_task).
         is_active (BooleanField): Признак активности пользователя.
+        updated_at (DateTimeField): Время последнего изменения (валидатор условного GET).
 
     Методы:
         __str__(): Строковое представление объекта пользователя.
@@ -36,6 +40,7 @@ class User(AbstractUser):
         verbose_name: Название модели в единственном числе.
         verbose_name_plural: Название модели во множественном числе.
         ordering: Сортировка по полю id.
+        indexes: Индекс списка активных пользователей (is_active, id).
     """
 
     username = None
@@ -46,7 +51,9 @@ class User(AbstractUser):
     phone = models.CharField(max_length=35, verbose_name='telephone_number', **NULLABLE)
     telegram = models.CharField(max_length=150, verbose_name='Telegram_username', **NULLABLE)
     avatar = models.ImageField(upload_to='users/', verbose_name='Avatar', **NULLABLE)
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Avatar variants')
     is_active = models.BooleanField(default=True, verbose_name='Active')
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now(), verbose_name='Updated at')
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
@@ -61,3 +68,63 @@ class User(AbstractUser):
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['id']
+        indexes = [
+            models.Index(fields=['is_active', 'id'], name='user_active_id_idx'),
+        ]
+
+
+class MailStatus(models.TextChoices):
+    """
+    Класс для выбора статуса письма в очереди отправки.
+    """
+    PENDING = 'pending', _('pending')
+    SENT = 'sent', _('sent')
+    FAILED = 'failed', _('failed')
+
+
+class OutgoingMail(models.Model):
+    """
+    Письмо в очереди отправки (outbox). Письма отправляет периодическая задача пачками по одному SMTP-соединению.
+
+    Поля:
+        subject (CharField): Тема письма.
+        message (TextField): Текст письма.
+        recipient (EmailField): Адрес получателя.
+        status (CharField): Статус письма, выбирается из вариантов MailStatus.
+        attempts (PositiveIntegerField): Количество неудачных попыток отправки.
+        next_attempt_at (DateTimeField): Время, раньше которого письмо не отправляется.
+        last_error (TextField): Текст последней ошибки отправки.
+        created_at (DateTimeField): Время постановки письма в очередь.
+        sent_at (DateTimeField): Время успешной отправки.
+
+    Методы:
+        __str__(): Строковое представление письма.
+
+    Метакласс:
+        verbose_name: Название модели в единственном числе.
+        verbose_name_plural: Название модели во множественном числе.
+        indexes: Индекс выборки писем, готовых к отправке.
+    """
+
+    subject = models.CharField(max_length=255, verbose_name='subject')
+    message = models.TextField(verbose_name='message')
+    recipient = models.EmailField(verbose_name='recipient')
+    status = models.CharField(max_length=7, choices=MailStatus.choices, default=MailStatus.PENDING)
+    attempts = models.PositiveIntegerField(default=0, verbose_name='attempts')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='next_attempt_at')
+    last_error = models.TextField(verbose_name='last_error', **NULLABLE)
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='created_at')
+    sent_at = models.DateTimeField(verbose_name='sent_at', **NULLABLE)
+
+    def __str__(self):
+        """
+        Возвращает строку, представляющую письмо.
+        """
+        return f'{self.recipient}: {self.subject}'
+
+    class Meta:
+        verbose_name = 'Outgoing mail'
+        verbose_name_plural = 'Outgoing mails'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outgoing_mail_pending_idx'),
+        ]
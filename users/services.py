@@ -1,20 +1,43 @@
+from datetime import timedelta
+
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import transaction
+from django.utils import timezone
 
 from celery import shared_task
 
+from users.models import MailStatus, OutgoingMail
+
+
+def queue_mail(subject, message, recipient_list):
+    """
+    Постановка письма в очередь отправки. Письмо отправит задача drain_outbox_task.
+
+    Аргументы:
+        subject (str): Тема письма.
+        message (str): Текст письма.
+        recipient_list (list): Адреса получателей, на каждый создаётся отдельное письмо.
+
+    Возвращает:
+        list: Созданные письма очереди.
+    """
+    return OutgoingMail.objects.bulk_create([
+        OutgoingMail(subject=subject, message=message, recipient=recipient)
+        for recipient in recipient_list
+    ])
+
 
 def send_register_email(email):
     """
-    Отправка письма с поздравлением о регистрации.
+    Постановка в очередь письма с поздравлением о регистрации.
 
     Аргументы:
         email (str): Адрес электронной почты получателя.
     """
-    send_mail(
+    queue_mail(
         subject='Поздравляем с регистрацией',
         message='Вы успешно зарегистрировались!',
-        from_email=settings.EMAIL_HOST_USER,
         recipient_list=[email],
     )
 
@@ -23,6 +46,8 @@ def send_new_password(email, new_password):
     """
     Отправка письма с новым паролем.
 
+    Письмо отправляется сразу и не попадает в очередь, чтобы пароль не хранился в базе.
+
     Аргументы:
         email (str): Адрес электронной почты получателя.
         new_password (str): Новый пароль пользователя.
@@ -35,12 +60,129 @@ def send_new_password(email, new_password):
     )
 
 
-@shared_task
-def send_register_email_task(email):
+def claim_outbox_batch(batch_size, queryset=None):
     """
-    Задание Celery для асинхронной отправки письма с поздравлением о регистрации.
+    Захват пачки писем, готовых к отправке.
+
+    Захваченным письмам время следующей попытки сдвигается на MAIL_OUTBOX_LEASE секунд,
+    поэтому параллельный разборщик их не возьмёт, а после падения воркера они вернутся в очередь.
 
     Аргументы:
-        email (str): Адрес электронной почты получателя.
+        batch_size (int): Максимальное количество писем.
+        queryset (QuerySet): Ограничение выборки писем. По умолчанию вся очередь.
+
+    Возвращает:
+        list: Захваченные письма.
+    """
+    now = timezone.now()
+    queryset = OutgoingMail.objects.all() if queryset is None else queryset
+    with transaction.atomic():
+        mails = list(
+            queryset.select_for_update(skip_locked=True)
+            .filter(status=MailStatus.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'pk')[:batch_size]
+        )
+        OutgoingMail.objects.filter(pk__in=[mail.pk for mail in mails]).update(
+            next_attempt_at=now + timedelta(seconds=settings.MAIL_OUTBOX_LEASE),
+        )
+    return mails
+
+
+def send_outbox_batch(mails, connection=None):
+    """
+    Отправка пачки писем по одному SMTP-соединению.
+
+    Каждое письмо передаётся в send_messages отдельно, чтобы ошибка одного письма не приводила
+    к повторной отправке уже ушедших.
+
+    Аргументы:
+        mails (list): Письма очереди.
+        connection: Почтовое соединение. По умолчанию создаётся через get_connection().
+
+    Возвращает:
+        tuple: Списки отправленных писем и пар (письмо, ошибка).
+    """
+    connection = connection or get_connection(fail_silently=False)
+    sent, failed = [], []
+    try:
+        connection.open()
+    except Exception as exc:
+        return sent, [(mail, exc) for mail in mails]
+    try:
+        for mail in mails:
+            message = EmailMessage(
+                subject=mail.subject,
+                body=mail.message,
+                from_email=settings.EMAIL_HOST_USER,
+                to=[mail.recipient],
+            )
+            try:
+                connection.send_messages([message])
+            except Exception as exc:
+                failed.append((mail, exc))
+            else:
+                sent.append(mail)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def record_outbox_results(sent, failed):
+    """
+    Сохранение результатов отправки: отправленные письма помечаются одним UPDATE,
+    неудачным назначается следующая попытка с экспоненциальной задержкой.
+
+    Аргументы:
+        sent (list): Отправленные письма.
+        failed (list): Пары (письмо, ошибка).
+    """
+    now = timezone.now()
+    OutgoingMail.objects.filter(pk__in=[mail.pk for mail in sent]).update(status=MailStatus.SENT, sent_at=now)
+    for mail, exc in failed:
+        mail.attempts += 1
+        mail.last_error = str(exc)
+        if mail.attempts >= settings.MAIL_OUTBOX_MAX_ATTEMPTS:
+            mail.status = MailStatus.FAILED
+        mail.next_attempt_at = now + timedelta(seconds=settings.MAIL_OUTBOX_RETRY_DELAY * 2 ** (mail.attempts - 1))
+    OutgoingMail.objects.bulk_update(
+        [mail for mail, _ in failed], ['attempts', 'last_error', 'status', 'next_attempt_at'],
+    )
+
+
+def drain_outbox(batch_size=None, max_batches=None, queryset=None):
+    """
+    Разбор очереди писем пачками, пока в ней есть готовые к отправке письма.
+
+    Аргументы:
+        batch_size (int): Размер пачки. По умолчанию MAIL_OUTBOX_BATCH_SIZE.
+        max_batches (int): Максимальное количество пачек за один вызов. По умолчанию без ограничения.
+        queryset (QuerySet): Ограничение выборки писем. По умолчанию вся очередь.
+
+    Возвращает:
+        tuple: Количество отправленных и неудачных писем.
+    """
+    batch_size = batch_size or settings.MAIL_OUTBOX_BATCH_SIZE
+    sent_total, failed_total, batches = 0, 0, 0
+    while max_batches is None or batches < max_batches:
+        mails = claim_outbox_batch(batch_size, queryset)
+        if not mails:
+            break
+        sent, failed = send_outbox_batch(mails)
+        record_outbox_results(sent, failed)
+        sent_total += len(sent)
+        failed_total += len(failed)
+        batches += 1
+        if len(mails) < batch_size:
+            break
+    return sent_total, failed_total
+
+
+@shared_task(ignore_result=True)
+def drain_outbox_task():
+    """
+    Периодическая задача Celery, отправляющая письма из очереди.
+
+    Возвращает:
+        tuple: Количество отправленных и неудачных писем.
     """
-    return send_register_email(email)
+    return drain_outbox()
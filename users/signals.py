@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from dogs.services import schedule_image_variants
+from users.models import User
+
+
+@receiver(post_save, sender=User)
+def build_avatar_variants(sender, instance, raw=False, **kwargs):
+    """
+    Постановка задачи построения вариантов аватара после его загрузки или замены.
+
+    Аргументы:
+       instance (User): Сохранённый пользователь.
+       raw (bool): Загрузка фикстуры, варианты строятся командой build_image_variants.
+       kwargs: Параметры, переданные сигналом.
+    """
+    if not raw:
+        schedule_image_variants(instance)
@@ -1,3 +1,122 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from dogs.tests import QUERY_BUDGET_SETTINGS, QueryBudgetMixin
+from users.models import MailStatus, OutgoingMail, UserRoles
+from users.services import claim_outbox_batch, drain_outbox, queue_mail
+
+
+@override_settings(**QUERY_BUDGET_SETTINGS)
+class UserQueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """Бюджет SQL-запросов страниц users."""
+
+    def test_users_list(self):
+        self.assertQueryBudget('users:users_list', [], None, 1, 0)
+
+    def test_detail_user(self):
+        self.assertQueryBudget('users:detail_user', [self.users[UserRoles.USER].pk], None, 2, 1)
+
+    def test_profile_user(self):
+        self.assertQueryBudget('users:profile_user', [], UserRoles.USER, 2)
+
+
+class FailingEmailBackend(locmem.EmailBackend):
+    """
+    Почтовый бэкенд в памяти, который не отправляет письма на адреса, начинающиеся с fail,
+    и не открывает соединение, если open_error задан.
+    """
+    open_error = None
+
+    def open(self):
+        if self.open_error:
+            raise self.open_error
+        return super().open()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(recipient.startswith('fail') for recipient in message.to):
+                raise ConnectionError(f'Отказ сервера для {message.to[0]}')
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='users.tests.FailingEmailBackend', MAIL_OUTBOX_MAX_ATTEMPTS=3,
+                   MAIL_OUTBOX_RETRY_DELAY=60, MAIL_OUTBOX_LEASE=600)
+class OutboxTestCase(TestCase):
+    """Очередь писем: аренда пачки, отправка, повторы с экспоненциальной задержкой и окончательная ошибка."""
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def at(self, seconds):
+        """
+        Подмена текущего времени для очереди писем.
+
+        Аргументы:
+            seconds (int): Сдвиг от начала теста в секундах.
+        """
+        return mock.patch('users.services.timezone.now', return_value=self.now + timedelta(seconds=seconds))
+
+    def queue(self, *recipients):
+        mails = queue_mail('Тема', 'Текст', recipients)
+        OutgoingMail.objects.update(next_attempt_at=self.now)
+        return mails
+
+    def test_lease(self):
+        queued, = self.queue('lease@example.com')
+        with self.at(0):
+            self.assertEqual([item.pk for item in claim_outbox_batch(10)], [queued.pk])
+            self.assertEqual(claim_outbox_batch(10), [])
+        queued.refresh_from_db()
+        self.assertEqual(queued.next_attempt_at, self.now + timedelta(seconds=600))
+        self.assertEqual(queued.status, MailStatus.PENDING)
+        # Воркер, захвативший письмо, упал: после окончания аренды письмо снова в очереди
+        with self.at(600):
+            self.assertEqual([item.pk for item in claim_outbox_batch(10)], [queued.pk])
+
+    def test_sent(self):
+        self.queue('first@example.com', 'second@example.com')
+        with self.at(0):
+            self.assertEqual(drain_outbox(batch_size=1), (2, 0))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['first@example.com', 'second@example.com'])
+        self.assertQuerySetEqual(OutgoingMail.objects.values_list('status', 'attempts', 'sent_at'),
+                                 [(MailStatus.SENT, 0, self.now)] * 2, ordered=False)
+
+    def test_retry_backoff_and_failure(self):
+        self.queue('ok@example.com', 'fail@example.com')
+        with self.at(0):
+            self.assertEqual(drain_outbox(), (1, 1))
+        failed = OutgoingMail.objects.get(recipient='fail@example.com')
+        self.assertEqual((failed.status, failed.attempts), (MailStatus.PENDING, 1))
+        self.assertEqual(failed.next_attempt_at, self.now + timedelta(seconds=60))
+        self.assertIn('fail@example.com', failed.last_error)
+
+        # До срока повтора письмо не отправляется, отправленное повторно не уходит
+        with self.at(59):
+            self.assertEqual(drain_outbox(), (0, 0))
+        with self.at(60):
+            self.assertEqual(drain_outbox(), (0, 1))
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), (MailStatus.PENDING, 2))
+        self.assertEqual(failed.next_attempt_at, self.now + timedelta(seconds=60 + 120))
+
+        with self.at(180):
+            self.assertEqual(drain_outbox(), (0, 1))
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), (MailStatus.FAILED, 3))
+        with self.at(10 ** 6):
+            self.assertEqual(drain_outbox(), (0, 0))
+        self.assertEqual([message.to[0] for message in mail.outbox], ['ok@example.com'])
+
+    def test_connection_error(self):
+        self.queue('first@example.com', 'second@example.com')
+        refused = ConnectionRefusedError('SMTP недоступен')
+        with self.at(0), mock.patch.object(FailingEmailBackend, 'open_error', refused):
+            self.assertEqual(drain_outbox(), (0, 2))
+        self.assertQuerySetEqual(OutgoingMail.objects.values_list('status', 'attempts', 'last_error'),
+                                 [(MailStatus.PENDING, 1, 'SMTP недоступен')] * 2, ordered=False)
+        self.assertEqual(mail.outbox, [])
@@ -7,9 +7,12 @@ from django.shortcuts import reverse, redirect
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse_lazy
 
+from config.db.routers import use_primary
+from dogs.conditional import ConditionalGetMixin
+from dogs.pagination import CursorPaginationMixin
 from users.forms import UserRegisterForm, UserLoginForm, UserUpdateForm, UserChangePasswordForm, UserForm
 from users.models import User
-from users.services import send_new_password, send_register_email_task
+from users.services import send_new_password, send_register_email
 
 
 class UserRegisterView(CreateView):
@@ -23,7 +26,7 @@ class UserRegisterView(CreateView):
         template_name (str): Путь к шаблону для отображения формы регистрации.
 
     Методы:
-        form_valid(self, form): Обработчик успешной отправки формы. Сохраняет пользователя и отправляет письмо с подтверждением.
+        form_valid(self, form): Обработчик успешной отправки формы. Сохраняет пользователя и ставит в очередь письмо с подтверждением.
     """
 
     model = User
@@ -42,7 +45,7 @@ class UserRegisterView(CreateView):
             HttpResponseRedirect: Перенаправление на страницу успешного завершения регистрации.
         """
         self.object = form.save()
-        send_register_email_task.delay(self.object.email)
+        send_register_email(self.object.email)
         return super().form_valid(form)
 
 
@@ -141,6 +144,7 @@ class UserLogoutView(LogoutView):
 
 
 @login_required
+@use_primary
 def user_generate_new_password(request):
     """
     Функция для генерации нового случайного пароля для пользователя и отправки его на email.
@@ -152,12 +156,13 @@ def user_generate_new_password(request):
     return redirect(reverse('dogs:index'))
 
 
-class UserListView(ListView):
+class UserListView(ConditionalGetMixin, CursorPaginationMixin, ListView):
     """
-    Представление для списка всех активных пользователей.
+    Представление для списка всех активных пользователей с условным GET.
 
     Атрибуты:
         model (User): Модель пользователя.
+        validator_models (tuple): Пользователи.
         paginate_by (int): Количество пользователей на одной странице.
         extra_context (dict): Дополнительный контекст для передачи в шаблон.
         template_name (str): Путь к шаблону для отображения списка пользователей.
@@ -167,6 +172,7 @@ class UserListView(ListView):
     """
 
     model = User
+    validator_models = (User,)
     paginate_by = 3
     extra_context = {
         'title': 'Все пользователи сайта'
@@ -185,9 +191,9 @@ class UserListView(ListView):
         return queryset
 
 
-class UserDetailView(DetailView):
+class UserDetailView(ConditionalGetMixin, DetailView):
     """
-    Представление для детального просмотра информации о конкретном пользователе.
+    Представление для детального просмотра информации о конкретном пользователе с условным GET.
 
     Атрибуты:
         model (User): Модель пользователя.